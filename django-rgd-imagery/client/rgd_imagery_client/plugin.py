@@ -245,6 +245,48 @@ class ImageryPlugin(RgdPlugin):
 
         return list(limit_offset_pager(self.session, 'rgd_imagery/raster/search', params=params))
 
+    def download_raster_cube(
+        self,
+        query: Union[Dict, str],
+        path: Union[str, Path],
+        acquired: Optional[DATETIME_OR_STR_TUPLE] = None,
+        collections: Optional[List[int]] = None,
+        bands: Optional[List[int]] = None,
+        crs: Optional[str] = None,
+        resolution: Optional[float] = None,
+    ) -> Path:
+        """
+        Download the time series cube of the rasters within an area of interest.
+
+        Only the pixels within the area are read from each raster, on a common
+        grid, and stacked by acquisition date.
+
+        Args:
+            query: The area of interest, either a WKT, a GeoJSON string, or a GeoJSON dict.
+            path: The path to write the cube to, a NumPy archive to open with ``numpy.load``.
+            acquired: The min/max date and time (ISO 8601) when the rasters were acquired.
+            collections: The IDs of the collections the rasters belong to.
+            bands: The band numbers to read across the images of each raster.
+            crs: The spatial reference of the grid. Defaults to that of the first raster.
+            resolution: The size of the pixels in the units of ``crs``.
+
+        Returns:
+            The path of the cube.
+        """
+        params = spatial_search_params(query=query, acquired=acquired, collections=collections)
+        if bands:
+            params['bands'] = ','.join(str(b) for b in bands)
+        params['crs'] = crs
+        params['cube_resolution'] = resolution
+
+        r = self.session.get('rgd_imagery/raster/cube', params=params, stream=True)
+        r.raise_for_status()
+        path = Path(path)
+        with open(path, 'wb') as f:
+            for chunk in r.iter_content(chunk_size=1024 * 1024):
+                f.write(chunk)
+        return path
+
     def create_image_from_file(self, checksum_file: Dict) -> Dict:
         """
         Create an image from a ChecksumFile.
@@ -282,9 +324,29 @@ class ImageryPlugin(RgdPlugin):
 
         return self.session.post('rgd_imagery/image_set', json=payload).json()
 
+    def _wait_for_status(self, url: str, done, timeout: int = 30) -> Dict:
+        """Long poll a status endpoint until ``done`` is true for its data."""
+        r = self.session.get(url)
+        r.raise_for_status()
+        data = r.json()
+        while not done(data):
+            etag = r.headers.get('ETag')
+            if etag is None:
+                # The server does not support long polling
+                time.sleep(1)
+                r = self.session.get(url)
+            else:
+                r = self.session.get(url, params={'wait': timeout}, headers={'If-None-Match': etag})
+            if r.status_code == 304:
+                continue
+            r.raise_for_status()
+            data = r.json()
+        return data
+
     def get_raster_status(
         self,
         raster: Union[Dict, int],
+        wait: bool = False,
     ):
         """Get raster processing status.
 
@@ -292,10 +354,17 @@ class ImageryPlugin(RgdPlugin):
         ----------
         raster : dict, int
             Accepts the Raster (not RasterMeta) primary key.
+        wait : bool
+            Wait until the raster is done processing.
         """
         if isinstance(raster, dict):
             raster = raster['id']
-        return self.session.get(f'rgd_imagery/raster/{raster}/status').json()
+        url = f'rgd_imagery/raster/{raster}/status'
+        if wait:
+            return self._wait_for_status(
+                url, lambda data: data['status'] not in ['created', 'queued', 'running']
+            )
+        return self.session.get(url).json()
 
     def create_raster_from_image_set(
         self,
@@ -319,19 +388,8 @@ class ImageryPlugin(RgdPlugin):
 
         raster = self.session.post('rgd_imagery/raster', json=payload).json()
 
-        def poll():
-            response = self.get_raster_status(raster)
-            if response['status'] in ['created', 'queued', 'running']:
-                time.sleep(1)
-                return True
-            return False
-
-        # Poll raster for status
-        while poll():
-            pass
-
-        # Final refresh to ensure integrity of raster_meta_id
-        raster = self.get_raster_status(raster)
+        # Wait for the raster to be processed, which also refreshes its raster_meta_id
+        raster = self.get_raster_status(raster, wait=True)
 
         # Get and return RasterMeta
         return self.get_raster(raster['raster_meta_id'])
@@ -355,11 +413,27 @@ class ImageryPlugin(RgdPlugin):
         r.raise_for_status()
         return r.json()
 
-    def get_processed_image_group_status(self, group_id: Union[str, int, dict]):
+    def get_processed_image_group_status(
+        self, group_id: Union[str, int, dict], wait: bool = False
+    ) -> Dict:
+        """Get the status counts and progress of the processed images of a group.
+
+        Parameters
+        ----------
+        group_id : str, int, dict
+            The ProcessedImageGroup or its primary key.
+        wait : bool
+            Wait until all images of the group are done processing.
+        """
         if isinstance(group_id, dict):
             group_id = group_id['id']
+        url = f'image_process/group/{group_id}/status'
+        if wait:
+            return self._wait_for_status(
+                url, lambda data: not any(data[s] for s in ['created', 'queued', 'running'])
+            )
 
-        r = self.session.get(f'image_process/group/{group_id}/status')
+        r = self.session.get(url)
         r.raise_for_status()
         return r.json()
 
@@ -380,6 +454,28 @@ class ImageryPlugin(RgdPlugin):
         r.raise_for_status()
         return r.json()
 
+    def create_processed_images(
+        self, image_ids: Iterable[List[Union[str, int]]], group_id: Union[str, int, dict]
+    ) -> List[Dict]:
+        """Create a processed image of the group for each list of source images.
+
+        This makes a single request, so it is much faster than calling
+        ``create_processed_image`` for each of many images.
+        """
+        if isinstance(group_id, dict):
+            group_id = group_id['id']
+
+        r = self.session.post(
+            'image_process/bulk',
+            json=dict(
+                group=group_id,
+                source_images=[list(ids) for ids in image_ids],
+            ),
+        )
+
+        r.raise_for_status()
+        return r.json()
+
     def get_leaflet_tile_source(
         self,
         image_id: Union[str, int],
@@ -164,6 +164,8 @@ class BandMetaInline(admin.StackedInline):
         'std',
         'nodata_value',
         'band_number',
+        'histogram',
+        'percentiles',
     )
 
     def has_add_permission(self, request, obj=None):
@@ -0,0 +1,210 @@
+"""Time series cubes of the rasters covering an area of interest.
+
+The rasters are warped to a common grid covering the area of interest and
+stacked along their acquisition dates. Only the windows of each raster
+within the area are read, from all rasters in parallel, so the size of the
+scenes does not matter: files stored at a URL are read in ranges through
+GDAL's ``/vsicurl/`` and ``/vsis3/`` rather than downloaded. The cube is written as a compressed NumPy archive
+holding the pixels and their coordinates::
+
+    data        (time, band, y, x) pixels, `nodata` outside of the rasters
+    time        acquisition dates (datetime64, UTC)
+    raster      primary keys of the RasterMeta of each time step
+    band        band numbers across the images of each raster (1-indexed)
+    x, y        coordinates of the pixel centers in `crs`
+    transform   the affine transform of the grid (GDAL order)
+    crs         WKT of the spatial reference of the grid
+    nodata      the fill value
+
+"""
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+import datetime
+import math
+from typing import List, Optional, Sequence
+from urllib.parse import urlparse
+
+import boto3
+from crum import get_current_user
+from django.conf import settings
+from django.db import connections
+import numpy as np
+import rasterio
+from rasterio import Affine
+from rasterio.crs import CRS
+from rasterio.warp import Resampling
+from rgd_imagery import reproject, vrt
+from rgd_imagery.large_image_utilities import yield_image_local_path
+
+# Read remote files in ranges without listing their directories, and with GET
+#  only as presigned URLs are not valid for HEAD requests
+REMOTE_GDAL_OPTIONS = {'GDAL_DISABLE_READDIR_ON_OPEN': 'EMPTY_DIR', 'CPL_VSIL_CURL_USE_HEAD': 'NO'}
+
+
+def get_cube_grid(aoi, crs: str, resolution: Sequence[float]):
+    """Get the transform, width and height of a grid covering ``aoi`` in ``crs``.
+
+    ``aoi`` is a ``GEOSGeometry`` with an SRID and ``resolution`` the x and
+    y size of the pixels in the units of ``crs``.
+
+    """
+    left, bottom, right, top = reproject.transform_bounds(f'EPSG:{aoi.srid}', crs, *aoi.extent)
+    x_res, y_res = (abs(r) for r in resolution)
+    width = max(1, math.ceil((right - left) / x_res))
+    height = max(1, math.ceil((top - bottom) / y_res))
+    return Affine(x_res, 0, left, 0, -y_res, top), width, height
+
+
+@contextmanager
+def _open_image(image, user=None):
+    """Open an image, reading files stored at a URL in ranges rather than downloading them."""
+    file = image.file
+    url = None
+    # Virtual mosaics and files with sidecar files (a FileSet) need local paths
+    if file.file_set is None and not vrt.is_virtual(file):
+        url = file.get_url(internal=True)
+    scheme = urlparse(url).scheme if url else None
+    if scheme in ('http', 'https', 's3'):
+        options = dict(REMOTE_GDAL_OPTIONS)
+        if scheme == 's3':
+            path = f'/vsis3/{url[len("s3://") :]}'
+            if not boto3.session.Session().get_credentials():
+                options['AWS_NO_SIGN_REQUEST'] = 'YES'
+        else:
+            path = f'/vsicurl/{url}'
+        with rasterio.Env(**options), rasterio.open(path) as src:
+            yield src
+        return
+    with yield_image_local_path(image, user=user) as path, rasterio.open(path) as src:
+        yield src
+
+
+def _get_band_count(raster_meta) -> int:
+    # From the prefetched bands of the images, without reading them
+    return sum(
+        len(image.bandmeta_set.all()) for image in raster_meta.parent_raster.image_set.images.all()
+    )
+
+
+def _read_raster(raster_meta, grid, crs: str, bands: Optional[List[int]], nodata, user):
+    """Read the bands of all of the images of a raster on the grid of the cube."""
+    transform, width, height = grid
+    arrays = []
+    offset = 0
+    try:
+        for image in raster_meta.parent_raster.image_set.images.all():
+            with _open_image(image, user) as src:
+                indexes = [
+                    b - offset
+                    for b in (bands or range(offset + 1, offset + src.count + 1))
+                    if offset < b <= offset + src.count
+                ]
+                offset += src.count
+                if not indexes:
+                    continue
+                with reproject.warped_vrt(
+                    src,
+                    crs,
+                    transform=transform,
+                    width=width,
+                    height=height,
+                    nodata=nodata,
+                    resampling=Resampling.nearest,
+                ) as vrt_src:
+                    # All bands are warped in one read, of the window in the grid only
+                    arrays.append(vrt_src.read(indexes))
+    finally:
+        # Close the database connection of this worker thread
+        connections.close_all()
+    if bands and max(bands) > offset:
+        raise ValueError(f'Raster {raster_meta.pk} only has {offset} bands.')
+    return np.concatenate(arrays) if arrays else np.empty((0, height, width))
+
+
+def read_cube(
+    raster_metas,
+    aoi,
+    crs: Optional[str] = None,
+    resolution: Optional[Sequence[float]] = None,
+    bands: Optional[List[int]] = None,
+    max_pixels: Optional[int] = None,
+    max_bytes: Optional[int] = None,
+    user=None,
+):
+    """Read the time series cube of the rasters within ``aoi``.
+
+    The grid defaults to the spatial reference and resolution of the first
+    raster. A ``resolution`` must be given with ``crs``, in its units.
+    Raises a ``ValueError`` if the grid is larger than ``max_pixels``, the
+    cube larger than ``max_bytes`` or the rasters do not have the same bands.
+    The band counts are taken from the ``BandMeta`` of the images, which
+    should be prefetched. The sources of virtual mosaics are only read if
+    ``user`` can read them, by default the user of the current request.
+
+    Returns a dict of the arrays of the cube, see the module documentation.
+
+    """
+    # The current user is not known in the threads reading the rasters
+    user = user or get_current_user()
+    raster_metas = list(raster_metas)
+    if not raster_metas:
+        raise ValueError('No rasters match the query.')
+    first = raster_metas[0]
+    if crs is not None and resolution is None:
+        raise ValueError('A resolution must be given with a spatial reference.')
+    crs = crs or first.crs
+    if resolution is None:
+        resolution = (first.transform[1], first.transform[5])
+    grid = get_cube_grid(aoi, crs, resolution)
+    transform, width, height = grid
+    if max_pixels is not None and width * height > max_pixels:
+        raise ValueError(
+            f'The cube of {width}x{height} pixels per band is larger than the limit of '
+            f'{max_pixels} pixels: reduce the area or the resolution.'
+        )
+    if max_bytes is not None:
+        first_image = first.parent_raster.image_set.images.all()[0]
+        with _open_image(first_image, user) as src:
+            itemsize = max(np.dtype(dtype).itemsize for dtype in src.dtypes)
+        band_count = sum(len(bands) if bands else _get_band_count(rm) for rm in raster_metas)
+        size = band_count * width * height * itemsize
+        if size > max_bytes:
+            raise ValueError(
+                f'The cube of {size} bytes is larger than the limit of {max_bytes} bytes: '
+                'reduce the area, the resolution, the bands or the date range.'
+            )
+    nodata = 0
+
+    threads = getattr(settings, 'RGD_CUBE_THREADS', 4)
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        slices = list(
+            executor.map(
+                lambda raster_meta: _read_raster(raster_meta, grid, crs, bands, nodata, user),
+                raster_metas,
+            )
+        )
+    if len({s.shape for s in slices}) > 1:
+        raise ValueError('The rasters do not have the same bands: select them with `bands`.')
+
+    return {
+        'data': np.stack(slices),
+        'time': np.array(
+            [
+                rm.acquisition_date.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+                for rm in raster_metas
+            ],
+            dtype='datetime64[s]',
+        ),
+        'raster': np.array([rm.pk for rm in raster_metas]),
+        'band': np.array(bands or range(1, slices[0].shape[0] + 1)),
+        'x': transform.c + (np.arange(width) + 0.5) * transform.a,
+        'y': transform.f + (np.arange(height) + 0.5) * transform.e,
+        'transform': np.array(transform.to_gdal()),
+        'crs': np.array(CRS.from_user_input(crs).to_wkt()),
+        'nodata': np.array(nodata),
+    }
+
+
+def write_cube(cube, file):
+    """Write a cube to a path or file object as a compressed NumPy archive."""
+    np.savez_compressed(file, **cube)
@@ -2,9 +2,38 @@ from contextlib import contextmanager
 
 import large_image
 from large_image.tilesource import FileTileSource
+from rgd_imagery import vrt
 from rgd_imagery.models import Image
 
 
+@contextmanager
+def yield_image_local_path(image: Image, user=None):
+    """Yield a local path of an image, resolving the sources of virtual mosaics.
+
+    The sources are resolved only if ``user`` can read them, by default the
+    user of the current request.
+
+    """
+    if vrt.is_virtual(image.file):
+        with vrt.yield_resolved_local_path(image.file, user=user) as file_path:
+            yield file_path
+        return
+    # NOTE: yield_file_set=True in case there are header files
+    with image.file.yield_local_path(yield_file_set=True) as file_path:
+        yield file_path
+
+
+def get_band_statistics_cache_key(image_pk: int) -> str:
+    """Key of the stored band statistics of an image cached by the tile endpoints."""
+    return f'large_image_tile:image_{image_pk}:band_statistics'
+
+
+def get_tilesource_from_path(
+    file_path, projection: str = None, style: str = None
+) -> FileTileSource:
+    return large_image.open(str(file_path), projection=projection, style=style, encoding='PNG')
+
+
 def get_tilesource_from_image(
     image: Image, projection: str = None, style: str = None
 ) -> FileTileSource:
@@ -12,9 +41,8 @@ def get_tilesource_from_image(
     #       this now requires the images be a local path on the file system.
     #       For URL files, this is done through FUSE but for S3FileField
     #       files, we must download the entire file to the local disk.
-    with image.file.yield_local_path(yield_file_set=True) as file_path:
-        # NOTE: yield_file_set=True in case there are header files
-        return large_image.open(str(file_path), projection=projection, style=style, encoding='PNG')
+    with yield_image_local_path(image) as file_path:
+        return get_tilesource_from_path(file_path, projection=projection, style=style)
 
 
 @contextmanager
@@ -1,8 +1,13 @@
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 from datetime import datetime
 import json
 import logging
+import multiprocessing
+import os
+import time
 
 from django.contrib.gis.geos import GEOSGeometry
+from django.db import connections
 from rgd.datastore import datastore
 from rgd.management.commands._data_helper import (
     _get_or_create_checksum_file_url,
@@ -91,17 +96,99 @@ def load_raster(pks, raster_dict):
     return raster
 
 
-def load_raster_files(raster_dicts):
-    ids = []
-    count = len(raster_dicts)
-    for i, rf in enumerate(raster_dicts):
-        logger.info(f'Processesing raster {i+1} of {count}')
-        start_time = datetime.now()
-        imentries = load_images(rf.get('images'))
-        raster = load_raster(imentries, rf)
-        ids.append(raster.pk)
-        logger.info('\t Loaded raster in: {}'.format(datetime.now() - start_time))
-    return ids
+def _raster_dict_key(raster_dict):
+    """Get a key identifying a raster dict across runs for checkpointing."""
+    if raster_dict.get('name'):
+        return raster_dict['name']
+    return '|'.join(str(imfile) for _, imfile in raster_dict['images'])
+
+
+def _read_checkpoint(checkpoint):
+    if not checkpoint or not os.path.exists(checkpoint):
+        return set()
+    with open(checkpoint, 'r') as f:
+        return {line.rstrip('\n') for line in f if line.strip()}
+
+
+def _load_raster_file(raster_dict):
+    imentries = load_images(raster_dict.get('images'))
+    return load_raster(imentries, raster_dict).pk
+
+
+def bulk_load_raster_files(raster_dicts, workers: int = 1, checkpoint: str = None):
+    """Load many rasters, optionally across a pool of worker processes.
+
+    At most ``workers`` rasters are loaded at a time. If ``checkpoint`` is
+    given, the key of each raster is appended to that file once it has been
+    loaded and rasters already listed in it are skipped, so an interrupted
+    run can be resumed.
+
+    Returns a summary dict with the ids of the loaded rasters, the number of
+    rasters that were skipped or failed and the elapsed seconds.
+
+    """
+    done = _read_checkpoint(checkpoint)
+    pending = [rf for rf in raster_dicts if _raster_dict_key(rf) not in done]
+    summary = {
+        'ids': [],
+        'skipped': len(raster_dicts) - len(pending),
+        'failed': 0,
+        'seconds': 0.0,
+    }
+    count = len(pending)
+    start_time = time.perf_counter()
+    checkpoint_file = open(checkpoint, 'a') if checkpoint else None
+
+    def record(raster_dict, load):
+        # Count a failure and carry on with the other rasters
+        try:
+            pk = load()
+        except Exception as e:
+            summary['failed'] += 1
+            logger.exception(f'Failed to load raster {_raster_dict_key(raster_dict)}: {e}')
+            return False
+        summary['ids'].append(pk)
+        if checkpoint_file:
+            checkpoint_file.write(_raster_dict_key(raster_dict) + '\n')
+            checkpoint_file.flush()
+        return True
+
+    try:
+        if workers <= 1:
+            for i, rf in enumerate(pending):
+                logger.info(f'Processesing raster {i+1} of {count}')
+                raster_start = datetime.now()
+                if record(rf, lambda: _load_raster_file(rf)):
+                    logger.info('\t Loaded raster in: {}'.format(datetime.now() - raster_start))
+        else:
+            # Forked workers must not share the database connections of this process
+            connections.close_all()
+            context = multiprocessing.get_context('fork')
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+                queue = iter(pending)
+                running = {}
+                while True:
+                    # Keep the number of submitted rasters bounded
+                    while len(running) < workers * 2:
+                        rf = next(queue, None)
+                        if rf is None:
+                            break
+                        running[executor.submit(_load_raster_file, rf)] = rf
+                    if not running:
+                        break
+                    finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        if record(running.pop(future), future.result):
+                            logger.info(f'Loaded raster {len(summary["ids"])} of {count}')
+    finally:
+        if checkpoint_file:
+            checkpoint_file.close()
+        summary['seconds'] = time.perf_counter() - start_time
+    return summary
+
+
+def load_raster_files(raster_dicts, workers: int = 1, checkpoint: str = None):
+    return bulk_load_raster_files(raster_dicts, workers=workers, checkpoint=checkpoint)['ids']
 
 
 def load_spatial_image_sets(image_sets):
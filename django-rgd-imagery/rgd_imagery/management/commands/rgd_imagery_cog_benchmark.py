@@ -0,0 +1,89 @@
+import os
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+from rgd import datastore
+from rgd.utility import get_temp_dir
+from rgd_imagery.tasks.subsample import _convert_to_cog
+
+# Names of files in the datastore
+SAMPLE_FILES = [
+    '20091021202517-01000100-VIS_0001.ntf',
+    'Elevation.tif',
+    'landcover_sample_2000.tif',
+    'paris_france_10.tiff',
+    'RomanColosseum_WV2mulitband_10.tif',
+    'TC_NG_SFBay_US_Geo.tif',
+]
+
+# The COG options compared, as set in the parameters of a COG ProcessedImageGroup
+PRESETS = {
+    'deflate': {'compression': 'deflate'},
+    'deflate-predictor': {'compression': 'deflate', 'predictor': 2},
+    'lzw': {'compression': 'lzw'},
+    'zstd': {'compression': 'zstd', 'level': 9},
+    'jpeg-85': {'compression': 'jpeg', 'quality': 85},
+    'webp-85': {'compression': 'webp', 'quality': 85},
+    'deflate-256-average': {
+        'compression': 'deflate',
+        'blocksize': 256,
+        'overview_resampling': 'average',
+    },
+}
+
+
+class Command(BaseCommand):
+    help = 'Compare the time and output size of COG conversions across options.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '-f',
+            '--file',
+            action='append',
+            help='A datastore file to convert. Defaults to a set of samples.',
+        )
+        parser.add_argument(
+            '-p',
+            '--preset',
+            action='append',
+            choices=sorted(PRESETS),
+            help='A preset of options to compare. Defaults to all of them.',
+        )
+        parser.add_argument(
+            '-t',
+            '--threads',
+            type=int,
+            action='append',
+            help='A number of threads to convert with. Defaults to 1.',
+        )
+
+    def handle(self, *args, **options):
+        names = options.get('file') or SAMPLE_FILES
+        presets = options.get('preset') or list(PRESETS)
+        thread_counts = options.get('threads') or [1]
+
+        self.stdout.write(
+            f'{"file":40} {"preset":20} {"threads":>7} {"seconds":>8} {"MiB":>8} {"ratio":>6}'
+        )
+        with tempfile.TemporaryDirectory(dir=get_temp_dir()) as tmpdir:
+            for name in names:
+                path = datastore.datastore.fetch(name)
+                input_size = os.path.getsize(path)
+                for preset in presets:
+                    for threads in thread_counts:
+                        output_path = os.path.join(tmpdir, f'{preset}-{threads}.tif')
+                        start = time.perf_counter()
+                        try:
+                            _convert_to_cog(path, output_path, PRESETS[preset], threads=threads)
+                        except Exception as e:
+                            # e.g. JPEG compression of more than 4 bands
+                            self.stdout.write(f'{name:40} {preset:20} {threads:>7} failed: {e}')
+                            continue
+                        seconds = time.perf_counter() - start
+                        size = os.path.getsize(output_path)
+                        self.stdout.write(
+                            f'{name:40} {preset:20} {threads:>7} {seconds:>8.2f} '
+                            f'{size / 2**20:>8.2f} {size / input_size:>6.2f}'
+                        )
+                        os.remove(output_path)
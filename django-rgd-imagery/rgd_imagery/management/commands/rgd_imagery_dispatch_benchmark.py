@@ -0,0 +1,93 @@
+from contextlib import contextmanager
+import statistics
+import time
+from unittest import mock
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import override_settings
+from rgd.management.commands._data_helper import _get_or_create_file_model
+from rgd.models.mixins import Status
+from rgd_imagery import models
+from rgd_imagery.tasks import subsample
+
+# A crop small enough that the job time is mostly its overhead
+REGION = {'sample_type': 'pixel box', 'left': 0, 'right': 10, 'bottom': 0, 'top': 10}
+
+
+@contextmanager
+def _delayed_helper(delay):
+    """Wait a fixed delay before each job, as processed image jobs used to."""
+    helper = subsample._processed_image_helper
+
+    @contextmanager
+    def delayed(*args, **kwargs):
+        time.sleep(delay)
+        with helper(*args, **kwargs) as result:
+            yield result
+
+    with mock.patch.object(subsample, '_processed_image_helper', delayed):
+        yield
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the latency of small region jobs, from the commit of their source '
+        'images to their completion, with the fixed delay that jobs used to wait '
+        'for their source images (before) and without it (after).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '-f',
+            '--file',
+            default='Elevation.tif',
+            help='A datastore file to crop.',
+        )
+        parser.add_argument(
+            '-n',
+            '--number',
+            type=int,
+            default=10,
+            help='The number of jobs timed for each case.',
+        )
+        parser.add_argument(
+            '-d',
+            '--delay',
+            type=float,
+            default=3.0,
+            help='The fixed delay in seconds that jobs used to wait.',
+        )
+
+    def _time_job(self, group, image):
+        start = time.perf_counter()
+        # The job is dispatched when the source images commit, and run in this process
+        with transaction.atomic():
+            processed = models.ProcessedImage.objects.create(group=group)
+            processed.source_images.add(image)
+        seconds = time.perf_counter() - start
+        processed.refresh_from_db()
+        if processed.status != Status.SUCCEEDED:
+            self.stderr.write(f'Job {processed.pk} {processed.status}: {processed.failure_reason}')
+        processed.delete()
+        return seconds
+
+    def handle(self, *args, **options):
+        image = _get_or_create_file_model(models.Image, options['file'])
+        group = models.ProcessedImageGroup.objects.create(
+            process_type=models.ProcessedImageGroup.ProcessTypes.REGION, parameters=REGION
+        )
+        number = options['number']
+        self.stdout.write(f'{"case":8} {"mean s":>8} {"median s":>9} {"jobs/min":>9}')
+        try:
+            with override_settings(CELERY_TASK_ALWAYS_EAGER=True):
+                for case, delay in (('before', options['delay']), ('after', 0.0)):
+                    with _delayed_helper(delay):
+                        seconds = [self._time_job(group, image) for _ in range(number)]
+                    mean = statistics.mean(seconds)
+                    self.stdout.write(
+                        f'{case:8} {mean:>8.3f} {statistics.median(seconds):>9.3f} '
+                        f'{60 / mean:>9.1f}'
+                    )
+        finally:
+            group.delete()
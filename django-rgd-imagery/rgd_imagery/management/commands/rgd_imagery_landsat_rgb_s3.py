@@ -43,6 +43,18 @@ class Command(SynchronousTasksCommand):
         parser.add_argument(
             '-g', '--get_count', help='Use to fetch the number of available rasters.'
         )
+        parser.add_argument(
+            '-w',
+            '--workers',
+            type=int,
+            help='The number of processes to load rasters with.',
+            default=1,
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help='A file recording loaded rasters. Rasters already in it are skipped.',
+            default=None,
+        )
 
     def handle(self, *args, **options):
         self.set_synchronous()
@@ -55,6 +67,16 @@ class Command(SynchronousTasksCommand):
         count = options.get('count', 0)
 
         # Run the command
-        helper.load_raster_files(_get_landsat_urls(count))
+        summary = helper.bulk_load_raster_files(
+            _get_landsat_urls(count),
+            workers=options.get('workers', 1),
+            checkpoint=options.get('checkpoint'),
+        )
+        loaded = len(summary['ids'])
+        rate = loaded / summary['seconds'] if summary['seconds'] else 0.0
+        self.stdout.write(
+            f'Loaded {loaded} rasters in {summary["seconds"]:.1f}s ({rate:.2f} rasters/s); '
+            f'skipped {summary["skipped"]}, failed {summary["failed"]}.'
+        )
         self.stdout.write(self.style.SUCCESS(SUCCESS_MSG))
         self.reset_celery()
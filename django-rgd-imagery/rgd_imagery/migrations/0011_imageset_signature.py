@@ -0,0 +1,50 @@
+# Generated by Django 4.0.3 on 2026-10-19 12:00
+
+import hashlib
+
+from django.db import migrations, models
+
+
+def populate_signatures(apps, schema_editor):
+    ImageSet = apps.get_model('rgd_imagery', 'ImageSet')
+    seen = set()
+    # The oldest set of each combination of images is the canonical one
+    for image_set in ImageSet.objects.order_by('pk'):
+        image_ids = sorted(image_set.images.values_list('pk', flat=True))
+        if not image_ids:
+            continue
+        signature = hashlib.sha256(','.join(map(str, image_ids)).encode()).hexdigest()
+        if signature in seen:
+            continue
+        seen.add(signature)
+        ImageSet.objects.filter(pk=image_set.pk).update(signature=signature)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rgd_imagery', '0010_alter_processedimage_ancillary_files_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='imageset',
+            name='signature',
+            field=models.CharField(
+                blank=True,
+                editable=False,
+                help_text='Hash of the sorted image IDs. Only set on the canonical set of those images.',
+                max_length=64,
+                null=True,
+            ),
+        ),
+        migrations.RunPython(populate_signatures, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='imageset',
+            constraint=models.UniqueConstraint(
+                condition=models.Q(('signature__isnull', False)),
+                fields=('signature',),
+                name='unique_image_set_signature',
+            ),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.0.3 on 2026-10-19 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rgd_imagery', '0011_imageset_signature'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='processedimagegroup',
+            name='process_type',
+            field=models.CharField(
+                choices=[
+                    ('arbitrary', 'Arbitrarily processed externally'),
+                    ('cog', 'Converted to Cloud Optimized GeoTIFF'),
+                    ('region', 'Extract subregion'),
+                    ('resample', 'Resample by factor'),
+                    ('mosaic', 'Mosaic multiple images'),
+                    ('virtual_mosaic', 'Virtual mosaic of multiple images (VRT)'),
+                ],
+                default='arbitrary',
+                max_length=20,
+            ),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.0.3 on 2026-10-19 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rgd_imagery', '0012_alter_processedimagegroup_process_type'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='processedimage',
+            name='fingerprint',
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                default='',
+                help_text='Key of the product, used to reuse it for identical processing.',
+                max_length=64,
+            ),
+        ),
+    ]
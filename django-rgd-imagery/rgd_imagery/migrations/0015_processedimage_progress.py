@@ -0,0 +1,22 @@
+# Generated by Django 4.0.3 on 2026-10-19 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rgd_imagery', '0014_alter_processedimagegroup_process_type'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='processedimage',
+            name='progress',
+            field=models.FloatField(
+                blank=True,
+                help_text='Fraction of the processing done while running.',
+                null=True,
+            ),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.0.3 on 2026-10-19 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rgd_imagery', '0015_processedimage_progress'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bandmeta',
+            name='histogram',
+            field=models.JSONField(
+                blank=True,
+                help_text='The `bins` edges and `counts` of the values of the band.',
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name='bandmeta',
+            name='percentiles',
+            field=models.JSONField(
+                blank=True,
+                help_text='Values of the band at percentiles, e.g. `{"2": 0.1, "98": 0.9}`.',
+                null=True,
+            ),
+        ),
+    ]
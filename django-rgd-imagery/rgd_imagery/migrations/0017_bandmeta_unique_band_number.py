@@ -0,0 +1,35 @@
+# Generated by Django 4.0.3 on 2026-10-19 12:00
+
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def delete_duplicate_bands(apps, schema_editor):
+    BandMeta = apps.get_model('rgd_imagery', 'BandMeta')
+    duplicates = (
+        BandMeta.objects.values('parent_image', 'band_number')
+        .annotate(band_count=Count('pk'), latest=Max('pk'))
+        .filter(band_count__gt=1)
+    )
+    for band in duplicates:
+        # Keep the latest of the bands written by concurrent ingests
+        BandMeta.objects.filter(
+            parent_image=band['parent_image'], band_number=band['band_number']
+        ).exclude(pk=band['latest']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rgd_imagery', '0016_bandmeta_histogram_percentiles'),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_duplicate_bands, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='bandmeta',
+            constraint=models.UniqueConstraint(
+                fields=('parent_image', 'band_number'), name='unique_band_number'
+            ),
+        ),
+    ]
@@ -1,7 +1,11 @@
 """Base classes for raster dataset entries."""
+import hashlib
+
 from django.contrib.gis.db import models
 from django.contrib.postgres.fields import DecimalRangeField
-from django.db.models import Count, Sum
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.expressions import RawSQL
 from django_extensions.db.models import TimeStampedModel
 from rgd.models import ChecksumFile, SpatialEntry
 from rgd.models.mixins import DetailViewMixin, TaskEventMixin
@@ -34,15 +38,48 @@ class Image(TimeStampedModel, TaskEventMixin):
     def get_processed_images(self, images=None):
         if images is None:
             images = set()
-        for proc in self.processedimage_set.exclude(processed_image__in=images):
-            if proc.processed_image:
-                images.add(proc.processed_image)
-                images.update(proc.processed_image.get_processed_images(images))
+        images.update(get_descendant_images([self.pk]))
         return images
 
     @property
     def processed_images(self):
-        return self.get_processed_images(self)
+        return get_descendant_images([self.pk]).order_by('pk')
+
+
+def _descendant_image_ids(image_ids):
+    """Get a subquery of the IDs of all images processed from the given images.
+
+    The lineage is walked with a single recursive query rather than a query
+    per processed image.
+
+    """
+    from .processed import ProcessedImage
+
+    processed = ProcessedImage._meta.db_table
+    source = ProcessedImage.source_images.through._meta.db_table
+    return RawSQL(
+        f"""
+        WITH RECURSIVE lineage (image_id) AS (
+            SELECT p.processed_image_id
+            FROM {processed} p
+            JOIN {source} s ON s.processedimage_id = p.id
+            WHERE s.image_id = ANY(%s) AND p.processed_image_id IS NOT NULL
+          UNION
+            SELECT p.processed_image_id
+            FROM {processed} p
+            JOIN {source} s ON s.processedimage_id = p.id
+            JOIN lineage l ON s.image_id = l.image_id
+            WHERE p.processed_image_id IS NOT NULL
+        )
+        SELECT image_id FROM lineage
+        """,
+        (list(image_ids),),
+    )
+
+
+def get_descendant_images(image_ids):
+    """Get all images processed from the given images, directly or not."""
+    return Image.objects.filter(pk__in=_descendant_image_ids(image_ids))
 
 
 class ImageMeta(TimeStampedModel):
@@ -73,6 +110,23 @@ class BandMeta(TimeStampedModel):
     band_range = DecimalRangeField(
         null=True, help_text='The spectral range of the band (in micrometers).'
     )
+    histogram = models.JSONField(
+        null=True,
+        blank=True,
+        help_text='The `bins` edges and `counts` of the values of the band.',
+    )
+    percentiles = models.JSONField(
+        null=True,
+        blank=True,
+        help_text='Values of the band at percentiles, e.g. `{"2": 0.1, "98": 0.9}`.',
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['parent_image', 'band_number'], name='unique_band_number'
+            ),
+        ]
 
 
 class ImageSet(TimeStampedModel):
@@ -82,6 +136,46 @@ class ImageSet(TimeStampedModel):
     description = models.TextField(null=True, blank=True)
 
     images = models.ManyToManyField(Image)
+    signature = models.CharField(
+        max_length=64,
+        null=True,
+        blank=True,
+        editable=False,
+        help_text='Hash of the sorted image IDs. Only set on the canonical set of those images.',
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['signature'],
+                name='unique_image_set_signature',
+                condition=models.Q(signature__isnull=False),
+            ),
+        ]
+
+    @staticmethod
+    def compute_signature(image_ids):
+        """Get the canonical signature of a collection of image IDs."""
+        image_ids = sorted({int(pk) for pk in image_ids})
+        if not image_ids:
+            return None
+        return hashlib.sha256(','.join(map(str, image_ids)).encode()).hexdigest()
+
+    def update_signature(self):
+        """Recompute the signature after the images of this set changed.
+
+        If another set is already the canonical set of the same images, the
+        signature of this set is cleared instead.
+
+        """
+        signature = self.compute_signature(self.images.values_list('pk', flat=True))
+        try:
+            with transaction.atomic():
+                ImageSet.objects.filter(pk=self.pk).update(signature=signature)
+        except IntegrityError:
+            signature = None
+            ImageSet.objects.filter(pk=self.pk).update(signature=signature)
+        self.signature = signature
 
     @property
     def number_of_bands(self):
@@ -109,20 +203,15 @@ class ImageSet(TimeStampedModel):
 
     @property
     def processed_images(self):
-        images = set()
-        for image in self.images.all():
-            images.update(image.get_processed_images(images))
-        pks = [im.pk for im in images]
-        return Image.objects.filter(pk__in=pks).order_by('pk')
+        image_ids = list(self.images.values_list('pk', flat=True))
+        return get_descendant_images(image_ids).order_by('pk')
 
     @property
     def all_images(self):
-        images = set()
-        for image in self.images.all():
-            images.add(image)
-            images.update(image.get_processed_images(images))
-        pks = [im.pk for im in images]
-        return Image.objects.filter(pk__in=pks).order_by('pk')
+        image_ids = list(self.images.values_list('pk', flat=True))
+        return Image.objects.filter(
+            Q(pk__in=image_ids) | Q(pk__in=_descendant_image_ids(image_ids))
+        ).order_by('pk')
 
     detail_view_name = 'image-set-detail'
 
@@ -1,8 +1,13 @@
+import hashlib
+import json
+
 from django.contrib.gis.db import models
+from django.db import transaction
 from django.utils.translation import gettext_lazy as _
 from django_extensions.db.models import TimeStampedModel
 from rgd.models import ChecksumFile
 from rgd.models.mixins import Status, TaskEventMixin
+import rgd_imagery
 from rgd_imagery.tasks import jobs
 
 from .base import Image
@@ -15,13 +20,38 @@ class ProcessedImageGroup(TimeStampedModel):
         REGION = 'region', _('Extract subregion')
         RESAMPLE = 'resample', _('Resample by factor')
         MOSAIC = 'mosaic', _('Mosaic multiple images')
+        VIRTUAL_MOSAIC = 'virtual_mosaic', _('Virtual mosaic of multiple images (VRT)')
+        PIPELINE = 'pipeline', _('Pipeline of operations')
 
     process_type = models.CharField(
         max_length=20, default=ProcessTypes.ARBITRARY, choices=ProcessTypes.choices
     )
     parameters = models.JSONField(null=True, blank=True)
 
-    def _post_save(self, *args, **kwargs):
+    def get_status_summary(self) -> dict:
+        """Count the ProcessedImages of each status and the fraction of processing done."""
+        counts = {status: 0 for status in Status.values}
+        done = 0.0
+        # A single GROUP BY status query
+        rows = (
+            ProcessedImage.objects.filter(group=self)
+            .order_by()
+            .values('status')
+            .annotate(count=models.Count('pk'), progress=models.Sum('progress'))
+        )
+        for row in rows:
+            counts[row['status']] = row['count']
+            if row['status'] in (Status.SUCCEEDED, Status.FAILED, Status.SKIPPED):
+                done += row['count']
+            elif row['status'] == Status.RUNNING:
+                done += row['progress'] or 0.0
+        total = sum(counts.values())
+        return {**counts, 'progress': done / total if total else 1.0}
+
+    def _post_save(self, created=False, *args, **kwargs):
+        if created:
+            # The images of a new group are queued on their own creation
+            return
         source_images = ProcessedImage.objects.filter(group=self)
         for processed_image in source_images:
             if processed_image.status not in [Status.QUEUED, Status.RUNNING]:
@@ -43,10 +73,81 @@ class ProcessedImage(TimeStampedModel, TaskEventMixin):
         related_name='sourceprocessimage_set',
     )
     ancillary_files = models.ManyToManyField(ChecksumFile, blank=True, related_name='+')
+    progress = models.FloatField(
+        null=True, blank=True, help_text='Fraction of the processing done while running.'
+    )
+    fingerprint = models.CharField(
+        max_length=64,
+        blank=True,
+        default='',
+        db_index=True,
+        help_text='Key of the product, used to reuse it for identical processing.',
+    )
+
+    def _run_tasks(self) -> None:
+        # Not ready to process until the source images are set
+        if not self.source_images.exists():
+            return
+        super()._run_tasks()
+
+    def _schedule_tasks(self) -> None:
+        """Run the tasks once the current transaction commits.
+
+        Saving and setting ``source_images`` in the same transaction only
+        runs the tasks once, with the final source images.
+
+        """
+        if getattr(self, '_tasks_scheduled', False):
+            return
+        self._tasks_scheduled = True
+
+        def run():
+            self._tasks_scheduled = False
+            self._run_tasks()
+
+        transaction.on_commit(run)
+
+    def compute_fingerprint(self) -> str:
+        """Compute a key of the product, the same for the same operation on the same content.
+
+        The key covers the operation, its parameters, the checksums of the
+        source images and the version of this package. It is empty when the
+        product cannot be reused: externally processed images and sources
+        without a checksum yet.
+
+        """
+        if self.group.process_type == ProcessedImageGroup.ProcessTypes.ARBITRARY:
+            return ''
+        checksums = list(self.source_images.order_by('pk').values_list('file__checksum', flat=True))
+        if not checksums or not all(checksums):
+            return ''
+        payload = {
+            'process_type': self.group.process_type,
+            'parameters': self.group.parameters,
+            'sources': checksums,
+            'version': rgd_imagery.__version__,
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+    def set_progress(self, fraction: float) -> None:
+        """Record the fraction of the processing done, in steps of 1%."""
+        fraction = round(min(max(fraction, 0.0), 1.0), 2)
+        if fraction != self.progress:
+            self.progress = fraction
+            # Skip the signals of a full save
+            ProcessedImage.objects.filter(pk=self.pk).update(progress=fraction)
+
+    def release_processed_image(self) -> None:
+        """Detach the product, deleting its file unless another ProcessedImage reuses it."""
+        image = self.processed_image
+        if image is None:
+            return
+        self.processed_image = None
+        if not ProcessedImage.objects.filter(processed_image=image).exclude(pk=self.pk).exists():
+            image.file.delete()
 
     def _pre_delete(self, *args, **kwargs):
-        if self.processed_image:
-            self.processed_image.file.delete()
+        self.release_processed_image()
         # TODO: clean up ancillary_files - this throws an error when done through the admin interface
         # self.ancillary_files.all().delete()
 
@@ -24,10 +24,8 @@ class Raster(TimeStampedModel, TaskEventMixin):
     image_set = models.OneToOneField(ImageSet, on_delete=models.CASCADE)
     ancillary_files = models.ManyToManyField(ChecksumFile, blank=True, related_name='+')
 
-    task_funcs = (
-        jobs.task_populate_raster,
-        # jobs.task_populate_raster_footprint,
-    )
+    # NOTE: `task_populate_raster` chains `task_populate_raster_footprint`
+    task_funcs = (jobs.task_populate_raster,)
 
     @property
     def count(self):
@@ -1,26 +1,25 @@
-from functools import reduce
+from django.db import IntegrityError, transaction
 
-from django.db.models import Count
-
-from .base import Image, ImageSet
+from .base import ImageSet
 
 
 def get_or_create_image_set(image_ids, defaults=None):
     """Get or create ImageSet containing provided Image IDs."""
+    signature = ImageSet.compute_signature(image_ids)
     # Check if an ImageSet already exists containing all of these images
-    q = ImageSet.objects.annotate(count=Count('images')).filter(count=len(image_ids))
-    imsets = reduce(lambda p, id: q.filter(images=id), image_ids, q).values()
-    if len(imsets) > 0:
-        # Grab first, could be N-many
-        imset = ImageSet.objects.get(id=imsets[0]['id'])
-        return imset, False
+    if signature is not None:
+        try:
+            return ImageSet.objects.get(signature=signature), False
+        except ImageSet.DoesNotExist:
+            pass
     # Otherwise, create it
     if not defaults:
         defaults = {}
-    imset = ImageSet(**defaults)
-    imset.save()  # Have to save before adding to ManyToManyField
-    images = Image.objects.filter(pk__in=image_ids).all()
-    for image in images:
-        imset.images.add(image)
-    imset.save()
+    try:
+        with transaction.atomic():
+            # Claim the signature up front so a concurrent creation conflicts
+            imset = ImageSet.objects.create(signature=signature, **defaults)
+            imset.images.add(*image_ids)
+    except IntegrityError:
+        return ImageSet.objects.get(signature=signature), False
     return imset, True
@@ -0,0 +1,89 @@
+"""Reprojection with cached coordinate transformers and warp grids.
+
+Creating a ``pyproj.Transformer`` and computing the grid of a warped raster
+cost more than the few coordinates or windows they usually serve. Both are
+cached per process, keyed by the spatial references, extent and resolution,
+and reused across the footprints and regions of the same images.
+
+"""
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Optional, Tuple, Union
+
+import pyproj
+from rasterio import Affine
+from rasterio.transform import array_bounds
+from rasterio.vrt import WarpedVRT
+from rasterio.warp import calculate_default_transform
+
+
+@lru_cache(maxsize=64)
+def get_transformer(src_crs: str, dst_crs: str) -> pyproj.Transformer:
+    """Get a transformer between spatial references, e.g. ``'EPSG:4326'``, in x/y order."""
+    # Transformers are thread safe since pyproj 3.1
+    return pyproj.Transformer.from_crs(src_crs, dst_crs, always_xy=True)
+
+
+def transform_bounds(
+    src_crs: str, dst_crs: str, left: float, bottom: float, right: float, top: float
+) -> Tuple[float, float, float, float]:
+    """Transform bounds, densifying their edges to account for the curvature of the warp."""
+    if src_crs == dst_crs:
+        return left, bottom, right, top
+    return get_transformer(src_crs, dst_crs).transform_bounds(
+        left, bottom, right, top, densify_pts=21
+    )
+
+
+@lru_cache(maxsize=256)
+def _get_warp_grid(
+    src_crs: str,
+    dst_crs: str,
+    src_transform: tuple,
+    width: int,
+    height: int,
+    resolution: Optional[Union[float, tuple]],
+):
+    bounds = array_bounds(height, width, Affine(*src_transform))
+    # `array_bounds` gives (west, south, east, north) as expected here
+    transform, dst_width, dst_height = calculate_default_transform(
+        src_crs, dst_crs, width, height, *bounds, resolution=resolution
+    )
+    return tuple(transform)[:6], dst_width, dst_height
+
+
+def get_warp_grid(src, dst_crs: str, resolution: Optional[Union[float, tuple]] = None):
+    """Get the transform, width and height of an open raster warped to ``dst_crs``.
+
+    Returns ``None`` for rasters georeferenced by ground control points,
+    whose grid is left for GDAL to compute.
+
+    """
+    if src.crs is None:
+        return None
+    transform, width, height = _get_warp_grid(
+        src.crs.to_string(),
+        str(dst_crs),
+        tuple(src.transform)[:6],
+        src.width,
+        src.height,
+        resolution,
+    )
+    return Affine(*transform), width, height
+
+
+@contextmanager
+def warped_vrt(src, dst_crs: str, resolution: Optional[Union[float, tuple]] = None, **kwargs):
+    """Open a raster as a virtual dataset in ``dst_crs`` on its cached warp grid.
+
+    Nothing is copied: pixels are warped on demand as they are read, all of
+    the bands of a window in a single warp. Extra ``kwargs`` are passed to
+    ``WarpedVRT``, e.g. the ``transform``, ``width`` and ``height`` of a
+    given grid rather than the cached one.
+
+    """
+    grid = None if 'transform' in kwargs else get_warp_grid(src, dst_crs, resolution)
+    if grid is not None:
+        kwargs['transform'], kwargs['width'], kwargs['height'] = grid
+    with WarpedVRT(src, crs=dst_crs, **kwargs) as vrt:
+        yield vrt
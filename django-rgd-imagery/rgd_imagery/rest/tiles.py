@@ -6,7 +6,46 @@ from rgd.rest import CACHE_TIMEOUT
 from rgd.rest.authentication import SignedURLAuthentication
 from rgd.rest.base import ModelViewSet
 from rgd_imagery import models, serializers
-from rgd_imagery.models import Image
+from rgd_imagery.large_image_utilities import (
+    get_band_statistics_cache_key,
+    yield_image_local_path,
+)
+from rgd_imagery.models import BandMeta, Image
+
+# The percentiles the range of a band is stretched to when the style asks for a `stretch`
+AUTO_CONTRAST_PERCENTILES = ('2', '98')
+
+
+def _resolve_band_range(value, key, stats, stretch=False):
+    """Resolve a `min` or `max` of a band style to a value from its stored statistics.
+
+    Returns the value unchanged when the statistics do not cover it, leaving
+    large_image to compute it. A missing value is only filled in when
+    `stretch` is set.
+
+    """
+    percentiles = stats.get('percentiles') or {}
+    if value is None:
+        if not stretch:
+            return None
+        return percentiles.get(AUTO_CONTRAST_PERCENTILES[key == 'max'])
+    if value in ('min', 'max'):
+        return stats.get(value) if stats.get(value) is not None else value
+    if value == 'auto':
+        if stats.get('min') is None or stats.get('max') is None:
+            return value
+        if 0 <= stats['min'] and stats['max'] <= 255:
+            return 0 if key == 'min' else 255
+        return stats[key]
+    if isinstance(value, str) and value.startswith(f'{key}:'):
+        try:
+            percentile = round(float(value[len(key) + 1 :]) * 100)
+        except ValueError:
+            return value
+        if key == 'max':
+            percentile = 100 - percentile
+        return percentiles.get(str(percentile), value)
+    return value
 
 
 class TilesViewSet(ModelViewSet, LargeImageDetailMixin):
@@ -31,10 +70,43 @@ class TilesViewSet(ModelViewSet, LargeImageDetailMixin):
             self.check_object_permissions(request, image_entry)
             cache.set(auth_cache_key, None, CACHE_TIMEOUT)
 
-        with image_entry.file.yield_local_path(yield_file_set=True) as file_path:
-            # NOTE: We ran into issues using VSI paths with some image formats (NITF)
-            #       this now requires the images be a local path on the file system.
-            #       For URL files, this is done through FUSE but for S3FileField
-            #       files, we must download the entire file to the local disk.
-            # NOTE: yield_file_set=True in case there are header files
+        # NOTE: We ran into issues using VSI paths with some image formats (NITF)
+        #       this now requires the images be a local path on the file system.
+        #       For URL files, this is done through FUSE but for S3FileField
+        #       files, we must download the entire file to the local disk.
+        with yield_image_local_path(image_entry, user=request.user) as file_path:
             return str(file_path)
+
+    def get_style(self, request: Request) -> dict:
+        """Fill in the ranges of the bands from their stored statistics.
+
+        large_image would otherwise scan the image for the `min`, `max` and
+        `auto` ranges. Bands without a range are stretched between their
+        2nd and 98th percentiles when the style, or the style of the band, has
+        a true `stretch`; otherwise large_image's defaults apply.
+
+        """
+        style = super().get_style(request)
+        if not style:
+            return style
+        pk = self.kwargs['pk']
+        cache_key = get_band_statistics_cache_key(pk)
+        if (band_statistics := cache.get(cache_key, None)) is None:
+            band_statistics = {
+                band['band_number']: band
+                for band in BandMeta.objects.filter(parent_image_id=pk).values(
+                    'band_number', 'min', 'max', 'percentiles'
+                )
+            }
+            cache.set(cache_key, band_statistics, CACHE_TIMEOUT)
+        stretch = style.pop('stretch', False)
+        for band_style in style.get('bands', [style]):
+            band_stretch = band_style.pop('stretch', stretch)
+            stats = band_statistics.get(band_style.get('band'))
+            if not stats:
+                continue
+            for key in ('min', 'max'):
+                value = _resolve_band_range(band_style.get(key), key, stats, band_stretch)
+                if value is not None:
+                    band_style[key] = value
+        return style
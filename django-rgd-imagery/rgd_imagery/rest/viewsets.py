@@ -1,19 +1,77 @@
+import hashlib
+import json
+import os
+import tempfile
+
+from django.conf import settings
+from django.contrib.gis.gdal import GDALException
+from django.contrib.gis.geos import GEOSException, GEOSGeometry
+from django.core.cache import cache
+from django.db import transaction
+from django.http import FileResponse, HttpResponse, QueryDict
+from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.fields import BooleanField
 from rest_framework.response import Response
 from rgd.models.mixins import Status
+from rgd.permissions import filter_read_perm
+from rgd.rest import CACHE_TIMEOUT
 from rgd.rest.base import ModelViewSet
-from rgd.rest.mixins import TaskEventViewSetMixin
-from rgd.utility import get_file_data_url
-from rgd_imagery import filters, models, serializers, stac
+from rgd.rest.mixins import LONG_POLL_PARAMETERS, LongPollMixin, TaskEventViewSetMixin
+from rgd.utility import get_file_data_url, get_temp_dir
+from rgd_imagery import cube, filters, models, serializers, stac
+from rgd_imagery.large_image_utilities import yield_image_local_path
+from rgd_imagery.tasks import jobs
+from rgd_imagery.tasks.subsample import SampleTypes, get_region_extent, read_region
 
 
 class ProcessedImageViewSet(ModelViewSet):
     serializer_class = serializers.ProcessedImageSerializer
     queryset = models.ProcessedImage.objects.all()
 
+    @swagger_auto_schema(
+        method='POST',
+        operation_summary='Queue copying the pixels of a virtual mosaic into a COG.',
+    )
+    @action(detail=True, methods=['POST'])
+    def materialize(self, *args, **kwargs):
+        obj = self.get_object()
+        if obj.group.process_type != models.ProcessedImageGroup.ProcessTypes.VIRTUAL_MOSAIC:
+            raise ValidationError('Only virtual mosaics can be materialized.')
+        obj.status = Status.QUEUED
+        obj.save(update_fields=['status'])
+        jobs.task_materialize_processed_image.delay(obj.pk)
+        return Response(self.get_serializer(obj).data, status=202)
+
+    @swagger_auto_schema(
+        method='POST',
+        operation_summary='Create many ProcessedImages of a group at once.',
+        operation_description=(
+            'Each entry of `source_images` lists the source images of one '
+            'ProcessedImage. Their processing is queued together.'
+        ),
+        request_body=serializers.ProcessedImageBulkSerializer,
+        responses={201: serializers.ProcessedImageSerializer(many=True)},
+    )
+    @action(detail=False, methods=['POST'])
+    def bulk(self, request, *args, **kwargs):
+        serializer = serializers.ProcessedImageBulkSerializer(
+            data=request.data, context=self.get_serializer_context()
+        )
+        serializer.is_valid(raise_exception=True)
+        processed_images = serializer.save()
+        queryset = (
+            self.get_queryset()
+            .filter(pk__in=[p.pk for p in processed_images])
+            .select_related('group', 'processed_image')
+            .prefetch_related('source_images', 'ancillary_files')
+        )
+        return Response(self.get_serializer(queryset, many=True).data, status=201)
+
 
-class ProcessedImageGroupViewSet(ModelViewSet):
+class ProcessedImageGroupViewSet(ModelViewSet, LongPollMixin):
     serializer_class = serializers.ProcessedImageGroupSerializer
     queryset = models.ProcessedImageGroup.objects.all()
 
@@ -21,20 +79,16 @@ class ProcessedImageGroupViewSet(ModelViewSet):
     @swagger_auto_schema(
         method='GET',
         operation_summary='Get status counts of each ProcessedImage in the group.',
+        operation_description=(
+            'Also gives the `progress` of the whole group, the fraction of its '
+            'processing done. Supports long polling with the `wait` parameter.'
+        ),
+        manual_parameters=LONG_POLL_PARAMETERS,
     )
     @action(detail=True)
-    def status(self, *args, **kwargs):
-        # TODO: This should use a more efficient aggregate.
+    def status(self, request, *args, **kwargs):
         obj = self.get_object()
-        images = models.ProcessedImage.objects.filter(group=obj)
-        data = {
-            Status.CREATED: images.filter(status=Status.CREATED).count(),
-            Status.QUEUED: images.filter(status=Status.QUEUED).count(),
-            Status.RUNNING: images.filter(status=Status.RUNNING).count(),
-            Status.FAILED: images.filter(status=Status.FAILED).count(),
-            Status.SUCCEEDED: images.filter(status=Status.SUCCEEDED).count(),
-        }
-        return Response(data)
+        return self.long_poll(request, obj.get_status_summary)
 
 
 class ImageSetViewSet(ModelViewSet):
@@ -69,8 +123,78 @@ class ImageViewSet(ModelViewSet, TaskEventViewSetMixin):
         obj: models.Image = self.get_object()
         return get_file_data_url(obj.file)
 
+    @swagger_auto_schema(
+        method='POST',
+        operation_summary='Extract a region of this Image.',
+        operation_description=(
+            'The body holds the parameters of a region `ProcessedImageGroup`. '
+            'The region is streamed back unless `persist` is set, in which case '
+            'a `ProcessedImage` is queued to record its lineage.'
+        ),
+    )
+    @action(detail=True, methods=['POST'])
+    def region(self, request, *args, **kwargs):
+        obj: models.Image = self.get_object()
+        # Form data holds lists of values
+        if isinstance(request.data, QueryDict):
+            parameters = request.data.dict()
+        else:
+            parameters = dict(request.data)
+        encoding = parameters.pop('encoding', None)
+        persist = BooleanField().to_internal_value(parameters.pop('persist', False))
+        try:
+            if parameters.get('sample_type') == SampleTypes.ANNOTATION:
+                # The region of an annotation reveals its extent
+                annotations = models.Annotation.objects.filter(pk=parameters.get('id'))
+                if not filter_read_perm(request.user, annotations).exists():
+                    raise models.Annotation.DoesNotExist(f'Annotation {parameters.get("id")}')
+            get_region_extent(parameters)
+        except (KeyError, ValueError, models.Annotation.DoesNotExist) as e:
+            raise ValidationError(f'Invalid region parameters: {e!r}')
 
-class RasterMetaViewSet(ModelViewSet):
+        if persist:
+            with transaction.atomic():
+                group = models.ProcessedImageGroup.objects.create(
+                    process_type=models.ProcessedImageGroup.ProcessTypes.REGION,
+                    parameters=parameters,
+                )
+                processed = models.ProcessedImage.objects.create(group=group)
+                processed.source_images.add(obj)
+            return Response(serializers.ProcessedImageSerializer(processed).data, status=202)
+
+        # The file is part of the key so regions of replaced files are not served
+        digest = hashlib.sha256(
+            json.dumps([parameters, encoding], sort_keys=True).encode()
+        ).hexdigest()
+        cache_key = f'rgd_imagery:region:{obj.file.pk}:{obj.file.modified.timestamp()}:{digest}'
+        if (cached := cache.get(cache_key)) is not None:
+            content, mime_type = cached
+            return HttpResponse(content, content_type=mime_type)
+
+        try:
+            with yield_image_local_path(obj, user=request.user) as file_path:
+                path, mime_type = read_region(
+                    file_path,
+                    parameters,
+                    encoding=encoding,
+                    max_pixels=getattr(settings, 'RGD_REGION_MAX_PIXELS', 4096 * 4096),
+                )
+        except (KeyError, ValueError) as e:
+            raise ValidationError(str(e))
+
+        if os.path.getsize(path) <= getattr(settings, 'RGD_REGION_CACHE_MAX_BYTES', 2**22):
+            with open(path, 'rb') as f:
+                content = f.read()
+            os.remove(path)
+            cache.set(cache_key, (content, mime_type), CACHE_TIMEOUT)
+            return HttpResponse(content, content_type=mime_type)
+        f = open(path, 'rb')
+        # The file is deleted once the response is closed
+        os.remove(path)
+        return FileResponse(f, content_type=mime_type)
+
+
+class RasterMetaViewSet(ModelViewSet, LongPollMixin):
     filterset_class = filters.RasterMetaFilter
 
     def get_serializer_class(self):
@@ -97,7 +221,100 @@ class RasterMetaViewSet(ModelViewSet):
     @swagger_auto_schema(
         method='GET',
         operation_summary='Check the status.',
+        manual_parameters=LONG_POLL_PARAMETERS,
     )
     @action(detail=True)
-    def status(self, *args, **kwargs):
-        return self.retrieve(self, *args, **kwargs)
+    def status(self, request, *args, **kwargs):
+        return self.long_poll(request, lambda: self.get_serializer(self.get_object()).data)
+
+    @swagger_auto_schema(
+        method='GET',
+        operation_summary='Extract the time series cube of the rasters within an area.',
+        operation_description=(
+            'The rasters are selected with the search filters, e.g. `q`, '
+            '`acquired_after`, `acquired_before` and `collections`, and must have '
+            'an acquisition date. The pixels of each raster within the area of `q` '
+            'are warped to a common grid and stacked by acquisition date in a '
+            'compressed NumPy archive, see `rgd_imagery.cube`.'
+        ),
+        manual_parameters=[
+            openapi.Parameter(
+                'bands',
+                openapi.IN_QUERY,
+                description='Comma separated band numbers across the images of each raster.',
+                type=openapi.TYPE_STRING,
+            ),
+            openapi.Parameter(
+                'crs',
+                openapi.IN_QUERY,
+                description=(
+                    'The spatial reference of the grid, which requires `cube_resolution`. '
+                    'Defaults to the first raster.'
+                ),
+                type=openapi.TYPE_STRING,
+            ),
+            openapi.Parameter(
+                'cube_resolution',
+                openapi.IN_QUERY,
+                description=(
+                    'The size of the pixels of the grid in the units of its spatial '
+                    'reference. Defaults to the first raster.'
+                ),
+                type=openapi.TYPE_NUMBER,
+            ),
+        ],
+    )
+    @action(detail=False)
+    def cube(self, request, *args, **kwargs):
+        if not request.query_params.get('q'):
+            raise ValidationError('An area of interest must be given in `q`.')
+        try:
+            aoi = GEOSGeometry(request.query_params['q'])
+            bands = request.query_params.get('bands')
+            bands = [int(b) for b in bands.split(',')] if bands else None
+            resolution = request.query_params.get('cube_resolution')
+            resolution = (float(resolution),) * 2 if resolution else None
+        except (ValueError, GEOSException, GDALException) as e:
+            raise ValidationError(str(e))
+        aoi.srid = aoi.srid or 4326
+
+        queryset = (
+            self.filter_queryset(self.get_queryset())
+            .filter(acquisition_date__isnull=False)
+            .select_related('parent_raster__image_set')
+            .prefetch_related(
+                'parent_raster__image_set__images__file',
+                'parent_raster__image_set__images__bandmeta_set',
+            )
+            .order_by('acquisition_date', 'pk')
+        )
+        if 'predicate' not in request.query_params:
+            # `q` alone only sorts the results: keep the rasters covering the area
+            queryset = queryset.filter(envelope__bboverlaps=aoi, footprint__intersects=aoi)
+        max_rasters = getattr(settings, 'RGD_CUBE_MAX_RASTERS', 256)
+        raster_metas = list(queryset[: max_rasters + 1])
+        if len(raster_metas) > max_rasters:
+            raise ValidationError(
+                f'More than {max_rasters} rasters match the query: narrow the date range.'
+            )
+        try:
+            data = cube.read_cube(
+                raster_metas,
+                aoi,
+                crs=request.query_params.get('crs'),
+                resolution=resolution,
+                bands=bands,
+                max_pixels=getattr(settings, 'RGD_REGION_MAX_PIXELS', 4096 * 4096),
+                max_bytes=getattr(settings, 'RGD_CUBE_MAX_BYTES', 2**30),
+                user=request.user,
+            )
+        except ValueError as e:
+            raise ValidationError(str(e))
+
+        f = tempfile.TemporaryFile(dir=get_temp_dir())
+        cube.write_cube(data, f)
+        f.seek(0)
+        # The file is deleted once the response is closed
+        return FileResponse(
+            f, as_attachment=True, filename='cube.npz', content_type='application/octet-stream'
+        )
@@ -4,7 +4,11 @@ from .base import (
     ImageSetSerializer,
     ImageSetSpatialSerializer,
 )
-from .processed import ProcessedImageGroupSerializer, ProcessedImageSerializer
+from .processed import (
+    ProcessedImageBulkSerializer,
+    ProcessedImageGroupSerializer,
+    ProcessedImageSerializer,
+)
 from .raster import RasterMetaSerializer, RasterSerializer
 
 __all__ = [
@@ -12,6 +16,7 @@ __all__ = [
     'ImageMetaSerializer',
     'ImageSetSerializer',
     'ImageSetSpatialSerializer',
+    'ProcessedImageBulkSerializer',
     'ProcessedImageGroupSerializer',
     'ProcessedImageSerializer',
     'RasterMetaSerializer',
@@ -1,6 +1,7 @@
+from django.db import transaction
 from rest_framework import serializers
 from rgd.models import ChecksumFile
-from rgd.permissions import check_write_perm
+from rgd.permissions import check_write_perm, filter_write_perm
 from rgd.serializers import (
     MODIFIABLE_READ_ONLY_FIELDS,
     TASK_EVENT_READ_ONLY_FIELDS,
@@ -9,6 +10,8 @@ from rgd.serializers import (
 )
 
 from .. import models
+from ..tasks.pipeline import validate_pipeline
+from ..tasks.subsample import COG_OPTIONS
 from .base import ImageSerializer
 
 
@@ -18,6 +21,23 @@ class ProcessedImageGroupSerializer(serializers.ModelSerializer):
             check_write_perm(self.context['request'].user, value)
         return value
 
+    def validate(self, attrs):
+        process_type = attrs.get('process_type', getattr(self.instance, 'process_type', None))
+        if process_type == models.ProcessedImageGroup.ProcessTypes.PIPELINE:
+            try:
+                validate_pipeline(
+                    attrs.get('parameters', getattr(self.instance, 'parameters', None))
+                )
+            except ValueError as e:
+                raise serializers.ValidationError({'parameters': str(e)})
+        elif process_type == models.ProcessedImageGroup.ProcessTypes.COG:
+            unknown = set(attrs.get('parameters') or {}) - COG_OPTIONS
+            if unknown:
+                raise serializers.ValidationError(
+                    {'parameters': f'Unknown COG options: {sorted(unknown)}'}
+                )
+        return attrs
+
     class Meta:
         model = models.ProcessedImageGroup
         fields = '__all__'
@@ -54,7 +74,19 @@ class ProcessedImageSerializer(serializers.ModelSerializer):
     class Meta:
         model = models.ProcessedImage
         fields = '__all__'
-        read_only_fields = MODIFIABLE_READ_ONLY_FIELDS + TASK_EVENT_READ_ONLY_FIELDS
+        read_only_fields = (
+            MODIFIABLE_READ_ONLY_FIELDS + TASK_EVENT_READ_ONLY_FIELDS + ['fingerprint', 'progress']
+        )
+
+    # Save and set the source images in one transaction so that processing is
+    #  queued once, after the source images are committed
+    @transaction.atomic
+    def create(self, validated_data):
+        return super().create(validated_data)
+
+    @transaction.atomic
+    def update(self, instance, validated_data):
+        return super().update(instance, validated_data)
 
     # def create(self, validated_data):
     #     """Prevent duplicated subsamples from being created."""
@@ -65,3 +97,47 @@ class ProcessedImageSerializer(serializers.ModelSerializer):
     #         # Trigger save event to reprocess the subsampling
     #         obj.save()
     #     return obj
+
+
+class ProcessedImageBulkSerializer(serializers.Serializer):
+    """Create many ProcessedImages of a group at once.
+
+    Each entry of ``source_images`` lists the source images of one
+    ProcessedImage. The rows are written with ``bulk_create``, skipping the
+    signals of each save, and their tasks are queued together.
+
+    """
+
+    group = serializers.PrimaryKeyRelatedField(queryset=models.ProcessedImageGroup.objects.all())
+    source_images = serializers.ListField(
+        child=serializers.ListField(child=serializers.IntegerField(), min_length=1),
+        min_length=1,
+    )
+
+    def validate_source_images(self, value):
+        pks = {pk for image_pks in value for pk in image_pks}
+        images = models.Image.objects.filter(pk__in=pks)
+        if 'request' in self.context:
+            images = filter_write_perm(self.context['request'].user, images)
+        missing = pks - set(images.values_list('pk', flat=True))
+        if missing:
+            raise serializers.ValidationError(
+                f'Images do not exist or may not be processed: {sorted(missing)}'
+            )
+        return value
+
+    @transaction.atomic
+    def create(self, validated_data):
+        processed_images = models.ProcessedImage.objects.bulk_create(
+            models.ProcessedImage(group=validated_data['group'])
+            for _ in validated_data['source_images']
+        )
+        through = models.ProcessedImage.source_images.through
+        through.objects.bulk_create(
+            through(processedimage_id=processed_image.pk, image_id=image_pk)
+            for processed_image, image_pks in zip(processed_images, validated_data['source_images'])
+            for image_pk in dict.fromkeys(image_pks)
+        )
+        pks = [processed_image.pk for processed_image in processed_images]
+        transaction.on_commit(lambda: models.ProcessedImage._run_tasks_bulk(pks))
+        return processed_images
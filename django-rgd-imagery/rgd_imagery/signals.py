@@ -1,8 +1,9 @@
 import os
 
 from django.db import transaction
-from django.db.models.signals import m2m_changed, post_save, pre_delete
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
 from django.dispatch import receiver
+from rgd.models import ChecksumFile
 from rgd.utility import skip_signal
 from rgd_imagery import models
 
@@ -19,6 +20,37 @@ def _m2m_changed_image_set(sender, instance, action, reverse, *args, **kwargs):
             instance.save(update_fields=['name'])
 
 
+@receiver(m2m_changed, sender=models.ImageSet.images.through)
+def _m2m_changed_image_set_signature(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse:
+        # `instance` is an Image and `pk_set` the ImageSets
+        if action == 'pre_clear':
+            instance._cleared_image_set_ids = list(
+                instance.imageset_set.values_list('pk', flat=True)
+            )
+            return
+        if action == 'post_clear':
+            pk_set = instance._cleared_image_set_ids
+        elif action not in ('post_add', 'post_remove'):
+            return
+        for image_set in models.ImageSet.objects.filter(pk__in=pk_set):
+            image_set.update_signature()
+    elif action in ('post_add', 'post_remove', 'post_clear'):
+        instance.update_signature()
+
+
+@receiver(pre_delete, sender=models.Image)
+def _pre_delete_image(sender, instance, *args, **kwargs):
+    # The M2M rows are removed without an `m2m_changed` signal
+    instance._image_set_ids = list(instance.imageset_set.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=models.Image)
+def _post_delete_image(sender, instance, *args, **kwargs):
+    for image_set in models.ImageSet.objects.filter(pk__in=instance._image_set_ids):
+        image_set.update_signature()
+
+
 @receiver(post_save, sender=models.Raster)
 @skip_signal()
 def _post_save_raster(sender, instance, *args, **kwargs):
@@ -33,8 +65,35 @@ def _post_save_image_file(sender, instance, *args, **kwargs):
 
 @receiver(post_save, sender=models.ProcessedImage)
 @skip_signal()
-def _post_save_processed_image(sender, instance, *args, **kwargs):
-    transaction.on_commit(lambda: instance._post_save_event_task(*args, **kwargs))
+def _post_save_processed_image(sender, instance, created, *args, **kwargs):
+    if not created and kwargs.get('update_fields'):
+        return
+    instance._schedule_tasks()
+
+
+@receiver(m2m_changed, sender=models.ProcessedImage.source_images.through)
+@skip_signal()
+def _m2m_changed_processed_image_sources(sender, instance, action, reverse, *args, **kwargs):
+    # Processing waits for the source images, which are set after the first save
+    if not reverse and action in ('post_add', 'post_remove'):
+        instance._schedule_tasks()
+
+
+@receiver(post_save, sender=ChecksumFile)
+def _post_save_checksum_file_processed_images(
+    sender, instance, created, update_fields=None, **kwargs
+):
+    if created or (update_fields is not None and 'checksum' not in update_fields):
+        return
+    # Rerun the products derived from the previous content of the file
+    derived = (
+        models.ProcessedImage.objects.filter(source_images__file=instance)
+        .exclude(fingerprint='')
+        .distinct()
+    )
+    for processed_image in derived:
+        if processed_image.fingerprint != processed_image.compute_fingerprint():
+            processed_image._schedule_tasks()
 
 
 @receiver(pre_delete, sender=models.ProcessedImage)
@@ -1,24 +1,32 @@
 """Helper methods for creating a ``GDALRaster`` entry from a raster file."""
 from contextlib import contextmanager
+import math
 import os
-import tempfile
+import time
 
 from celery.utils.log import get_task_logger
 import dateutil.parser
+from django.conf import settings
 from django.contrib.gis.geos import GEOSGeometry, Polygon
+from django.core.cache import cache
+from django.db import transaction
 from django.utils.timezone import make_aware
 from django_large_image.tilesource import get_bounds
 import numpy as np
-from osgeo import gdal
 import rasterio
-from rasterio import Affine, MemoryFile
+from rasterio import Affine
 import rasterio.features
-import rasterio.shutil
-import rasterio.warp
-from rasterio.warp import Resampling, calculate_default_transform, reproject
+from rasterio.warp import Resampling
+from rasterio.windows import Window
 from rgd.models.constants import DB_SRID
-from rgd.utility import get_or_create_no_commit, get_temp_dir
-from rgd_imagery.large_image_utilities import yeild_tilesource_from_image
+from rgd.utility import bulk_upsert, get_or_create_no_commit
+from rgd_imagery import reproject
+from rgd_imagery.large_image_utilities import (
+    get_band_statistics_cache_key,
+    get_tilesource_from_path,
+    yeild_tilesource_from_image,
+    yield_image_local_path,
+)
 from rgd_imagery.models import BandMeta, Image, ImageMeta, Raster, RasterMeta
 from shapely.geometry import shape
 from shapely.ops import unary_union
@@ -30,43 +38,95 @@ os.environ['GDAL_DATA'] = GDAL_DATA
 
 
 MAX_LOAD_SHAPE = (4000, 4000)
+FOOTPRINT_TILE_SIZE = 1024
+HISTOGRAM_BINS = 256
+# Stored for auto-contrast, e.g. ``min:0.02`` in a tile style is the 2nd percentile
+PERCENTILES = (1, 2, 5, 25, 50, 75, 95, 98, 99)
+# The ``BandMeta`` fields also given by the tile source, at load time
+TILE_SOURCE_STATISTICS = ('min', 'max', 'mean', 'std')
 
 
-def _populate_image_meta_models(image, image_meta):
+@contextmanager
+def _timed(timings, stage):
+    """Accumulate the wall time spent in a stage of an ingest routine."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[stage] = timings.get(stage, 0.0) + time.perf_counter() - start
 
-    with yeild_tilesource_from_image(image) as tile_source:
-        meta = tile_source.getMetadata()
-        imeta = tile_source.getInternalMetadata()
-        bands = tile_source.getBandInformation()
-        if isinstance(bands, list):
-            bands = {i + 1: b for i, b in enumerate(bands)}
-
-        image_meta.driver = (
-            imeta['driverShortName'] if 'driverShortName' in imeta else 'pil'
-        )  # NOTE: assumes PIL if not using GDAL
-        image_meta.height = meta['sizeY']
-        image_meta.width = meta['sizeX']
-        # No longer editing image_entry
-        image_meta.save()
-
-        # TODO: we need `PILFileTileSource` in large_image to support band information
-        if bands:
-            for index, band_info in bands.items():
-
-                def safe_get(key):
-                    return band_info[key] if key in band_info else None
-
-                band_meta = BandMeta()
-                band_meta.parent_image = image_meta.parent_image
-                band_meta.band_number = index
-                band_meta.nodata_value = safe_get('nodata')
-                band_meta.min = safe_get('min')
-                band_meta.max = safe_get('max')
-                band_meta.mean = safe_get('mean')
-                band_meta.std = safe_get('stdev')
-                band_meta.interpretation = safe_get('interpretation')
-                # Save this band entirely
-                band_meta.save()
+
+def _extract_image_meta(tile_source):
+    """Extract the ``ImageMeta`` fields and ``BandMeta`` fields from an open tile source.
+
+    Returns a tuple of a dict with the fields of ``ImageMeta`` and a list of
+    dicts with the fields of each ``BandMeta``.
+
+    """
+    meta = tile_source.getMetadata()
+    imeta = tile_source.getInternalMetadata()
+    bands = tile_source.getBandInformation()
+    if isinstance(bands, list):
+        bands = {i + 1: b for i, b in enumerate(bands)}
+
+    image_meta = {
+        # NOTE: assumes PIL if not using GDAL
+        'driver': imeta['driverShortName'] if 'driverShortName' in imeta else 'pil',
+        'height': meta['sizeY'],
+        'width': meta['sizeX'],
+    }
+
+    # TODO: we need `PILFileTileSource` in large_image to support band information
+    band_metas = []
+    for index, band_info in (bands or {}).items():
+        band_metas.append(
+            {
+                'band_number': index,
+                'nodata_value': band_info.get('nodata'),
+                'min': band_info.get('min'),
+                'max': band_info.get('max'),
+                'mean': band_info.get('mean'),
+                'std': band_info.get('stdev'),
+                'interpretation': band_info.get('interpretation'),
+            }
+        )
+    return image_meta, band_metas
+
+
+def _save_image_meta(image, image_meta, band_metas):
+    """Write the ``ImageMeta`` and ``BandMeta`` entries of an image.
+
+    This should be called within a transaction.
+
+    """
+    image_meta, _ = ImageMeta.objects.update_or_create(parent_image=image, defaults=image_meta)
+    # The statistics of the tile source do not replace those computed by
+    #  `compute_band_statistics`, which reads the pixels
+    computed = set(
+        BandMeta.objects.filter(parent_image=image, histogram__isnull=False).values_list(
+            'band_number', flat=True
+        )
+    )
+    band_metas = [
+        (
+            {k: v for k, v in row.items() if k not in TILE_SOURCE_STATISTICS}
+            if row['band_number'] in computed
+            else row
+        )
+        for row in band_metas
+    ]
+    # Update bands in place to keep user edits (e.g. `description`) and
+    #  remove the bands that no longer exist in the file
+    bulk_upsert(
+        BandMeta.objects.filter(parent_image=image),
+        band_metas,
+        key_fields=('band_number',),
+        defaults={'parent_image': image},
+        unique_fields=('parent_image', 'band_number'),
+    )
+    # Tile styles are derived from the bands
+    transaction.on_commit(lambda: cache.delete(get_band_statistics_cache_key(image.pk)))
+    return image_meta
 
 
 def load_image(image):
@@ -80,14 +140,122 @@ def load_image(image):
     if not isinstance(image, Image):
         image = Image.objects.get(pk=image)
 
-    image_meta, created = get_or_create_no_commit(ImageMeta, parent_image=image)
-    if not created:
-        # Clear out associated entries because they could be invalid
-        BandMeta.objects.filter(parent_image=image).delete()
+    with yeild_tilesource_from_image(image) as tile_source:
+        image_meta, band_metas = _extract_image_meta(tile_source)
 
-    _populate_image_meta_models(image, image_meta)
+    with transaction.atomic():
+        return _save_image_meta(image, image_meta, band_metas)
 
-    return image_meta
+
+def _iter_valid_band_values(src, max_shape=MAX_LOAD_SHAPE):
+    """Yield the valid values of each band of a decimated view of the raster.
+
+    All bands are read together, one window at a time, so the raster is
+    read once per pass however many bands it has.
+
+    """
+    for window, out_shape in _iter_mask_windows(src, max_shape=max_shape):
+        data = src.read(window=window, out_shape=(src.count, *out_shape), masked=True)
+        for index in range(src.count):
+            values = data[index].compressed().astype(np.float64)
+            yield index, values[np.isfinite(values)]
+
+
+def _compute_band_statistics(src, max_shape=MAX_LOAD_SHAPE, bins=HISTOGRAM_BINS):
+    """Compute the statistics and histogram of each band of an open raster.
+
+    The moments are accumulated window by window in a first pass, merging
+    the mean and sum of squared deviations of each window (Chan et al.),
+    then the histogram is accumulated over the range found in a second
+    pass. Percentiles are interpolated from the histogram. Memory use does
+    not depend on the size of the raster.
+
+    Returns a list with a dict of the ``BandMeta`` fields of each band.
+
+    """
+    count = np.zeros(src.count)
+    mean = np.zeros(src.count)
+    m2 = np.zeros(src.count)
+    vmin = np.full(src.count, np.inf)
+    vmax = np.full(src.count, -np.inf)
+    for index, values in _iter_valid_band_values(src, max_shape):
+        if not values.size:
+            continue
+        n = values.size
+        window_mean = values.mean()
+        delta = window_mean - mean[index]
+        total = count[index] + n
+        m2[index] += ((values - window_mean) ** 2).sum() + delta**2 * count[index] * n / total
+        mean[index] += delta * n / total
+        count[index] = total
+        vmin[index] = min(vmin[index], values.min())
+        vmax[index] = max(vmax[index], values.max())
+
+    edges = [
+        np.linspace(vmin[i], vmax[i], bins + 1) if count[i] else None for i in range(src.count)
+    ]
+    counts = [np.zeros(bins, dtype=np.int64) for _ in range(src.count)]
+    for index, values in _iter_valid_band_values(src, max_shape):
+        if values.size:
+            counts[index] += np.histogram(values, bins=edges[index])[0]
+
+    band_stats = []
+    for index in range(src.count):
+        if not count[index]:
+            # No valid data: leave the statistics of the band unset
+            band_stats.append(
+                {
+                    'band_number': index + 1,
+                    'histogram': None,
+                    'percentiles': None,
+                }
+            )
+            continue
+        cumulative = np.concatenate([[0], np.cumsum(counts[index])]) / count[index]
+        band_stats.append(
+            {
+                'band_number': index + 1,
+                'min': float(vmin[index]),
+                'max': float(vmax[index]),
+                'mean': float(mean[index]),
+                'std': float(np.sqrt(m2[index] / count[index])),
+                'histogram': {
+                    'bins': edges[index].tolist(),
+                    'counts': counts[index].tolist(),
+                },
+                'percentiles': {
+                    str(p): float(np.interp(p / 100, cumulative, edges[index])) for p in PERCENTILES
+                },
+            }
+        )
+    return band_stats
+
+
+def compute_band_statistics(image):
+    """Compute and store the statistics and histogram of each band of an image.
+
+    The bands are read from a decimated view of the image, which GDAL serves
+    from its overviews when it has any, so the statistics of large images
+    are approximate.
+
+    """
+    if not isinstance(image, Image):
+        image = Image.objects.get(pk=image)
+
+    with yield_image_local_path(image) as file_path, rasterio.open(file_path) as src:
+        band_stats = _compute_band_statistics(src)
+
+    bulk_upsert(
+        BandMeta.objects.filter(parent_image=image),
+        band_stats,
+        key_fields=('band_number',),
+        defaults={'parent_image': image},
+        unique_fields=('parent_image', 'band_number'),
+        # Other bands come from `load_image`
+        delete_missing=False,
+    )
+    cache.delete(get_band_statistics_cache_key(image.pk))
+    return band_stats
 
 
 def _extract_raster_outline(tile_source):
@@ -105,156 +273,127 @@ def _extract_raster_outline(tile_source):
     return Polygon(coords)
 
 
-def _extract_raster_meta(image):
-    """Extract all of the raster meta info in our models from an Image.
+def _extract_raster_meta(tile_source):
+    """Extract all of the raster meta info in our models from an open tile source.
 
     The keys of the returned dict should match the fields of the
-    ``Raster``.
+    ``RasterMeta``.
 
     """
     raster_meta = dict()
 
-    with yeild_tilesource_from_image(image) as tile_source:
-        meta = tile_source.getMetadata()
-        imeta = tile_source.getInternalMetadata()
-        bounds = get_bounds(tile_source)
-
-        raster_meta['crs'] = tile_source.getProj4String()
-        raster_meta['origin'] = [bounds['xmin'], bounds['ymin']]
-        raster_meta['resolution'] = (meta['mm_x'] * 0.001, meta['mm_y'] * 0.001)  # meters
-        raster_meta['transform'] = imeta['GeoTransform']
-        raster_meta['extent'] = [
-            bounds['xmin'],
-            bounds['ymin'],
-            bounds['xmax'],
-            bounds['ymax'],
-        ]
-        raster_meta['outline'] = _extract_raster_outline(tile_source)
-        raster_meta['footprint'] = raster_meta['outline']
+    meta = tile_source.getMetadata()
+    imeta = tile_source.getInternalMetadata()
+    bounds = get_bounds(tile_source)
+
+    raster_meta['crs'] = tile_source.getProj4String()
+    raster_meta['origin'] = [bounds['xmin'], bounds['ymin']]
+    raster_meta['resolution'] = (meta['mm_x'] * 0.001, meta['mm_y'] * 0.001)  # meters
+    raster_meta['transform'] = imeta['GeoTransform']
+    raster_meta['extent'] = [
+        bounds['xmin'],
+        bounds['ymin'],
+        bounds['xmax'],
+        bounds['ymax'],
+    ]
+    raster_meta['outline'] = _extract_raster_outline(tile_source)
+    raster_meta['footprint'] = raster_meta['outline']
 
     return raster_meta
 
 
-def _get_valid_data_footprint(src, band_num):
-    """Get ``GEOSGeometry`` of valid data footprint from the raster mask."""
-    # Determine mask resolution to prevent loading massive imagery
-    # shape = tuple(np.min([src.shape, MAX_LOAD_SHAPE], axis=0))
-    # mask = src.read_masks(band_num, out_shape=shape, resampling=5)
-    # TODO: fix transform to match this resampling
-    nodata = 0
-    if not src.nodata:
-        workdir = get_temp_dir()
-        with tempfile.TemporaryDirectory(dir=workdir) as tmpdir:
-            output_path = os.path.join(tmpdir, 'temp')
-            rasterio.shutil.copy(src, output_path, driver=src.driver)
-            with rasterio.open(output_path, 'r+') as src:
-                nodata = 0
-                src.nodata = nodata
-                mask = src.dataset_mask()
-    else:
-        nodata = src.nodata
-        mask = src.dataset_mask()
-
-    # Extract feature shapes and values from the array.
-    # Assumes already working in correct spatial reference
-    geoms = []
-    for geom, val in rasterio.features.shapes(mask, transform=src.transform):
-        # Ignore the 0-feature and only return on valid data feature
-        if val != nodata:
-            geoms.append(shape(geom))
-    if geoms:
-        geom = unary_union(geoms)
-        # NOTE: shapely 1.8 deprecated `to_wkt()`
-        return GEOSGeometry(geom.wkt).convex_hull
+def _iter_mask_windows(src, max_shape=MAX_LOAD_SHAPE, tile_size=FOOTPRINT_TILE_SIZE):
+    """Yield windows covering a raster and the decimated shape to read each one at.
 
-    raise ValueError('No valid raster footprint found.')
+    The whole raster is read at a single integer decimation factor so that
+    it fits in ``max_shape``. GDAL serves these decimated reads from the
+    closest overview when the raster has any. Each window covers at most
+    ``tile_size`` pixels along each side after decimation.
 
+    """
+    factor = max(
+        1,
+        math.ceil(src.height / max_shape[0]),
+        math.ceil(src.width / max_shape[1]),
+    )
+    step = tile_size * factor
+    for row_off in range(0, src.height, step):
+        for col_off in range(0, src.width, step):
+            window = Window(
+                col_off,
+                row_off,
+                min(step, src.width - col_off),
+                min(step, src.height - row_off),
+            )
+            out_shape = (
+                max(1, math.ceil(window.height / factor)),
+                max(1, math.ceil(window.width / factor)),
+            )
+            yield window, out_shape
 
-@contextmanager
-def _yield_downsampled_raster(raster):
-    # https://gis.stackexchange.com/questions/329434/creating-an-in-memory-rasterio-dataset-from-numpy-array/329439#329439
-    max_n = np.product(MAX_LOAD_SHAPE)
-    n = raster.height * raster.width
-    scale = 1.0
-    if n > max_n:
-        scale = max_n / n
-
-    if scale == 1.0:
-        yield raster
-        return
-
-    t = raster.transform
-    # rescale the metadata
-    transform = Affine(t.a / scale, t.b, t.c, t.d, t.e / scale, t.f)
-    height = int(raster.height * scale)
-    width = int(raster.width * scale)
 
-    profile = raster.profile
-    profile.update(transform=transform, height=height, width=width)
+def _get_valid_data_footprint(src, band_num):
+    """Get ``GEOSGeometry`` of valid data footprint from the raster mask.
 
-    data = raster.read(
-        out_shape=(raster.count, height, width),
-        resampling=Resampling.bilinear,
-    )
+    The mask is read from a decimated view of the raster one tile at a
+    time and each tile is reduced to the convex hull of its valid data, so
+    memory use does not depend on the size of the raster.
 
-    with MemoryFile() as memfile:
-        with memfile.open(**profile) as dataset:
-            dataset.write(data)
-            del data
+    """
+    hulls = []
+    for window, out_shape in _iter_mask_windows(src):
+        mask = src.read_masks(band_num, window=window, out_shape=out_shape)
+        if not mask.any():
+            continue
+        transform = src.window_transform(window) * Affine.scale(
+            window.width / out_shape[1], window.height / out_shape[0]
+        )
+        geoms = [
+            shape(geom)
+            for geom, _ in rasterio.features.shapes(mask, mask=mask > 0, transform=transform)
+        ]
+        # The footprint is a convex hull so the hull of each tile is all we need
+        hulls.append(unary_union(geoms).convex_hull)
+        del mask, geoms
+    if hulls:
+        geom = unary_union(hulls)
+        # NOTE: shapely 1.8 deprecated `to_wkt()`
+        return GEOSGeometry(geom.wkt).convex_hull
 
-        with memfile.open() as dataset:  # Reopen as DatasetReader
-            yield dataset  # Note yield not return
+    raise ValueError('No valid raster footprint found.')
 
 
 @contextmanager
 def _reproject_raster(file_path, epsg):
-    """Reproject an open raster to given spatial reference.
+    """Open a raster as a virtual dataset in the given spatial reference.
 
-    This will return an open rasterio handle.
+    This will return an open rasterio handle. Nothing is copied: pixels are
+    warped on demand as they are read, on a grid cached for the raster.
+    Rasters without a nodata value treat ``0`` as nodata.
 
     """
-    dst_crs = rasterio.crs.CRS.from_epsg(epsg)
     with rasterio.open(file_path, 'r') as src:
-        if src.crs == dst_crs:
-            # If raster already in desired CRS, return itself
-            yield src
-            return
-        workdir = get_temp_dir()
-        with tempfile.TemporaryDirectory(dir=workdir) as tmpdir:
-            # Get a downsampled version of the original raster
-            with _yield_downsampled_raster(src) as dsrc:
-                # If raster is NTIF format, convert first
-                if dsrc.driver == 'NITF':
-                    f = dsrc.files[0]
-                    output_path = os.path.join(tmpdir, os.path.basename(f)) + '.tiff'
-                    ds = gdal.Open(f)
-                    ds = gdal.Translate(output_path, ds, options=['-of', 'GTiff'])
-                    ds = None
-                    # TODO: this file is not closed properly.
-                    dsrc = rasterio.open(output_path, 'r')
-
-                transform, width, height = calculate_default_transform(
-                    dsrc.crs, dst_crs, dsrc.width, dsrc.height, *dsrc.bounds
-                )
-                kwargs = dsrc.meta.copy()
-                kwargs.update(
-                    {'crs': dst_crs, 'transform': transform, 'width': width, 'height': height}
-                )
-                path = os.path.join(tmpdir, 'temp_raster')
-                with rasterio.open(path, 'w', **kwargs) as dst:
-                    for i in range(1, dsrc.count + 1):
-                        reproject(
-                            source=rasterio.band(dsrc, i),
-                            destination=rasterio.band(dst, i),
-                            src_transform=dsrc.transform,
-                            src_crs=dsrc.crs,
-                            dst_transform=transform,
-                            dst_crs=dst_crs,
-                            resampling=Resampling.bilinear,
-                        )
-                    dst.colorinterp = dsrc.colorinterp
-            with rasterio.open(path, 'r') as rsrc:
-                yield rsrc
+        nodata = 0 if src.nodata is None else src.nodata
+        with reproject.warped_vrt(
+            src,
+            f'EPSG:{epsg}',
+            src_nodata=nodata,
+            nodata=nodata,
+            resampling=Resampling.nearest,
+        ) as vrt:
+            yield vrt
+
+
+def _extract_raster_footprint_from_path(file_path):
+    """Extract the footprint of a raster on the local file system."""
+    # Reproject the raster to the DB SRID using rasterio directly rather
+    #  than transforming the extracted geometry which had issues.
+    with _reproject_raster(file_path, DB_SRID) as src:
+        try:
+            # Only implement for first band for now
+            return _get_valid_data_footprint(src, 1)
+        except Exception as e:  # TODO: be more clever about this
+            logger.error(f'Issue computing valid data footprint: {e}')
 
 
 def _extract_raster_footprint(image):
@@ -264,14 +403,7 @@ def _extract_raster_footprint(image):
 
     """
     with image.file.yield_local_path(yield_file_set=True) as file_path:
-        # Reproject the raster to the DB SRID using rasterio directly rather
-        #  than transforming the extracted geometry which had issues.
-        with _reproject_raster(file_path, DB_SRID) as src:
-            try:
-                # Only implement for first band for now
-                return _get_valid_data_footprint(src, 1)
-            except Exception as e:  # TODO: be more clever about this
-                logger.error(f'Issue computing valid data footprint: {e}')
+        return _extract_raster_footprint_from_path(file_path)
 
 
 def _compare_raster_meta(a, b):
@@ -287,69 +419,95 @@ def _compare_raster_meta(a, b):
     return True
 
 
-def _validate_image_set_is_raster(image_set):
-    """Validate if all of the images in a single ``ImageSet`` are a raster.
-
-    Will check if all have a spatial reference/geo meta info but not
-    necessarily the same.
-
-    Returns the first image's meta info if it checks out.
-
-    """
+def _get_raster_images(image_set):
+    """Get the images of a raster and the base image to extract raster meta from."""
     images = list(image_set.images.all())
-
     if not images:
         raise ValueError('ImageSet returned no images.')
+    return images, images[-1]
 
-    base_image = images.pop()
-    first_meta = _extract_raster_meta(base_image)
-    # for image in images:
-    #     _extract_raster_meta(image)
-    return first_meta
 
+def _apply_extra_fields(raster, raster_meta):
+    """Assign the user supplied ``extra_fields`` of a raster to its meta."""
+    if not raster.extra_fields:
+        return
+    date = raster.extra_fields.get('acquisition_date', None)
+    cloud_cover = raster.extra_fields.get('cloud_cover', None)
+    instrumentation = raster.extra_fields.get('instrumentation', None)
+    if date:
+        adt = dateutil.parser.isoparser().isoparse(date)
+        try:
+            raster_meta.acquisition_date = make_aware(adt)
+        except ValueError:
+            raster_meta.acquisition_date = adt
+    if cloud_cover:
+        raster_meta.cloud_cover = cloud_cover
+    if instrumentation:
+        raster_meta.instrumentation = instrumentation
+
+
+def ingest_raster(raster, footprint: bool = False):
+    """Populate all of the metadata of a raster in a single pass.
+
+    Each image of the raster is opened once to extract its ``ImageMeta`` and
+    ``BandMeta``. The base image additionally provides the ``RasterMeta``,
+    its outline and (optionally) its valid data footprint. All rows are then
+    written in a single transaction.
+
+    Returns a dict of the seconds spent in each stage.
 
-def populate_raster(raster):
-    """Autopopulate the fields of the raster."""
+    """
     if not isinstance(raster, Raster):
         raster = Raster.objects.get(pk=raster)
 
-    if not raster.name:
-        raster.name = raster.image_set.name
-        raster.save(
-            update_fields=[
-                'name',
-            ]
-        )
-    # Has potential to error with failure reason
-    meta = _validate_image_set_is_raster(raster.image_set)
-    raster_meta, created = get_or_create_no_commit(RasterMeta, parent_raster=raster)
-    # Not using `defaults` here because we want `meta` to always get updated.
-    for k, v in meta.items():
-        # Yeah. This is sketchy, but it works.
-        setattr(raster_meta, k, v)
-    # Assign extra fields:
-    if raster.extra_fields:
-        date = raster.extra_fields.get('acquisition_date', None)
-        cloud_cover = raster.extra_fields.get('cloud_cover', None)
-        instrumentation = raster.extra_fields.get('instrumentation', None)
-        if date:
-            adt = dateutil.parser.isoparser().isoparse(date)
-            try:
-                raster_meta.acquisition_date = make_aware(adt)
-            except ValueError:
-                raster_meta.acquisition_date = adt
-        if cloud_cover:
-            raster_meta.cloud_cover = cloud_cover
-        if instrumentation:
-            raster.rastermeta.instrumentation = instrumentation
-
-    raster_meta.save()
+    timings = {}
+    images, base_image = _get_raster_images(raster.image_set)
+    image_metas = {}
+    for image in images:
+        # NOTE: yield_file_set=True in case there are header files
+        with image.file.yield_local_path(yield_file_set=True) as file_path:
+            with _timed(timings, 'open'):
+                tile_source = get_tilesource_from_path(file_path)
+            with _timed(timings, 'image_meta'):
+                image_metas[image] = _extract_image_meta(tile_source)
+            if image == base_image:
+                with _timed(timings, 'raster_meta'):
+                    meta = _extract_raster_meta(tile_source)
+                if footprint:
+                    with _timed(timings, 'footprint'):
+                        valid_footprint = _extract_raster_footprint_from_path(file_path)
+                    if valid_footprint:
+                        meta['footprint'] = valid_footprint
+
+    with _timed(timings, 'write'), transaction.atomic():
+        for image, (image_meta, band_metas) in image_metas.items():
+            _save_image_meta(image, image_meta, band_metas)
+        if not raster.name:
+            raster.name = raster.image_set.name
+            raster.save(update_fields=['name'])
+        raster_meta, _ = get_or_create_no_commit(RasterMeta, parent_raster=raster)
+        # Not using `defaults` here because we want `meta` to always get updated.
+        for k, v in meta.items():
+            setattr(raster_meta, k, v)
+        _apply_extra_fields(raster, raster_meta)
+        raster_meta.save()
+
+    logger.info(
+        f'Ingested raster {raster.pk} ({len(images)} images): '
+        + ', '.join(f'{stage}={seconds:.3f}s' for stage, seconds in timings.items())
+    )
+    return timings
+
+
+def populate_raster(raster):
+    """Autopopulate the fields of the raster."""
+    ingest_raster(raster, footprint=getattr(settings, 'RGD_RASTER_INGEST_FOOTPRINT', False))
     return True
 
 
 def populate_raster_outline(raster_pk):
     raster = Raster.objects.get(pk=raster_pk)
-    base_image = raster.image_set.images.first()
+    _, base_image = _get_raster_images(raster.image_set)
     with yeild_tilesource_from_image(base_image) as tile_source:
         raster.rastermeta.outline = _extract_raster_outline(tile_source)
     raster.rastermeta.save(
@@ -361,11 +519,11 @@ def populate_raster_outline(raster_pk):
 
 def populate_raster_footprint(raster_pk):
     raster = Raster.objects.get(pk=raster_pk)
-    # Only set the footprint if the RasterMeta has been created already
-    #   this avoids a race condition where footprint might not get set correctly.
+    # Only set the footprint if the RasterMeta has been created already. This
+    #   is chained after `populate_raster`, but may be queued from the admin.
     try:
         raster_meta = RasterMeta.objects.get(parent_raster=raster)
-        base_image = raster.image_set.images.first()
+        _, base_image = _get_raster_images(raster.image_set)
         footprint = _extract_raster_footprint(base_image)
         if footprint:
             raster_meta.footprint = footprint
@@ -1,33 +1,64 @@
 from celery import shared_task
+from celery.utils.log import get_task_logger
 from django.conf import settings
 from rgd.tasks import helpers
 
+logger = get_task_logger(__name__)
+
+# Footprint refinement is slow, so it can be routed to its own queue (and
+#  workers) to never hold up the metadata ingest that tiles and search depend on
+RASTER_FOOTPRINT_QUEUE = getattr(settings, 'RGD_RASTER_FOOTPRINT_QUEUE', None)
+
 
 @shared_task(time_limit=settings.CELERY_TASK_TIME_LIMIT)
 def task_load_image(file_pk):
+    from rgd.models.mixins import Status
     from rgd_imagery.models import Image
     from rgd_imagery.tasks.etl import load_image
 
     image_file = Image.objects.get(pk=file_pk)
     helpers._run_with_failure_reason(image_file, load_image, file_pk)
+    if image_file.status == Status.SUCCEEDED:
+        task_compute_band_statistics.delay(file_pk)
+
+
+@shared_task(time_limit=settings.CELERY_TASK_TIME_LIMIT)
+def task_compute_band_statistics(file_pk):
+    from rgd_imagery.tasks.etl import compute_band_statistics
+
+    # Tiles fall back to scanning the image for their styles until this
+    #  completes, so a failure here is logged rather than failing the image
+    try:
+        compute_band_statistics(file_pk)
+    except Exception:
+        logger.exception(f'Failed to compute the band statistics of Image {file_pk}')
 
 
 @shared_task(time_limit=settings.CELERY_TASK_TIME_LIMIT)
 def task_populate_raster(raster_pk):
+    from rgd.models.mixins import Status
     from rgd_imagery.models import Raster
     from rgd_imagery.tasks.etl import populate_raster
 
     raster = Raster.objects.get(pk=raster_pk)
     helpers._run_with_failure_reason(raster, populate_raster, raster_pk)
+    # Chain the refinement so it only runs once the RasterMeta exists
+    if raster.status == Status.SUCCEEDED and not getattr(
+        settings, 'RGD_RASTER_INGEST_FOOTPRINT', False
+    ):
+        task_populate_raster_footprint.delay(raster_pk)
 
 
-@shared_task(time_limit=settings.CELERY_TASK_TIME_LIMIT)
+@shared_task(time_limit=settings.CELERY_TASK_TIME_LIMIT, queue=RASTER_FOOTPRINT_QUEUE)
 def task_populate_raster_footprint(raster_pk):
-    from rgd_imagery.models import Raster
     from rgd_imagery.tasks.etl import populate_raster_footprint
 
-    raster = Raster.objects.get(pk=raster_pk)
-    helpers._run_with_failure_reason(raster, populate_raster_footprint, raster_pk)
+    # The raster keeps the outline from ingest until this completes, so a
+    #  failure here is logged rather than failing the raster
+    try:
+        populate_raster_footprint(raster_pk)
+    except Exception:
+        logger.exception(f'Failed to populate the footprint of Raster {raster_pk}')
 
 
 @shared_task(time_limit=settings.CELERY_TASK_TIME_LIMIT)
@@ -41,8 +72,28 @@ def task_populate_raster_outline(raster_pk):
 
 @shared_task(time_limit=settings.CELERY_TASK_TIME_LIMIT)
 def task_run_processed_image(processed_pk):
+    from rgd.models.mixins import Status
     from rgd_imagery.models import ProcessedImage
     from rgd_imagery.tasks.subsample import run_processed_image
 
     obj = ProcessedImage.objects.get(pk=processed_pk)
-    helpers._run_with_failure_reason(obj, run_processed_image, processed_pk)
+    obj.set_progress(0.0)
+    helpers._run_with_failure_reason(obj, run_processed_image, obj)
+    if obj.status == Status.SUCCEEDED:
+        obj.set_progress(1.0)
+    # Reported in the task result to size the memory of the workers
+    return {'status': obj.status, 'peak_rss': getattr(obj, 'peak_rss', None)}
+
+
+@shared_task(time_limit=settings.CELERY_TASK_TIME_LIMIT)
+def task_materialize_processed_image(processed_pk):
+    from rgd.models.mixins import Status
+    from rgd_imagery.models import ProcessedImage
+    from rgd_imagery.tasks.subsample import materialize_virtual_mosaic
+
+    obj = ProcessedImage.objects.get(pk=processed_pk)
+    obj.set_progress(0.0)
+    helpers._run_with_failure_reason(obj, materialize_virtual_mosaic, obj)
+    if obj.status == Status.SUCCEEDED:
+        obj.set_progress(1.0)
+    return {'status': obj.status, 'peak_rss': getattr(obj, 'peak_rss', None)}
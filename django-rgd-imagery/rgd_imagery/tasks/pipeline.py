@@ -0,0 +1,151 @@
+"""Run pipelines of processing operations in a single task.
+
+The parameters of a pipeline ``ProcessedImageGroup`` describe its steps::
+
+    {
+        "steps": [
+            {"name": "crop", "process_type": "region", "parameters": {...}},
+            {"name": "half", "process_type": "resample", "parameters": {"sample_factor": 0.5},
+             "persist": true},
+            {"name": "cog", "process_type": "cog"}
+        ]
+    }
+
+Each step reads the outputs of the steps named in its ``inputs``, by default
+the previous step, or the source images (``"sources"``) for the first step.
+Steps may only read the outputs of earlier steps, so the steps form a DAG.
+Operations on a single image are applied to each of their inputs, while
+mosaics combine all of them. The last step must produce the one final image.
+
+Intermediate outputs are temporary files, or VRTs for virtual mosaics, on
+the local disk of the worker. Only the final output and the outputs of the
+steps marked with ``persist`` are uploaded, the latter as ancillary files.
+
+"""
+from contextlib import ExitStack
+import os
+import tempfile
+
+from celery.utils.log import get_task_logger
+from rgd.models import ChecksumFile
+from rgd.utility import get_temp_dir
+from rgd_imagery import large_image_utilities, vrt
+from rgd_imagery.models import ProcessedImageGroup
+from rgd_imagery.tasks import subsample
+
+logger = get_task_logger(__name__)
+
+SOURCES = 'sources'
+
+ProcessTypes = ProcessedImageGroup.ProcessTypes
+
+# Operations on one image: (input_path, output_path, parameters)
+SINGLE_OPERATIONS = {
+    ProcessTypes.COG: subsample._convert_to_cog,
+    ProcessTypes.REGION: subsample._extract_region,
+    ProcessTypes.RESAMPLE: lambda i, o, p: subsample._resample(i, o, float(p['sample_factor'])),
+}
+
+# Operations combining images: (input_paths, output_path, parameters)
+MULTIPLE_OPERATIONS = {
+    ProcessTypes.MOSAIC: lambda i, o, p: subsample._mosaic(i, o),
+    ProcessTypes.VIRTUAL_MOSAIC: lambda i, o, p: vrt.build_vrt(i, o),
+}
+
+
+def validate_pipeline(parameters):
+    """Check the steps of a pipeline and fill in their defaults.
+
+    Raises a ``ValueError`` describing the first invalid step.
+
+    """
+    steps = (parameters or {}).get('steps')
+    if not steps:
+        raise ValueError('A pipeline needs at least one step.')
+    names = {SOURCES}
+    validated = []
+    for index, step in enumerate(steps):
+        name = step.get('name', f'step-{index}')
+        if name in names:
+            raise ValueError(f'Step name `{name}` is not unique.')
+        process_type = step.get('process_type')
+        if process_type not in SINGLE_OPERATIONS and process_type not in MULTIPLE_OPERATIONS:
+            raise ValueError(f'Step `{name}` has an unsupported process type: {process_type}')
+        inputs = step.get('inputs', [validated[-1]['name'] if validated else SOURCES])
+        for input_name in inputs:
+            if input_name not in names:
+                raise ValueError(f'Step `{name}` reads `{input_name}` before it is produced.')
+        persist = step.get('persist', False) or index == len(steps) - 1
+        if persist and process_type == ProcessTypes.VIRTUAL_MOSAIC:
+            # The VRT would reference temporary files
+            raise ValueError(f'Step `{name}`: virtual mosaics can only be intermediates.')
+        names.add(name)
+        validated.append(
+            {
+                'name': name,
+                'process_type': process_type,
+                'parameters': step.get('parameters') or {},
+                'inputs': inputs,
+                'persist': persist,
+            }
+        )
+    return validated
+
+
+def run_pipeline(processed_image):
+    steps = validate_pipeline(processed_image.group.parameters)
+
+    with subsample._processed_image_helper(processed_image) as (
+        images,
+        output,
+    ), ExitStack() as stack:
+        sources = [
+            (str(stack.enter_context(large_image_utilities.yield_image_local_path(image))), image)
+            for image in images
+        ]
+        workdir = stack.enter_context(tempfile.TemporaryDirectory(dir=get_temp_dir()))
+        # The outputs of each step, with the source images they derive from
+        outputs = {SOURCES: [(path, [image]) for path, image in sources]}
+        ancillary_files = []
+
+        for index, step in enumerate(steps):
+            name = step['name']
+            inputs = [item for input_name in step['inputs'] for item in outputs[input_name]]
+            suffix = '.vrt' if step['process_type'] == ProcessTypes.VIRTUAL_MOSAIC else '.tif'
+            logger.debug(f'Running step `{name}` on {len(inputs)} inputs')
+            if step['process_type'] in MULTIPLE_OPERATIONS:
+                path = os.path.join(workdir, f'{name}{suffix}')
+                MULTIPLE_OPERATIONS[step['process_type']](
+                    [p for p, _ in inputs], path, step['parameters']
+                )
+                lineage = list({image.pk: image for _, i in inputs for image in i}.values())
+                outputs[name] = [(path, lineage)]
+            else:
+                outputs[name] = []
+                for i, (input_path, lineage) in enumerate(inputs):
+                    path = os.path.join(workdir, f'{name}-{i}{suffix}')
+                    SINGLE_OPERATIONS[step['process_type']](input_path, path, step['parameters'])
+                    outputs[name].append((path, lineage))
+
+            if step is steps[-1]:
+                if len(outputs[name]) != 1:
+                    raise ValueError(
+                        f'The final step `{name}` produced {len(outputs[name])} images '
+                        'instead of one: end the pipeline with a mosaic.'
+                    )
+                path, _ = outputs[name][0]
+                with open(path, 'rb') as f:
+                    output.save_file_contents(f, f'{name}{suffix}')
+            elif step['persist']:
+                for path, lineage in outputs[name]:
+                    # Name the file after the source images it derives from
+                    sources_name = '_'.join(os.path.splitext(i.file.name)[0] for i in lineage)
+                    file = ChecksumFile()
+                    with open(path, 'rb') as f:
+                        file.save_file_contents(f, f'{name}_{sources_name}{suffix}')
+                    ancillary_files.append(file)
+            processed_image.set_progress((index + 1) / len(steps))
+
+    # Replace the outputs of previous runs
+    processed_image.ancillary_files.all().delete()
+    processed_image.ancillary_files.set(ancillary_files)
@@ -1,42 +1,214 @@
 """Tasks for subsampling images with GDAL."""
-from contextlib import contextmanager
-import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import ExitStack, contextmanager
+import math
+import os
+import shutil
+import threading
 
 from celery.utils.log import get_task_logger
+from django.conf import settings
 from django.contrib.gis.geos import GEOSGeometry
 from django_large_image.tilesource import get_region
 import large_image_converter
+import numpy as np
+import psutil
 import rasterio
+from rasterio import Affine
+import rasterio.errors
 from rasterio.merge import merge
+import rasterio.shutil
 from rasterio.warp import Resampling
+import rasterio.windows
+from rasterio.windows import Window
 from rgd.models import ChecksumFile
+from rgd.models.mixins import Status
 from rgd.utility import input_output_path_helper, output_path_helper
-from rgd_imagery import large_image_utilities
+from rgd_imagery import large_image_utilities, reproject, vrt
 from rgd_imagery.models import Annotation, Image, ProcessedImage, ProcessedImageGroup
 from shapely.geometry import shape
 from shapely.wkb import dumps
 
 logger = get_task_logger(__name__)
 
+# Side length of the internal tiles of processed outputs
+OUTPUT_TILE_SIZE = 512
+# The tile sources of geographic regions are opened in this projection
+REGION_PROJECTION = 'EPSG:3857'
+
+
+@contextmanager
+def _track_peak_rss(stats, interval=0.05):
+    """Record the peak resident memory of this process while in the context."""
+    process = psutil.Process()
+    peak = process.memory_info().rss
+    stop = threading.Event()
+
+    def sample():
+        nonlocal peak
+        while not stop.wait(interval):
+            peak = max(peak, process.memory_info().rss)
+
+    thread = threading.Thread(target=sample, daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+        stats['peak_rss'] = max(peak, process.memory_info().rss)
+
+
+def _get_processing_threads():
+    """Get the number of threads a worker may use for one processing task."""
+    return getattr(settings, 'RGD_PROCESSING_THREADS', 1)
+
+
+def _get_block_size(bytes_per_pixel, threads):
+    """Get the side of square output blocks such that all blocks in flight fit in memory.
+
+    The ceiling is ``RGD_PROCESSING_MEMORY_LIMIT`` bytes (256 MiB by default).
+
+    """
+    limit = getattr(settings, 'RGD_PROCESSING_MEMORY_LIMIT', 256 * 2**20)
+    side = int(math.sqrt(limit / (bytes_per_pixel * max(threads, 1))))
+    return max(OUTPUT_TILE_SIZE, side // OUTPUT_TILE_SIZE * OUTPUT_TILE_SIZE)
+
+
+def _iter_blocks(width, height, size):
+    for row_off in range(0, height, size):
+        for col_off in range(0, width, size):
+            yield Window(col_off, row_off, min(size, width - col_off), min(size, height - row_off))
+
+
+@contextmanager
+def _thread_local_datasets(paths):
+    """Yield a function getting datasets of ``paths`` opened once per thread.
+
+    Dataset handles cannot be shared across threads.
+
+    """
+    local = threading.local()
+    opened = []
+    lock = threading.Lock()
+
+    def get_datasets():
+        if not hasattr(local, 'datasets'):
+            local.datasets = [rasterio.open(path) for path in paths]
+            with lock:
+                opened.extend(local.datasets)
+        return local.datasets
+
+    try:
+        yield get_datasets
+    finally:
+        for dataset in opened:
+            dataset.close()
+
+
+def _write_blocks(dst, windows, read_block, threads, progress=None):
+    """Write the data of each window, computed by ``read_block``, to an open dataset.
+
+    Blocks are computed on up to ``threads`` threads and written in this
+    thread as they complete, so only ``threads`` blocks are held at a time.
+    ``progress`` is called with the fraction of the blocks written.
+
+    """
+    windows = list(windows)
+    written = 0
+
+    def write(data, window):
+        nonlocal written
+        dst.write(data, window=window)
+        written += 1
+        if progress is not None:
+            progress(written / len(windows))
+
+    if threads <= 1:
+        for window in windows:
+            write(read_block(window), window)
+        return
+
+    def read(window):
+        return window, read_block(window)
+
+    windows = iter(windows)
+    running = set()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        while True:
+            while len(running) < threads:
+                window = next(windows, None)
+                if window is None:
+                    break
+                running.add(executor.submit(read, window))
+            if not running:
+                break
+            finished, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                window, data = future.result()
+                write(data, window)
+
+
+@contextmanager
+def _open_tiled_output(output_path, profile):
+    """Open a tiled GeoTIFF to write blocks to, converted to a COG when closed."""
+    tiles_path = output_path + '.tiles.tif'
+    profile = profile.copy()
+    profile.update(
+        {
+            'driver': 'GTiff',
+            'tiled': True,
+            'blockxsize': OUTPUT_TILE_SIZE,
+            'blockysize': OUTPUT_TILE_SIZE,
+            'compress': 'deflate',
+            'BIGTIFF': 'IF_SAFER',
+        }
+    )
+    with rasterio.open(tiles_path, 'w', **profile) as dst:
+        yield dst
+    # GDAL streams the tiles into the COG and builds its overviews
+    rasterio.shutil.copy(tiles_path, output_path, driver='COG', compress='deflate')
+    os.remove(tiles_path)
+
+
+def _write_in_blocks(input_paths, output_path, profile, read_block, copies=2, progress=None):
+    """Write a COG one block at a time.
+
+    The data of each block is computed by ``read_block(datasets, window)``
+    from the datasets of ``input_paths``. ``copies`` is the number of copies
+    of a block held in memory while it is computed and written. ``progress``
+    is called with the fraction of the blocks written.
+
+    """
+    threads = _get_processing_threads()
+    bytes_per_pixel = copies * profile['count'] * np.dtype(profile['dtype']).itemsize
+    size = _get_block_size(bytes_per_pixel, threads)
+    blocks = _iter_blocks(profile['width'], profile['height'], size)
+    with _thread_local_datasets(input_paths) as get_datasets, _open_tiled_output(
+        output_path, profile
+    ) as dst:
+        _write_blocks(
+            dst, blocks, lambda window: read_block(get_datasets(), window), threads, progress
+        )
+
 
 @contextmanager
 def _processed_image_helper(param_model, single_input=False):
     # yields the source image object and the processed image file object
-    if param_model.processed_image:
-        param_model.processed_image.file.delete()
+    param_model.release_processed_image()
     file = ChecksumFile()
 
-    time.sleep(3)  # HACK to avoid race condition in #647
-    param_model.refresh_from_db()
-
-    if single_input:
-        if param_model.source_images.count() != 1:
-            raise RuntimeError(
-                f'There must be one and only one source image. {param_model.source_images.count()} were given.'
-            )
-        yield (param_model.source_images.first(), file)
-    else:
-        yield (param_model.source_images.all(), file)
+    stats = {}
+    with _track_peak_rss(stats):
+        if single_input:
+            if param_model.source_images.count() != 1:
+                raise RuntimeError(
+                    f'There must be one and only one source image. {param_model.source_images.count()} were given.'
+                )
+            yield (param_model.source_images.first(), file)
+        else:
+            yield (param_model.source_images.all(), file)
+    param_model.peak_rss = stats['peak_rss']
 
     file.save()
 
@@ -50,7 +222,70 @@ def _processed_image_helper(param_model, single_input=False):
         ]
     )
 
-    logger.debug(f'Produced ProcessedImage in ChecksumFile: {param_model.processed_image.file.id}')
+    logger.debug(
+        f'Produced ProcessedImage in ChecksumFile: {param_model.processed_image.file.id} '
+        f'(peak RSS: {param_model.peak_rss} bytes)'
+    )
+
+
+# Options of COG conversions in the parameters of their ``ProcessedImageGroup``
+COG_OPTIONS = {
+    'compression',  # e.g. 'deflate' (default), 'lzw', 'zstd', 'jpeg', 'webp' or 'none'
+    'quality',  # JPEG/WEBP quality
+    'level',  # DEFLATE/ZSTD level
+    'predictor',  # e.g. 2 (horizontal) or 3 (floating point)
+    'blocksize',  # Side of the tiles
+    'overview_resampling',  # e.g. 'nearest' or 'average'
+    'overview_count',
+}
+
+
+def _convert_to_cog(input_path, output_path, options=None, threads=None):
+    """Convert an image to a Cloud Optimized GeoTIFF.
+
+    Geospatial rasters are converted by the GDAL COG driver, which supports
+    all of ``COG_OPTIONS``. Other images are converted by
+    ``large_image_converter``, which ignores the overview options.
+
+    """
+    options = dict(options or {})
+    unknown = set(options) - COG_OPTIONS
+    if unknown:
+        raise ValueError(f'Unknown COG options: {sorted(unknown)}')
+    if threads is None:
+        threads = _get_processing_threads()
+
+    try:
+        with rasterio.open(input_path) as src:
+            geospatial = src.crs is not None
+    except rasterio.errors.RasterioIOError:
+        geospatial = False
+
+    if geospatial:
+        creation_options = {
+            'compress': options.pop('compression', 'deflate'),
+            'num_threads': threads,
+            'bigtiff': 'IF_SAFER',
+        }
+        creation_options.update(options)
+        rasterio.shutil.copy(
+            str(input_path),
+            str(output_path),
+            driver='COG',
+            **{key.upper(): str(value).upper() for key, value in creation_options.items()},
+        )
+    else:
+        kwargs = {
+            'tileSize': options.pop('blocksize', None),
+            'compression': options.pop('compression', None),
+            'quality': options.pop('quality', None),
+            'level': options.pop('level', None),
+            'predictor': options.pop('predictor', None),
+        }
+        kwargs = {key: value for key, value in kwargs.items() if value is not None}
+        large_image_converter.convert(
+            str(input_path), str(output_path), _concurrency=threads, **kwargs
+        )
 
 
 def convert_to_cog(param_model):
@@ -61,89 +296,162 @@ def convert_to_cog(param_model):
             input_path,
             output_path,
         ):
-            large_image_converter.convert(str(input_path), str(output_path))
+            _convert_to_cog(input_path, output_path, param_model.group.parameters)
 
 
-def extract_region(processed_image):
-    parameters = processed_image.group.parameters
-    sample_type = parameters['sample_type']
-    logger.debug(f'Subsample parameters: {parameters}')
+class SampleTypes:
+    PIXEL_BOX = 'pixel box'
+    GEO_BOX = 'geographic box'
+    GEOJSON = 'geojson'
+    ANNOTATION = 'annotation'
 
-    class SampleTypes:
-        PIXEL_BOX = 'pixel box'
-        GEO_BOX = 'geographic box'
-        GEOJSON = 'geojson'
-        ANNOTATION = 'annotation'
 
-    def get_extent():
-        """Convert ``parameters`` to length 4 tuple of XY extents.
+def get_region_extent(parameters):
+    """Convert region ``parameters`` to length 4 tuple of XY extents.
 
-        Note
-        ----
-        A ``KeyError`` could be raised if the sample parameters are illformed.
+    Note
+    ----
+    A ``KeyError`` could be raised if the sample parameters are illformed.
 
-        Return
-        ------
-        extents, projection: <left, right, bottom, top>, <projection>
+    Return
+    ------
+    extents, projection: <left, right, bottom, top>, <projection>
 
-        """
-        p = parameters
+    """
+    p = parameters
+    sample_type = p['sample_type']
 
-        projection = p.get('projection', None)
-        if sample_type in (
-            SampleTypes.PIXEL_BOX,
-            SampleTypes.ANNOTATION,
-        ):
-            projection = 'pixels'
-        elif (
-            sample_type
-            in (
-                SampleTypes.GEO_BOX,
-                SampleTypes.GEOJSON,
+    projection = p.get('projection', None)
+    if sample_type in (
+        SampleTypes.PIXEL_BOX,
+        SampleTypes.ANNOTATION,
+    ):
+        projection = 'pixels'
+    elif (
+        sample_type
+        in (
+            SampleTypes.GEO_BOX,
+            SampleTypes.GEOJSON,
+        )
+        and projection is None
+    ):
+        logger.info('No projection given, defaulting to: EPSG:4326')
+        projection = 'EPSG:4326'
+
+    if sample_type in (
+        SampleTypes.GEO_BOX,
+        SampleTypes.PIXEL_BOX,
+    ):
+        return p['left'], p['right'], p['bottom'], p['top'], projection
+    elif sample_type == SampleTypes.GEOJSON:
+        # Convert GeoJSON to extents
+        geom = shape(p)
+        feature = GEOSGeometry(memoryview(dumps(geom)))
+        l, b, r, t = feature.extent  # (xmin, ymin, xmax, ymax)
+        return l, r, b, t, projection
+    elif sample_type == SampleTypes.ANNOTATION:
+        ann_id = p['id']
+        ann = Annotation.objects.get(id=ann_id)
+        l, b, r, t = ann.segmentation.outline.extent  # (xmin, ymin, xmax, ymax)
+        return l, r, b, t, projection
+    else:
+        raise ValueError('Sample type ({}) unknown.'.format(sample_type))
+
+
+def read_region(file_path, parameters, encoding=None, max_pixels=None):
+    """Read a region of the image at ``file_path`` from its tile source.
+
+    Parameters
+    ----------
+    encoding : str
+        The encoding of the region, a GeoTIFF by default.
+
+    max_pixels : int
+        Raise a ``ValueError`` if the region is larger, before reading it.
+
+    Return
+    ------
+    path, mime_type: the path of a temporary file of the region and its MIME type
+
+    """
+    l, r, b, t, projection = get_region_extent(parameters)
+    logger.debug(f'The extent: {l, r, b, t}')
+    if projection == 'pixels':
+        tile_source = large_image_utilities.get_tilesource_from_path(file_path)
+    else:
+        tile_source = large_image_utilities.get_tilesource_from_path(
+            file_path, projection=REGION_PROJECTION
+        )
+        # Transform the extent once with a cached transformer, rather than
+        #  letting large_image create one for each conversion of the region
+        l, b, r, t = reproject.transform_bounds(projection, REGION_PROJECTION, l, b, r, t)
+        projection = REGION_PROJECTION
+    if max_pixels is not None:
+        size = tile_source.convertRegionScale(
+            {'left': l, 'right': r, 'bottom': b, 'top': t, 'units': projection},
+            targetUnits='base_pixels',
+        )
+        if size['width'] * size['height'] > max_pixels:
+            raise ValueError(
+                f'The region of {size["width"]}x{size["height"]} pixels is larger '
+                f'than the limit of {max_pixels} pixels.'
             )
-            and projection is None
-        ):
-            logger.info('No projection given, defaulting to: EPSG:4326')
-            projection = 'EPSG:4326'
+    return get_region(tile_source, l, r, b, t, units=projection, encoding=encoding)
 
-        if sample_type in (
-            SampleTypes.GEO_BOX,
-            SampleTypes.PIXEL_BOX,
-        ):
-            return p['left'], p['right'], p['bottom'], p['top'], projection
-        elif sample_type == SampleTypes.GEOJSON:
-            # Convert GeoJSON to extents
-            geom = shape(p)
-            feature = GEOSGeometry(memoryview(dumps(geom)))
-            l, b, r, t = feature.extent  # (xmin, ymin, xmax, ymax)
-            return l, r, b, t, projection
-        elif sample_type == SampleTypes.ANNOTATION:
-            ann_id = p['id']
-            ann = Annotation.objects.get(id=ann_id)
-            l, b, r, t = ann.segmentation.outline.extent  # (xmin, ymin, xmax, ymax)
-            return l, r, b, t, projection
-        else:
-            raise ValueError('Sample type ({}) unknown.'.format(sample_type))
 
-    l, r, b, t, projection = get_extent()
+def _extract_region(input_path, output_path, parameters):
+    path, mime_type = read_region(input_path, parameters)
+    shutil.move(path, output_path)
+
+
+def extract_region(processed_image):
+    parameters = processed_image.group.parameters
+    logger.debug(f'Subsample parameters: {parameters}')
 
     with _processed_image_helper(processed_image, single_input=True) as (image, output):
         filename = f'region-{image.file.name}'
-        with output_path_helper(filename, output) as output_path:
-            logger.debug(f'The extent: {l, r, b, t}')
-            if sample_type in (
-                SampleTypes.GEOJSON,
-                SampleTypes.GEO_BOX,
-            ):
-                tile_source = large_image_utilities.get_tilesource_from_image(
-                    image, projection='EPSG:3857'
-                )
-                path, mime_type = get_region(tile_source, l, r, b, t, units=projection)
-            else:
-                tile_source = large_image_utilities.get_tilesource_from_image(image)
-                path, mime_type = get_region(tile_source, l, r, b, t, units='pixels')
-            with open(path, 'rb') as f, open(output_path, 'wb') as o:
-                o.write(f.read())
+        with large_image_utilities.yield_image_local_path(image) as input_path, output_path_helper(
+            filename, output
+        ) as output_path:
+            _extract_region(input_path, output_path, parameters)
+
+
+def _resample(input_path, output_path, factor, progress=None):
+    with rasterio.open(input_path) as dataset:
+        count = dataset.count
+        height = int(dataset.height * factor)
+        width = int(dataset.width * factor)
+
+        # scale image transform
+        transform = dataset.transform * dataset.transform.scale(
+            (dataset.width / width), (dataset.height / height)
+        )
+
+        profile = dataset.meta.copy()
+        profile.update(
+            {
+                'height': height,
+                'width': width,
+                'transform': transform,
+            }
+        )
+
+    def read_block(datasets, window):
+        (src,) = datasets
+        # The window of the source covering this block of the output
+        src_window = Window(
+            window.col_off / factor,
+            window.row_off / factor,
+            window.width / factor,
+            window.height / factor,
+        )
+        return src.read(
+            window=src_window,
+            out_shape=(count, window.height, window.width),
+            resampling=Resampling.bilinear,
+        )
+
+    _write_in_blocks([str(input_path)], output_path, profile, read_block, progress=progress)
 
 
 def resample_image(processed_image):
@@ -159,75 +467,150 @@ def resample_image(processed_image):
             input_path,
             output_path,
         ):
+            _resample(input_path, output_path, factor, progress=processed_image.set_progress)
+
+
+def _mosaic(paths, output_path, progress=None):
+    # The output grid is the one `rasterio.merge.merge` would use
+    bounds = []
+    for path in paths:
+        with rasterio.open(path) as src:
+            bounds.append(src.bounds)
+    with rasterio.open(paths[0]) as first:
+        res = first.res
+        nodata = first.nodata
+        profile = first.meta.copy()
+    left = min(b.left for b in bounds)
+    bottom = min(b.bottom for b in bounds)
+    right = max(b.right for b in bounds)
+    top = max(b.top for b in bounds)
+    width = int(round((right - left) / res[0]))
+    height = int(round((top - bottom) / res[1]))
+    transform = Affine.translation(left, top) * Affine.scale(res[0], -res[1])
+
+    # Update the metadata
+    profile.update(
+        {
+            'height': height,
+            'width': width,
+            'transform': transform,
+        }
+    )
 
-            with rasterio.open(input_path) as dataset:
-
-                # resample data to target shape
-                data = dataset.read(
-                    out_shape=(
-                        dataset.count,
-                        int(dataset.height * factor),
-                        int(dataset.width * factor),
-                    ),
-                    resampling=Resampling.bilinear,
-                )
-
-                # scale image transform
-                transform = dataset.transform * dataset.transform.scale(
-                    (dataset.width / data.shape[-1]), (dataset.height / data.shape[-2])
-                )
+    def read_block(datasets, window):
+        block, _ = merge(
+            datasets,
+            bounds=rasterio.windows.bounds(window, transform),
+            res=res,
+            nodata=nodata,
+        )
+        return block[:, : window.height, : window.width]
+
+    # The merged block, the block read from a source and the block being written
+    _write_in_blocks(
+        [str(path) for path in paths],
+        output_path,
+        profile,
+        read_block,
+        copies=3,
+        progress=progress,
+    )
 
-                out_meta = dataset.meta.copy()
 
-                # Update the metadata
-                out_meta.update(
-                    {
-                        'driver': 'GTiff',
-                        'height': data.shape[1],
-                        'width': data.shape[2],
-                        'transform': transform,
-                    }
-                )
+def mosaic_images(processed_image):
+    with _processed_image_helper(processed_image) as (images, output), ExitStack() as stack:
+        # Keep every source on disk until the mosaic is written
+        paths = [
+            stack.enter_context(large_image_utilities.yield_image_local_path(image))
+            for image in images
+        ]
 
-                with rasterio.open(output_path, 'w', **out_meta) as dest:
-                    dest.write(data)
+        with output_path_helper('mosaic.tif', output) as output_path:
+            _mosaic(paths, output_path, progress=processed_image.set_progress)
 
 
-def mosaic_images(processed_image):
+def virtual_mosaic_images(processed_image):
+    """Mosaic images into a VRT referencing them, without copying their pixels."""
     with _processed_image_helper(processed_image) as (images, output):
+        with output_path_helper('mosaic.vrt', output) as output_path:
+            vrt.build_virtual_mosaic([image.file for image in images], output_path)
 
-        src_files_to_mosaic = []
-        for image in images:
-            with image.file.yield_local_path(yield_file_set=True) as file_path:
-                src_files_to_mosaic.append(rasterio.open(file_path))
 
-        with output_path_helper('mosaic.tif', output) as output_path:
-            mosaic, out_trans = merge(src_files_to_mosaic)
-            out_meta = src_files_to_mosaic[0].meta.copy()
-
-            # Update the metadata
-            out_meta.update(
-                {
-                    'driver': 'GTiff',
-                    'height': mosaic.shape[1],
-                    'width': mosaic.shape[2],
-                    'transform': out_trans,
-                }
-            )
+def materialize_virtual_mosaic(processed_image):
+    """Replace the VRT of a virtual mosaic with a COG of its pixels."""
+    if not isinstance(processed_image, ProcessedImage):
+        processed_image = ProcessedImage.objects.get(pk=processed_image)
+    image = processed_image.processed_image
+    if image is None or not vrt.is_virtual(image.file):
+        raise ValueError(f'ProcessedImage {processed_image.pk} has no VRT to materialize.')
+
+    output = ChecksumFile()
+    stats = {}
+    with _track_peak_rss(stats), large_image_utilities.yield_image_local_path(
+        image
+    ) as input_path, output_path_helper('mosaic.tif', output) as output_path:
+        with rasterio.open(input_path) as src:
+            profile = src.meta.copy()
+
+        def read_block(datasets, window):
+            (src,) = datasets
+            return src.read(window=window)
+
+        _write_in_blocks(
+            [str(input_path)],
+            output_path,
+            profile,
+            read_block,
+            progress=processed_image.set_progress,
+        )
+    processed_image.peak_rss = stats['peak_rss']
+    output.save()
 
-            with rasterio.open(output_path, 'w', **out_meta) as dest:
-                dest.write(mosaic)
+    vrt_file = image.file
+    image.file = output
+    image.save()
+    vrt_file.delete()
+    logger.debug(f'Materialized virtual mosaic into ChecksumFile: {output.id}')
 
 
 def run_processed_image(processed_image):
     if not isinstance(processed_image, ProcessedImage):
         processed_image = ProcessedImage.objects.get(pk=processed_image)
 
+    fingerprint = processed_image.compute_fingerprint()
+    if fingerprint:
+        if processed_image.fingerprint == fingerprint and processed_image.processed_image:
+            logger.debug(f'ProcessedImage {processed_image.pk} is up to date.')
+            return
+        # Reuse the product of identical processing instead of recomputing it
+        match = (
+            ProcessedImage.objects.filter(
+                fingerprint=fingerprint,
+                status=Status.SUCCEEDED,
+                processed_image__isnull=False,
+            )
+            .exclude(pk=processed_image.pk)
+            .first()
+        )
+        if match is not None:
+            processed_image.release_processed_image()
+            processed_image.processed_image = match.processed_image
+            processed_image.fingerprint = fingerprint
+            processed_image.save(update_fields=['processed_image', 'fingerprint'])
+            logger.debug(f'Reused the product of ProcessedImage {match.pk}.')
+            return
+
+    from rgd_imagery.tasks.pipeline import run_pipeline
+
     methods = {
         ProcessedImageGroup.ProcessTypes.COG: convert_to_cog,
         ProcessedImageGroup.ProcessTypes.REGION: extract_region,
         ProcessedImageGroup.ProcessTypes.RESAMPLE: resample_image,
         ProcessedImageGroup.ProcessTypes.ARBITRARY: lambda *args: None,
         ProcessedImageGroup.ProcessTypes.MOSAIC: mosaic_images,
+        ProcessedImageGroup.ProcessTypes.VIRTUAL_MOSAIC: virtual_mosaic_images,
+        ProcessedImageGroup.ProcessTypes.PIPELINE: run_pipeline,
     }
-    return methods[processed_image.group.process_type](processed_image)
+    methods[processed_image.group.process_type](processed_image)
+    processed_image.fingerprint = fingerprint
+    processed_image.save(update_fields=['fingerprint'])
@@ -0,0 +1,154 @@
+"""Virtual mosaics: GDAL VRTs referencing the files of other images.
+
+The VRT of a virtual mosaic does not store the paths of its sources, which
+are only valid on the worker that built it. Each source is referenced by the
+primary key of its ``ChecksumFile`` and resolved to a local path when read.
+Files are only treated as virtual mosaics if their VRT references sources
+this way: other VRTs are read as they are.
+
+As any file can be uploaded as a VRT, its sources are only resolved for the
+VRT of a virtual mosaic ``ProcessedImage`` that references the files of its
+source images, and only if the requesting user can read all of them.
+
+"""
+from contextlib import ExitStack, contextmanager
+from functools import lru_cache
+import hashlib
+import os
+from pathlib import Path
+import tempfile
+from typing import Iterable, List, Tuple
+from xml.etree import ElementTree
+
+from crum import get_current_user
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.core.exceptions import PermissionDenied
+from osgeo import gdal
+from rgd.models import ChecksumFile
+from rgd.permissions import filter_read_perm
+
+SOURCE_PREFIX = 'rgd-checksumfile:'
+
+
+def is_virtual(file: ChecksumFile) -> bool:
+    """Whether a file is a virtual mosaic written by ``build_virtual_mosaic``."""
+    return file.name.lower().endswith('.vrt') and bool(
+        _read_source_file_ids(file.pk, file.modified)
+    )
+
+
+def _iter_source_elements(tree: ElementTree.ElementTree):
+    for element in tree.iter('SourceFilename'):
+        if element.text and element.text.startswith(SOURCE_PREFIX):
+            yield element
+
+
+def get_source_file_ids(tree: ElementTree.ElementTree) -> List[int]:
+    return sorted({int(e.text[len(SOURCE_PREFIX) :]) for e in _iter_source_elements(tree)})
+
+
+def _read_vrt(file: ChecksumFile) -> ElementTree.ElementTree:
+    with file.yield_local_path() as vrt_path:
+        return ElementTree.parse(vrt_path)
+
+
+@lru_cache(maxsize=1024)
+def _read_source_file_ids(file_pk: int, modified) -> Tuple[int, ...]:
+    # Keyed by the modification time as the file of a ChecksumFile may be replaced
+    try:
+        tree = _read_vrt(ChecksumFile.objects.get(pk=file_pk))
+    except ElementTree.ParseError:
+        return ()
+    return tuple(get_source_file_ids(tree))
+
+
+def build_vrt(paths: Iterable[str], output_path: str):
+    """Write a VRT mosaicking the local files at ``paths`` to ``output_path``."""
+    vrt = gdal.BuildVRT(str(output_path), [str(path) for path in paths])
+    if vrt is None:
+        raise RuntimeError(f'Failed to build VRT: {gdal.GetLastErrorMsg()}')
+    # Flush to disk
+    vrt = None
+
+
+def build_virtual_mosaic(files: Iterable[ChecksumFile], output_path: str):
+    """Write a VRT mosaicking the files to ``output_path``.
+
+    Pixels are not copied: later sources are drawn over earlier ones when
+    the VRT is read, as with ``rasterio.merge.merge``.
+
+    """
+    with ExitStack() as stack:
+        sources = {}
+        for file in files:
+            path = stack.enter_context(file.yield_local_path(yield_file_set=True))
+            sources[os.path.abspath(path)] = file
+        build_vrt(list(sources), output_path)
+
+    tree = ElementTree.parse(output_path)
+    for element in tree.iter('SourceFilename'):
+        path = element.text
+        if element.get('relativeToVRT') == '1':
+            path = os.path.join(os.path.dirname(output_path), path)
+        element.text = f'{SOURCE_PREFIX}{sources[os.path.abspath(path)].pk}'
+        element.set('relativeToVRT', '0')
+    tree.write(output_path)
+
+
+def _is_virtual_mosaic_product(file: ChecksumFile, source_ids: Tuple[int, ...]) -> bool:
+    """Whether a VRT is the product of a virtual mosaic of the files it references."""
+    from rgd_imagery.models import ProcessedImage, ProcessedImageGroup
+
+    products = ProcessedImage.objects.filter(
+        processed_image__file=file,
+        group__process_type=ProcessedImageGroup.ProcessTypes.VIRTUAL_MOSAIC,
+    ).annotate(source_file_ids=ArrayAgg('source_images__file_id', distinct=True))
+    return any(
+        sorted(product.source_file_ids) == list(source_ids) for product in products.only('pk')
+    )
+
+
+@contextmanager
+def yield_resolved_local_path(file: ChecksumFile, user=None):
+    """Yield a local path of a VRT with its sources resolved to local paths.
+
+    The sources remain available for as long as they would with
+    ``ChecksumFile.yield_local_path``. Only the windows of the sources that
+    are read are fetched for files available through FUSE.
+
+    Raises ``PermissionDenied`` if the VRT is not the product of a virtual
+    mosaic of its sources, or if ``user`` (by default the user of the current
+    request) cannot read all of them.
+
+    """
+    source_ids = _read_source_file_ids(file.pk, file.modified)
+    if not _is_virtual_mosaic_product(file, source_ids):
+        raise PermissionDenied(f'VRT {file.pk} is not a virtual mosaic of the files it references.')
+    sources = ChecksumFile.objects.filter(pk__in=source_ids)
+    # Outside of requests, e.g. in tasks, there is no user to check
+    user = user or get_current_user()
+    readable = set(filter_read_perm(user, sources).values_list('pk', flat=True))
+    if readable != set(source_ids):
+        raise PermissionDenied(f'The sources of VRT {file.pk} are not all readable.')
+    with ExitStack() as stack:
+        paths = {
+            source.pk: str(stack.enter_context(source.yield_local_path(yield_file_set=True)))
+            for source in sources
+        }
+        # The resolved VRT is reused for as long as the VRT and the local paths of
+        #  its sources do not change, rather than rewritten for every read
+        key = hashlib.sha1(
+            repr((file.modified.isoformat(), sorted(paths.items()))).encode()
+        ).hexdigest()
+        # The VRT may be on a read-only FUSE mount: write it to the cache
+        directory = Path(file.get_cache_path(root=True))
+        resolved_path = directory / f'resolved-{file.pk}-{key[:16]}.vrt'
+        if not resolved_path.exists():
+            tree = _read_vrt(file)
+            for element in _iter_source_elements(tree):
+                element.text = paths[int(element.text[len(SOURCE_PREFIX) :])]
+            # Write atomically as concurrent readers may resolve the same VRT
+            with tempfile.NamedTemporaryFile(dir=directory, suffix='.vrt', delete=False) as f:
+                tree.write(f)
+            os.replace(f.name, resolved_path)
+        yield resolved_path
@@ -53,6 +53,7 @@ setup(
         'large-image-source-pil>=1.15',
         'large-image-source-tiff>=1.15',
         'numpy',
+        'pyproj>=3.1',
         'pyvips',
         'shapely',
         'tifftools>=1.2.0',
@@ -2,6 +2,7 @@ from io import StringIO
 
 from django.core.management import call_command
 import pytest
+from rgd_imagery.management.commands import _data_helper as helper
 
 # from rgd_imagery.management.commands import demo_data
 
@@ -23,3 +24,32 @@ def _call_command(name, *args, **kwargs):
 def test_demo_command_landsat():
     out = _call_command('s3_landsat', count=1)
     assert out  # == demo_data.SUCCESS_MSG.replace('demo', 'landsat') + '\n'
+
+
+@pytest.mark.django_db(transaction=True)
+def test_bulk_load_raster_files_checkpoint(tmp_path):
+    rasters = [helper.make_raster_dict(['landcover_sample_2000.tif'], name='landcover')]
+    checkpoint = str(tmp_path / 'checkpoint.txt')
+    summary = helper.bulk_load_raster_files(rasters, checkpoint=checkpoint)
+    assert len(summary['ids']) == 1
+    assert summary['failed'] == 0
+    # Resuming skips the rasters recorded in the checkpoint
+    summary = helper.bulk_load_raster_files(rasters, checkpoint=checkpoint)
+    assert summary['ids'] == []
+    assert summary['skipped'] == 1
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+@pytest.mark.django_db(transaction=True)
+def test_bulk_load_raster_files_failures(tmp_path, workers):
+    rasters = [
+        helper.make_raster_dict(['landcover_sample_2000.tif'], name='landcover'),
+        helper.make_raster_dict(['missing.tif'], name='missing'),
+    ]
+    checkpoint = str(tmp_path / 'checkpoint.txt')
+    summary = helper.bulk_load_raster_files(rasters, workers=workers, checkpoint=checkpoint)
+    # A failed raster is counted and left out of the checkpoint to be retried
+    assert len(summary['ids']) == 1
+    assert summary['failed'] == 1
+    with open(checkpoint) as f:
+        assert f.read().split() == ['landcover']
@@ -1,9 +1,14 @@
+from unittest import mock
+
 from django_large_image.tilesource import is_geospatial
 import pytest
+import rasterio
+from rasterio.windows import Window
 from rgd.datastore import datastore
 from rgd.models import ChecksumFile, FileSet, FileSourceType
-from rgd_imagery import large_image_utilities
-from rgd_imagery.tasks.etl import load_image, populate_raster_footprint
+from rgd_imagery import large_image_utilities, models, reproject
+from rgd_imagery.tasks.etl import ingest_raster, load_image, populate_raster_footprint
+from rgd_imagery.tasks.jobs import task_populate_raster_footprint
 
 from . import factories
 
@@ -82,6 +87,22 @@ def test_repopulate_image_entry():
     load_image(imagefile.id)
 
 
+@pytest.mark.django_db(transaction=True)
+def test_reload_image_keeps_band_meta():
+    imagefile = factories.ImageFactory(
+        file__file__filename='landcover_sample_2000.tif',
+        file__file__from_path=datastore.fetch('landcover_sample_2000.tif'),
+    )
+    band = imagefile.bandmeta_set.get()
+    band.description = 'User supplied'
+    band.save(update_fields=['description'])
+    # Reprocessing updates bands in place rather than re-creating them
+    load_image(imagefile.id)
+    reloaded = imagefile.bandmeta_set.get()
+    assert reloaded.pk == band.pk
+    assert reloaded.description == 'User supplied'
+
+
 @pytest.mark.django_db(transaction=True)
 def test_multi_file_raster(sample_raster_multi):
     """Test the use case where a raster is generated from multiple files."""
@@ -105,6 +126,58 @@ def test_raster_footprint(name):
     assert meta.footprint != meta.outline
 
 
+@pytest.mark.django_db(transaction=True)
+def test_raster_footprint_failure_keeps_status():
+    raster = _make_raster_from_datastore('landcover_sample_2000.tif')
+    raster.refresh_from_db()
+    status = raster.status
+    with mock.patch(
+        'rgd_imagery.tasks.etl.populate_raster_footprint', side_effect=ValueError('failed')
+    ):
+        task_populate_raster_footprint(raster.pk)
+    raster.refresh_from_db()
+    # The failure is logged and the raster keeps its outline and status
+    assert raster.status == status
+
+
+def test_reproject_reuses_warp_grid():
+    path = datastore.fetch('landcover_sample_2000.tif')
+    reproject._get_warp_grid.cache_clear()
+    with rasterio.open(path) as src:
+        with reproject.warped_vrt(src, 'EPSG:4326') as vrt:
+            first = vrt.read(window=Window(0, 0, 64, 64))
+        with reproject.warped_vrt(src, 'EPSG:4326') as vrt:
+            assert (vrt.read(window=Window(0, 0, 64, 64)) == first).all()
+            assert vrt.count == src.count
+    assert reproject._get_warp_grid.cache_info().hits == 1
+    assert reproject.get_transformer('EPSG:4326', 'EPSG:3857') is reproject.get_transformer(
+        'EPSG:4326', 'EPSG:3857'
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_raster_footprint_refined_after_ingest():
+    raster = _make_raster_from_datastore('landcover_sample_2000.tif')
+    raster.refresh_from_db()
+    # The footprint task is chained after ingest and upgrades the entry in place
+    meta = raster.rastermeta
+    assert meta.footprint != meta.outline
+    assert meta.envelope.equals(meta.footprint.envelope)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_ingest_raster_single_pass():
+    raster = _make_raster_from_datastore('landcover_sample_2000.tif')
+    timings = ingest_raster(raster.id, footprint=True)
+    assert {'open', 'image_meta', 'raster_meta', 'footprint', 'write'} <= set(timings)
+    raster.refresh_from_db()
+    meta = raster.rastermeta
+    assert meta.footprint != meta.outline
+    image = raster.image_set.images.first()
+    assert image.imagemeta.width > 0
+    assert image.bandmeta_set.count() == 1
+
+
 @pytest.mark.django_db(transaction=True)
 def test_raster_with_header_file():
     # Download the two files for the image: envi_rgbsmall_bip
@@ -135,3 +208,40 @@ def test_raster_with_header_file():
 def test_non_geo_envi(non_geo_envi_image):
     with large_image_utilities.yeild_tilesource_from_image(non_geo_envi_image) as source:
         assert not is_geospatial(source)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_get_or_create_image_set_signature():
+    images = [factories.ImageFactory(), factories.ImageFactory()]
+    pks = [image.pk for image in images]
+    image_set, created = models.get_or_create_image_set(pks)
+    assert created
+    assert image_set.signature == models.ImageSet.compute_signature(pks)
+    # The same images in any order resolve to the same set
+    assert models.get_or_create_image_set(pks[::-1]) == (image_set, False)
+    # A subset is a different set
+    subset, created = models.get_or_create_image_set(pks[:1])
+    assert created
+    assert subset != image_set
+    # Changing the images of a set keeps its signature in sync
+    image_set.images.remove(images[1])
+    image_set.refresh_from_db()
+    assert image_set.signature is None  # `subset` is already canonical for `pks[:1]`
+    subset.delete()
+    image_set.images.add(images[1])
+    image_set.refresh_from_db()
+    assert image_set.signature == models.ImageSet.compute_signature(pks)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_processed_image_lineage():
+    a, b, c, d = (factories.ImageFactory() for _ in range(4))
+    group = models.ProcessedImageGroup.objects.create()
+    for source, result in ((a, b), (b, c)):
+        processed = models.ProcessedImage.objects.create(group=group, processed_image=result)
+        processed.source_images.add(source)
+    image_set, _ = models.get_or_create_image_set([a.pk, d.pk])
+    assert set(a.processed_images) == {b, c}
+    assert set(b.get_processed_images()) == {c}
+    assert list(image_set.processed_images) == [b, c]
+    assert list(image_set.all_images) == [a, b, c, d]
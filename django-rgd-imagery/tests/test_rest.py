@@ -1,11 +1,16 @@
+import datetime
+import io
 import time
+from unittest import mock
 
+import numpy as np
 import pytest
 import requests
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.test import RequestsClient
 from rgd.datastore import datastore
+from rgd.models.mixins import Status
 from rgd_imagery import models
 
 from . import factories
@@ -134,3 +139,139 @@ def test_tiles_endpoint_with_signature(admin_api_client, live_server, settings):
     with pytest.raises(requests.HTTPError):
         response.raise_for_status()
     assert response.status_code == 401
+
+
+@pytest.mark.django_db(transaction=True)
+def test_stream_image_region(admin_api_client, elevation, settings):
+    payload = {'sample_type': 'pixel box', 'left': 0, 'right': 10, 'bottom': 0, 'top': 10}
+    response = admin_api_client.post(
+        f'/api/rgd_imagery/{elevation.pk}/region', payload, format='json'
+    )
+    assert response.status_code == 200
+    assert response['Content-Type'] == 'image/tiff'
+    response = admin_api_client.post(
+        f'/api/rgd_imagery/{elevation.pk}/region', {**payload, 'persist': 'false'}, format='json'
+    )
+    assert response.status_code == 200
+    # Nothing is persisted
+    assert not models.ProcessedImage.objects.exists()
+
+    settings.CELERY_TASK_ALWAYS_EAGER = False
+    with mock.patch('rgd_imagery.tasks.jobs.task_run_processed_image.delay') as delay:
+        response = admin_api_client.post(
+            f'/api/rgd_imagery/{elevation.pk}/region', {**payload, 'persist': True}, format='json'
+        )
+    assert response.status_code == 202
+    # The job is queued once, by the product rather than also by its new group
+    delay.assert_called_once_with(response.data['id'])
+    processed = models.ProcessedImage.objects.get(pk=response.data['id'])
+    assert processed.group.process_type == models.ProcessedImageGroup.ProcessTypes.REGION
+    assert list(processed.source_images.all()) == [elevation]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_stream_image_region_limits(admin_api_client, elevation, settings):
+    settings.RGD_REGION_MAX_PIXELS = 10
+    payload = {'sample_type': 'pixel box', 'left': 0, 'right': 10, 'bottom': 0, 'top': 10}
+    response = admin_api_client.post(
+        f'/api/rgd_imagery/{elevation.pk}/region', payload, format='json'
+    )
+    assert response.status_code == 400
+    response = admin_api_client.post(
+        f'/api/rgd_imagery/{elevation.pk}/region', {'sample_type': 'pixel box'}, format='json'
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db(transaction=True)
+def test_processed_image_group_status(admin_api_client, elevation):
+    response = admin_api_client.post(
+        '/api/image_process/group',
+        {'process_type': 'resample', 'parameters': {'sample_factor': 0.5}},
+        format='json',
+    )
+    group_id = response.data['id']
+    response = admin_api_client.post(
+        '/api/image_process',
+        {'source_images': [elevation.id], 'group': group_id},
+        format='json',
+    )
+    assert response.status_code == 201
+    response = admin_api_client.get(f'/api/image_process/group/{group_id}/status')
+    assert response.status_code == 200
+    assert response.data['success'] == 1
+    assert response.data['failed'] == 0
+    assert response.data['progress'] == 1.0
+    # Nothing changes within the wait, so the status is not sent again
+    response = admin_api_client.get(
+        f'/api/image_process/group/{group_id}/status',
+        {'wait': 0.1},
+        HTTP_IF_NONE_MATCH=response['ETag'],
+    )
+    assert response.status_code == 304
+    response = admin_api_client.get(f'/api/image_process/group/{group_id}/status', {'wait': 'inf'})
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db(transaction=True)
+def test_create_processed_images_in_bulk(admin_api_client, elevation):
+    response = admin_api_client.post(
+        '/api/image_process/group',
+        {'process_type': 'resample', 'parameters': {'sample_factor': 0.5}},
+        format='json',
+    )
+    group_id = response.data['id']
+    response = admin_api_client.post(
+        '/api/image_process/bulk',
+        {'group': group_id, 'source_images': [[elevation.id]] * 3},
+        format='json',
+    )
+    assert response.status_code == 201
+    assert len(response.data) == 3
+    processed_images = models.ProcessedImage.objects.filter(group=group_id)
+    assert processed_images.count() == 3
+    for processed_image in processed_images:
+        assert list(processed_image.source_images.all()) == [elevation]
+        assert processed_image.status == Status.SUCCEEDED
+    # Sources are checked before anything is created
+    response = admin_api_client.post(
+        '/api/image_process/bulk',
+        {'group': group_id, 'source_images': [[elevation.id], [-1]]},
+        format='json',
+    )
+    assert response.status_code == 400
+    assert models.ProcessedImage.objects.filter(group=group_id).count() == 3
+
+
+@pytest.mark.django_db(transaction=True)
+def test_raster_cube(admin_api_client, sample_raster_b):
+    sample_raster_b.acquisition_date = datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc)
+    sample_raster_b.save()
+    aoi = 'POLYGON((-76.86 42.39, -76.84 42.39, -76.84 42.41, -76.86 42.41, -76.86 42.39))'
+    response = admin_api_client.get('/api/rgd_imagery/raster/cube', {'q': aoi, 'bands': '1'})
+    assert response.status_code == 200
+    cube = np.load(io.BytesIO(b''.join(response.streaming_content)))
+    assert cube['data'].shape[:2] == (1, 1)
+    assert cube['data'].shape[2:] == (len(cube['y']), len(cube['x']))
+    assert list(cube['raster']) == [sample_raster_b.pk]
+    assert str(cube['time'][0]) == '2020-01-01T00:00:00'
+    # Rasters acquired outside of the dates are not selected
+    response = admin_api_client.get(
+        '/api/rgd_imagery/raster/cube', {'q': aoi, 'acquired_after': '2021-01-01T00:00:00Z'}
+    )
+    assert response.status_code == 400
+    response = admin_api_client.get('/api/rgd_imagery/raster/cube')
+    assert response.status_code == 400
+    # A spatial reference needs a resolution in its units
+    response = admin_api_client.get('/api/rgd_imagery/raster/cube', {'q': aoi, 'crs': 'EPSG:3857'})
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db(transaction=True)
+def test_raster_cube_limits(admin_api_client, sample_raster_b, settings):
+    sample_raster_b.acquisition_date = datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc)
+    sample_raster_b.save()
+    settings.RGD_CUBE_MAX_BYTES = 1
+    aoi = 'POLYGON((-76.86 42.39, -76.84 42.39, -76.84 42.41, -76.86 42.41, -76.86 42.39))'
+    response = admin_api_client.get('/api/rgd_imagery/raster/cube', {'q': aoi, 'bands': '1'})
+    assert response.status_code == 400
@@ -1,9 +1,19 @@
+from unittest import mock
+
+from django.core.exceptions import PermissionDenied
+from django.db import transaction
 from django_large_image.tilesource import get_bounds
 from large_image_source_gdal import GDALFileTileSource
 import pytest
+import rasterio
 from rgd.datastore import datastore
+from rgd.models import CollectionPermission
+from rgd.models.mixins import Status
+from rgd_imagery import large_image_utilities, vrt
 from rgd_imagery.models import ProcessedImage, ProcessedImageGroup
+from rgd_imagery.tasks.jobs import task_materialize_processed_image, task_run_processed_image
 from rgd_imagery.tasks.subsample import extract_region
+from rgd_testing_utils.factories import ChecksumFileFactory
 
 from . import factories
 
@@ -124,3 +134,225 @@ def test_subsample_geojson(elevation):
         tile_source = GDALFileTileSource(str(file_path), projection='EPSG:3857', encoding='PNG')
         new = get_bounds(tile_source)
     _assert_bounds(new, bounds)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_processed_image_waits_for_source_images(elevation, settings):
+    settings.CELERY_TASK_ALWAYS_EAGER = False
+    task = mock.Mock()
+    group = ProcessedImageGroup.objects.create(
+        process_type=ProcessedImageGroup.ProcessTypes.REGION,
+        parameters={'sample_type': 'pixel box', 'left': 0, 'right': 10, 'bottom': 0, 'top': 10},
+    )
+    with mock.patch.object(ProcessedImage, 'task_funcs', (task,)):
+        sub = ProcessedImage.objects.create(group=group)
+        # Not queued until the source images are set
+        task.delay.assert_not_called()
+        sub.source_images.add(elevation)
+        task.delay.assert_called_once_with(sub.pk)
+        # Saving and setting the source images in one transaction queues one job
+        with transaction.atomic():
+            other = ProcessedImage.objects.create(group=group)
+            other.source_images.add(elevation)
+            assert task.delay.call_count == 1
+        assert task.delay.call_args_list == [mock.call(sub.pk), mock.call(other.pk)]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_resample_image_in_blocks(elevation, settings):
+    # Small enough to split the output into several blocks
+    settings.RGD_PROCESSING_MEMORY_LIMIT = 2**20
+    settings.RGD_PROCESSING_THREADS = 2
+    group = ProcessedImageGroup.objects.create(
+        process_type=ProcessedImageGroup.ProcessTypes.RESAMPLE,
+        parameters={'sample_factor': 0.5},
+    )
+    sub = ProcessedImage(group=group)
+    sub.skip_signal = True
+    sub.save()
+    sub.source_images.add(elevation)
+    result = task_run_processed_image(sub.pk)
+    assert result['status'] == Status.SUCCEEDED
+    assert result['peak_rss'] > 0
+    sub.refresh_from_db()
+    with elevation.file.yield_local_path() as path, rasterio.open(path) as src:
+        expected = src.read(
+            out_shape=(src.count, int(src.height * 0.5), int(src.width * 0.5)),
+            resampling=rasterio.enums.Resampling.bilinear,
+        )
+    with sub.processed_image.file.yield_local_path() as path, rasterio.open(path) as dst:
+        assert (dst.read() == expected).all()
+
+
+def _create_virtual_mosaic():
+    names = [
+        'LC08_L1TP_034032_20200429_20200509_01_T1_sr_band1.tif',
+        'LC08_L1TP_034032_20200429_20200509_01_T1_sr_band2.tif',
+    ]
+    images = [
+        factories.ImageFactory(
+            file__file__filename=name,
+            file__file__from_path=datastore.fetch(name),
+        )
+        for name in names
+    ]
+    group = ProcessedImageGroup.objects.create(
+        process_type=ProcessedImageGroup.ProcessTypes.VIRTUAL_MOSAIC,
+    )
+    mosaic = ProcessedImage.objects.create(group=group)
+    mosaic.source_images.set(images)
+    mosaic.refresh_from_db()
+    return mosaic, images
+
+
+@pytest.mark.django_db(transaction=True)
+def test_virtual_mosaic():
+    mosaic, images = _create_virtual_mosaic()
+    assert mosaic.status == Status.SUCCEEDED
+    # Only the VRT is stored
+    assert mosaic.processed_image.file.name.endswith('.vrt')
+    assert vrt.is_virtual(mosaic.processed_image.file)
+    # The resolved VRT is reused across reads
+    with vrt.yield_resolved_local_path(mosaic.processed_image.file) as first:
+        with vrt.yield_resolved_local_path(mosaic.processed_image.file) as second:
+            assert first == second
+    tile_source = large_image_utilities.get_tilesource_from_image(mosaic.processed_image)
+    with large_image_utilities.yield_image_local_path(images[0]) as path, rasterio.open(
+        path
+    ) as src:
+        assert tile_source.sizeX == src.width
+        assert tile_source.sizeY == src.height
+        expected = src.read()
+
+    result = task_materialize_processed_image(mosaic.pk)
+    assert result['status'] == Status.SUCCEEDED
+    mosaic.refresh_from_db()
+    assert mosaic.processed_image.file.name.endswith('.tif')
+    with mosaic.processed_image.file.yield_local_path() as path, rasterio.open(path) as dst:
+        assert dst.shape == expected.shape[1:]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_virtual_mosaic_sources_permissions(user):
+    mosaic, images = _create_virtual_mosaic()
+    vrt_file = mosaic.processed_image.file
+    # An uploaded copy of the VRT does not resolve its sources
+    with vrt_file.yield_local_path() as path:
+        forged = ChecksumFileFactory(file__filename='forged.vrt', file__from_path=path)
+    assert vrt.is_virtual(forged)
+    with pytest.raises(PermissionDenied):
+        with vrt.yield_resolved_local_path(forged):
+            pass
+    # Nor does the VRT of the mosaic for a user who cannot read its sources
+    with pytest.raises(PermissionDenied):
+        with vrt.yield_resolved_local_path(vrt_file, user=user):
+            pass
+    for image in images:
+        CollectionPermission.objects.create(
+            collection=image.file.collection, user=user, role=CollectionPermission.READER
+        )
+    with vrt.yield_resolved_local_path(vrt_file, user=user) as path:
+        assert path.exists()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_processed_image_reuses_identical_product(elevation):
+    def cog():
+        group = ProcessedImageGroup.objects.create(
+            process_type=ProcessedImageGroup.ProcessTypes.COG,
+        )
+        processed = ProcessedImage.objects.create(group=group)
+        processed.source_images.add(elevation)
+        processed.refresh_from_db()
+        assert processed.status == Status.SUCCEEDED
+        return processed
+
+    first = cog()
+    assert first.fingerprint
+    second = cog()
+    assert second.fingerprint == first.fingerprint
+    assert second.processed_image == first.processed_image
+
+    # The shared product outlives the deletion of one of its ProcessedImages
+    second.delete()
+    first.refresh_from_db()
+    assert first.processed_image.file.file
+
+    # A changed source invalidates the product
+    file = first.processed_image.file
+    elevation.file.checksum = 'changed'
+    elevation.file.save(update_fields=['checksum'])
+    first.refresh_from_db()
+    assert first.fingerprint != second.fingerprint
+    assert first.processed_image.file != file
+
+
+@pytest.mark.django_db(transaction=True)
+def test_pipeline(elevation):
+    group = ProcessedImageGroup.objects.create(
+        process_type=ProcessedImageGroup.ProcessTypes.PIPELINE,
+        parameters={
+            'steps': [
+                {
+                    'name': 'crop',
+                    'process_type': 'region',
+                    'parameters': {
+                        'sample_type': 'pixel box',
+                        'left': 0,
+                        'right': 100,
+                        'bottom': 0,
+                        'top': 100,
+                    },
+                },
+                {
+                    'name': 'half',
+                    'process_type': 'resample',
+                    'parameters': {'sample_factor': 0.5},
+                    'persist': True,
+                },
+                {'name': 'cog', 'process_type': 'cog'},
+            ]
+        },
+    )
+    processed = ProcessedImage.objects.create(group=group)
+    processed.source_images.add(elevation)
+    processed.refresh_from_db()
+    assert processed.status == Status.SUCCEEDED, processed.failure_reason
+    # Only the final and the persisted intermediate outputs are stored
+    assert processed.ancillary_files.count() == 1
+    with processed.processed_image.file.yield_local_path() as path, rasterio.open(path) as src:
+        assert src.shape == (50, 50)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_pipeline_validation(admin_api_client):
+    payload = {
+        'process_type': 'pipeline',
+        'parameters': {'steps': [{'process_type': 'cog', 'inputs': ['missing']}]},
+    }
+    response = admin_api_client.post('/api/image_process/group', payload, format='json')
+    assert response.status_code == 400
+    assert 'missing' in response.data['parameters'][0]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_cog_conversion_options(elevation, settings):
+    settings.RGD_PROCESSING_THREADS = 2
+    group = ProcessedImageGroup.objects.create(
+        process_type=ProcessedImageGroup.ProcessTypes.COG,
+        parameters={'compression': 'lzw', 'predictor': 2, 'blocksize': 256},
+    )
+    processed = ProcessedImage.objects.create(group=group)
+    processed.source_images.add(elevation)
+    processed.refresh_from_db()
+    assert processed.status == Status.SUCCEEDED, processed.failure_reason
+    with processed.processed_image.file.yield_local_path() as path, rasterio.open(path) as src:
+        assert src.compression == rasterio.enums.Compression.lzw
+        assert src.block_shapes[0] == (256, 256)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_cog_conversion_unknown_option(admin_api_client):
+    payload = {'process_type': 'cog', 'parameters': {'compress': 'lzw'}}
+    response = admin_api_client.post('/api/image_process/group', payload, format='json')
+    assert response.status_code == 400
@@ -1,4 +1,9 @@
+import json
+
 import pytest
+from rgd_imagery.models import BandMeta
+from rgd_imagery.rest.tiles import _resolve_band_range
+from rgd_imagery.tasks.etl import load_image
 
 
 @pytest.mark.django_db(transaction=True)
@@ -47,3 +52,42 @@ def test_non_geo_envi_tiles(admin_api_client, non_geo_envi_image):
     )
     assert response.status_code == 200
     assert response['Content-Type'] == 'image/png'
+
+
+@pytest.mark.django_db(transaction=True)
+def test_band_statistics(admin_api_client, elevation):
+    band = elevation.bandmeta_set.get(band_number=1)
+    assert len(band.histogram['counts']) == len(band.histogram['bins']) - 1
+    assert band.min <= band.percentiles['2'] <= band.percentiles['98'] <= band.max
+    # Reloading the image keeps the computed statistics
+    BandMeta.objects.filter(pk=band.pk).update(mean=42.0)
+    load_image(elevation.pk)
+    band.refresh_from_db()
+    assert band.mean == 42.0
+    assert band.histogram is not None
+    # The range of the style is resolved from the stored statistics
+    response = admin_api_client.get(
+        f'/api/rgd_imagery/tiles/{elevation.pk}/tiles/1/0/0.png?band=1&max=max'
+    )
+    assert response.status_code == 200
+    assert response['Content-Type'] == 'image/png'
+    # A stretch between the stored percentiles is asked for in the style
+    response = admin_api_client.get(
+        f'/api/rgd_imagery/tiles/{elevation.pk}/tiles/1/0/0.png',
+        {'style': json.dumps({'band': 1, 'stretch': True})},
+    )
+    assert response.status_code == 200
+
+
+def test_resolve_band_range():
+    stats = {'min': -10.0, 'max': 300.0, 'percentiles': {'2': 1.0, '98': 250.0}}
+    # Left to large_image unless a stretch is asked for
+    assert _resolve_band_range(None, 'min', stats) is None
+    assert _resolve_band_range(None, 'min', stats, stretch=True) == 1.0
+    assert _resolve_band_range(None, 'max', stats, stretch=True) == 250.0
+    assert _resolve_band_range('min', 'min', stats) == -10.0
+    assert _resolve_band_range('auto', 'max', stats) == 300.0
+    assert _resolve_band_range('max:0.02', 'max', stats) == 250.0
+    # Not stored, so left to large_image
+    assert _resolve_band_range('min:0.1', 'min', stats) == 'min:0.1'
+    assert _resolve_band_range(5, 'min', stats) == 5
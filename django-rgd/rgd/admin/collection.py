@@ -3,6 +3,12 @@ from django.contrib.gis.admin import OSMGeoAdmin
 from rgd.models import Collection, CollectionPermission
 
 
+def reindex_items(modeladmin, request, queryset):
+    """Rebuild the item index of each collection."""
+    for collection in queryset.all():
+        collection.reindex()
+
+
 class CollectionPermissionInline(admin.TabularInline):
     model = CollectionPermission
     fk_name = 'collection'
@@ -12,5 +18,7 @@ class CollectionPermissionInline(admin.TabularInline):
 
 @admin.register(Collection)
 class CollectionAdmin(OSMGeoAdmin):
-    fields = ('name',)
+    fields = ('name', 'item_count')
+    readonly_fields = ('item_count',)
     inlines = (CollectionPermissionInline,)
+    actions = (reindex_items,)
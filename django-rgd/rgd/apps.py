@@ -6,4 +6,7 @@ class RGDConfig(AppConfig):
     name = 'rgd'
 
     def ready(self):
+        from rgd.permissions import warm_permission_paths
         import rgd.signals  # noqa: F401
+
+        warm_permission_paths()
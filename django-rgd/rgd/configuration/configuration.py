@@ -83,6 +83,13 @@ class ResonantGeoDataBaseMixin(GeoDjangoMixin, SwaggerMixin, ConfigMixin):
     )
 
     CELERY_WORKER_SEND_TASK_EVENTS = True
+    # Reconcile the statistics summaries with the changes that skip signals
+    CELERY_BEAT_SCHEDULE = {
+        'rgd-refresh-spatial-statistics': {
+            'task': 'rgd.tasks.jobs.task_refresh_spatial_statistics',
+            'schedule': timedelta(hours=1),
+        },
+    }
     CELERY_TASK_TIME_LIMIT = values.IntegerValue(
         environ=True, default=timedelta(days=1).total_seconds()
     )
@@ -94,6 +101,17 @@ class ResonantGeoDataBaseMixin(GeoDjangoMixin, SwaggerMixin, ConfigMixin):
     RGD_TEMP_DIR = values.Value(default=os.path.join(tempfile.gettempdir(), 'rgd'))
     RGD_TARGET_AVAILABLE_CACHE = values.Value(default=2)
     RGD_REST_CACHE_TIMEOUT = values.Value(default=60 * 60 * 2)
+    RGD_VECTOR_TILE_CACHE_TIMEOUT = values.Value(default=60 * 5)
     RGD_SIGNED_URL_TTL = values.Value(default=60 * 60 * 24)  # 24 hours
     RGD_SIGNED_URL_QUERY_PARAM = values.Value(default='signature')
     RGD_DEBUG_LOGS = values.Value(default=True)
+    RGD_RASTER_FOOTPRINT_QUEUE = values.Value(default=None)
+    RGD_RASTER_INGEST_FOOTPRINT = values.Value(default=False)
+    RGD_PROCESSING_MEMORY_LIMIT = values.Value(default=256 * 2**20)
+    RGD_PROCESSING_THREADS = values.Value(default=1)
+    RGD_REGION_MAX_PIXELS = values.Value(default=4096 * 4096)
+    RGD_REGION_CACHE_MAX_BYTES = values.Value(default=2**22)
+    RGD_LONG_POLL_MAX_WAIT = values.Value(default=30)
+    RGD_CUBE_MAX_RASTERS = values.Value(default=256)
+    RGD_CUBE_MAX_BYTES = values.Value(default=2**30)
+    RGD_CUBE_THREADS = values.Value(default=4)
@@ -6,7 +6,7 @@ from django.db.models import F, FloatField, Q
 from django.db.models.functions import Cast
 from django_filters import rest_framework as filters
 from rgd.models import ChecksumFile, Collection, SpatialEntry
-from rgd.permissions import get_paths
+from rgd.permissions import get_cached_paths
 
 
 class GeometryFilter(filters.Filter):
@@ -108,9 +108,19 @@ class SpatialEntryFilter(filters.FilterSet):
             )
         return queryset
 
+    def _prescreen(self, queryset):
+        """Filter by bounding box interaction with the queried geometry.
+
+        This uses the indexed `envelope` so that the exact predicate that
+        follows is only evaluated against candidate footprints.
+        """
+        return queryset.filter(envelope__bboverlaps=self._geometry)
+
     def filter_predicate(self, queryset, name, value):
         """Filter the spatial entries by the chosen predicate."""
         if value and self._has_geom:
+            if value != 'disjoint':
+                queryset = self._prescreen(queryset)
             queryset = queryset.filter(**{f'footprint__{value}': self._geometry})
         return queryset
 
@@ -153,7 +163,7 @@ class SpatialEntryFilter(filters.FilterSet):
         """Filter the queryset by the collection it belongs to."""
         if value:
             conditions = Q()
-            for path in get_paths(queryset.model, ChecksumFile):
+            for path in get_cached_paths(queryset.model, ChecksumFile):
                 conditions |= path.q(collection__in=value)
             return queryset.filter(conditions).distinct()
         return queryset
@@ -162,6 +172,7 @@ class SpatialEntryFilter(filters.FilterSet):
         """Filter the queryset by percent overlap with the queried geometry."""
         if value is not None and value > 0 and value <= 1 and self._has_geom:
             geom = self._geometry
+            queryset = self._prescreen(queryset)
             queryset = queryset.filter(footprint__overlaps=geom).annotate(
                 overlap_percentage=(
                     Cast(Area(Intersection(F('footprint'), geom)) / Area(geom), FloatField())
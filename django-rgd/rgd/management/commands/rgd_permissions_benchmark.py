@@ -0,0 +1,89 @@
+import time
+
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from rgd import models
+from rgd.permissions import (
+    filter_read_perm,
+    get_cached_paths,
+    get_checksumfile_paths,
+    get_permission_lookups,
+)
+
+
+def _clear_caches():
+    get_cached_paths.cache_clear()
+    get_checksumfile_paths.cache_clear()
+    get_permission_lookups.cache_clear()
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the per-request cost of building the permission filter of each '
+        'spatial model with the permission paths searched on every request (uncached) '
+        'and memoized (cached).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '-u',
+            '--username',
+            help='The user to filter for. Defaults to the first active non-superuser.',
+        )
+        parser.add_argument(
+            '-n',
+            '--number',
+            type=int,
+            default=100,
+            help='The number of requests timed per model.',
+        )
+        parser.add_argument(
+            '--execute',
+            action='store_true',
+            help='Also run the filtered queries rather than only compiling them.',
+        )
+
+    def _time_request(self, user, model, execute):
+        start = time.perf_counter()
+        queryset = filter_read_perm(user, model.objects.all())
+        if execute:
+            queryset.exists()
+        else:
+            str(queryset.query)
+        return time.perf_counter() - start
+
+    def handle(self, *args, **options):
+        users = User.objects.filter(is_active=True, is_superuser=False)
+        if options.get('username'):
+            users = users.filter(username=options['username'])
+        user = users.first()
+        if user is None:
+            raise CommandError('No active non-superuser to filter for.')
+        number = options['number']
+        execute = options['execute']
+        # Every installed spatial app, e.g. imagery, FMV, 3D and geometry
+        spatial_models = [
+            model for model in apps.get_models() if issubclass(model, models.SpatialEntry)
+        ]
+
+        self.stdout.write(f'{"model":40} {"uncached ms":>12} {"cached ms":>10} {"speedup":>8}')
+        total_uncached = total_cached = 0.0
+        for model in spatial_models:
+            uncached = 0.0
+            for _ in range(number):
+                _clear_caches()
+                uncached += self._time_request(user, model, execute)
+            # Warm up, as done when the app is ready
+            self._time_request(user, model, execute)
+            cached = sum(self._time_request(user, model, execute) for _ in range(number))
+            total_uncached += uncached
+            total_cached += cached
+            self.stdout.write(
+                f'{model._meta.label:40} {uncached / number * 1e3:>12.3f} '
+                f'{cached / number * 1e3:>10.3f} {uncached / cached:>8.1f}'
+            )
+        self.stdout.write(
+            f'{"all":40} {total_uncached / number * 1e3:>12.3f} '
+            f'{total_cached / number * 1e3:>10.3f} {total_uncached / total_cached:>8.1f}'
+        )
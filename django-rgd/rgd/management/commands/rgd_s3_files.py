@@ -1,12 +1,17 @@
-import multiprocessing
+from queue import Queue
 import re
-from typing import Generator, Optional
+import threading
+import time
+from typing import Generator, List, Optional
 
 import boto3
 import botocore
+from django.db import connections, transaction
 import djclick as click
+from rgd import models
 
-from . import _data_helper as helper
+# Number of objects written to the database at a time
+BATCH_SIZE = 1000
 
 
 def _iter_matching_objects(
@@ -22,26 +27,131 @@ def _iter_matching_objects(
     exclude_pattern = re.compile(exclude_regex)
 
     for page in page_iter:
-        for obj in page['Contents']:
+        # Pages of an empty prefix have no `Contents`
+        for obj in page.get('Contents', []):
             if include_pattern.match(obj['Key']) and not exclude_pattern.search(obj['Key']):
                 yield obj
 
 
+def _iter_batches_in_background(objects, batch_size: int = BATCH_SIZE, max_batches: int = 4):
+    """Consume an iterator of objects in a producer thread and yield them in batches.
+
+    Listing the bucket overlaps with writing the previous batches to the
+    database. At most ``max_batches`` are buffered.
+
+    """
+    queue = Queue(maxsize=max_batches)
+    done = object()
+
+    def produce():
+        try:
+            batch = []
+            for obj in objects:
+                batch.append(obj)
+                if len(batch) >= batch_size:
+                    queue.put(batch)
+                    batch = []
+            if batch:
+                queue.put(batch)
+            queue.put(done)
+        except Exception as e:
+            queue.put(e)
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    while True:
+        batch = queue.get()
+        if batch is done:
+            break
+        if isinstance(batch, Exception):
+            raise batch
+        yield batch
+    thread.join()
+
+
 class Loader:
-    def __init__(self, bucket: str, region: str, google: bool = False):
+    def __init__(
+        self,
+        bucket: str,
+        region: str,
+        google: bool = False,
+        collection: Optional[models.Collection] = None,
+    ):
         self.bucket = bucket
         self.google = google
         self.region = region
+        self.collection = collection
 
     def _format_url(self, base_url):
         if self.google:
             return f'http://storage.googleapis.com/{base_url}'
         return f'https://{self.region}.amazonaws.com/{base_url}'
 
-    def load_object(self, obj: dict) -> None:
-        key = obj['Key']
-        url = self._format_url(f'{self.bucket}/{key}')
-        helper._get_or_create_checksum_file_url(url, name=key)
+    def load_batch(self, objects: List[dict]) -> List[int]:
+        """Create or update the ``ChecksumFile`` of each object in a batch.
+
+        Files are matched by URL within the collection of the loader. Objects
+        whose ETag and last modified time match the last synchronization are
+        left untouched. Returns the primary keys of the created and changed
+        files so their tasks can be queued.
+
+        """
+        remote = {self._format_url(f'{self.bucket}/{obj["Key"]}'): obj for obj in objects}
+        with transaction.atomic():
+            if self.collection is not None:
+                # Serialize the synchronizations of a collection, so that the
+                #  lookup below sees the files created by any other one
+                models.Collection.objects.select_for_update().filter(pk=self.collection.pk).first()
+            # The unique constraint on `(collection, url)` does not apply to files
+            #  without a collection, so existing files are looked up explicitly
+            existing = {
+                f.url: f
+                for f in models.ChecksumFile.objects.filter(
+                    collection=self.collection,
+                    type=models.FileSourceType.URL,
+                    url__in=remote.keys(),
+                ).only('pk', 'url', 'remote_etag', 'remote_last_modified')
+            }
+            created = []
+            changed = []
+            backfilled = []
+            for url, obj in remote.items():
+                etag = obj.get('ETag', '')
+                last_modified = obj.get('LastModified')
+                file = existing.get(url)
+                if file is None:
+                    created.append(
+                        models.ChecksumFile(
+                            type=models.FileSourceType.URL,
+                            url=url,
+                            name=obj['Key'],
+                            collection=self.collection,
+                            remote_etag=etag,
+                            remote_last_modified=last_modified,
+                        )
+                    )
+                elif not file.remote_etag:
+                    # Files created before remote state was recorded: assume the
+                    #  current object was synchronized and keep its checksum
+                    file.remote_etag = etag
+                    file.remote_last_modified = last_modified
+                    backfilled.append(file)
+                elif file.remote_etag != etag or file.remote_last_modified != last_modified:
+                    file.remote_etag = etag
+                    file.remote_last_modified = last_modified
+                    # Clear the checksum so it is recomputed for the new content
+                    file.checksum = ''
+                    changed.append(file)
+            # Skips signals: the tasks are queued by the caller once all files are written
+            # The collection item index is maintained by the database
+            models.ChecksumFile.objects.bulk_create(created)
+            models.ChecksumFile.objects.bulk_update(
+                changed, ['remote_etag', 'remote_last_modified', 'checksum']
+            )
+            models.ChecksumFile.objects.bulk_update(
+                backfilled, ['remote_etag', 'remote_last_modified']
+            )
+            return [*(f.pk for f in created), *(f.pk for f in changed)]
 
 
 @click.command()
@@ -53,6 +163,14 @@ class Loader:
 @click.option('--access-key-id')
 @click.option('--secret-access-key')
 @click.option('--google', is_flag=True, default=False)
+@click.option('--collection', help='The name of the collection of the files (created if missing).')
+@click.option('--batch-size', default=BATCH_SIZE, show_default=True)
+@click.option(
+    '--no-tasks',
+    is_flag=True,
+    default=False,
+    help='Do not queue the tasks of the created and changed files.',
+)
 def ingest_s3(
     bucket: str,
     include_regex: str,
@@ -62,6 +180,9 @@ def ingest_s3(
     access_key_id: Optional[str],
     secret_access_key: Optional[str],
     google: bool,
+    collection: Optional[str],
+    batch_size: int,
+    no_tasks: bool,
 ) -> None:
     if access_key_id and secret_access_key:
         boto3_params = {
@@ -81,9 +202,23 @@ def ingest_s3(
 
     s3_client = boto3.client('s3', **boto3_params)
 
-    loader = Loader(bucket, region, google=google)
-    pool = multiprocessing.Pool(multiprocessing.cpu_count())
-    pool.map(
-        loader.load_object,
-        _iter_matching_objects(s3_client, bucket, prefix, include_regex, exclude_regex),
+    if collection:
+        collection, _ = models.Collection.objects.get_or_create(name=collection)
+    loader = Loader(bucket, region, google=google, collection=collection or None)
+    start_time = time.perf_counter()
+    listed = 0
+    pks = []
+    try:
+        objects = _iter_matching_objects(s3_client, bucket, prefix, include_regex, exclude_regex)
+        for batch in _iter_batches_in_background(objects, batch_size=batch_size):
+            listed += len(batch)
+            pks += loader.load_batch(batch)
+        if not no_tasks:
+            # Deferred until all files are written so workers do not contend with the sync
+            models.ChecksumFile._run_tasks_bulk(pks)
+    finally:
+        connections.close_all()
+    click.echo(
+        f'Synchronized {listed} objects in {time.perf_counter() - start_time:.1f}s: '
+        f'{len(pks)} new or changed.'
     )
@@ -0,0 +1,51 @@
+# Generated by Django 4.0.3 on 2026-10-19 12:00
+
+import django.contrib.gis.db.models.fields
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rgd', '0009_alter_checksumfile_collection_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='spatialentry',
+            name='envelope',
+            field=django.contrib.gis.db.models.fields.GeometryField(
+                blank=True, editable=False, null=True, srid=4326
+            ),
+        ),
+        migrations.AddField(
+            model_name='spatialentry',
+            name='footprint_low',
+            field=django.contrib.gis.db.models.fields.GeometryField(
+                blank=True, editable=False, null=True, srid=4326
+            ),
+        ),
+        migrations.AddField(
+            model_name='spatialentry',
+            name='footprint_mid',
+            field=django.contrib.gis.db.models.fields.GeometryField(
+                blank=True, editable=False, null=True, srid=4326
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='spatialentry',
+            index=django.contrib.postgres.indexes.BrinIndex(
+                fields=['acquisition_date'], name='rgd_spatialentry_acq_brin'
+            ),
+        ),
+        migrations.RunSQL(
+            sql=(
+                'UPDATE rgd_spatialentry SET '
+                'envelope = ST_Envelope(footprint), '
+                'footprint_low = ST_SimplifyPreserveTopology(footprint, 0.01), '
+                'footprint_mid = ST_SimplifyPreserveTopology(footprint, 0.0001);'
+            ),
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,76 @@
+# Generated by Django 4.0.3 on 2026-10-19 12:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def build_collection_items(apps, schema_editor):
+    Collection = apps.get_model('rgd', 'Collection')
+    CollectionItem = apps.get_model('rgd', 'CollectionItem')
+    ChecksumFile = apps.get_model('rgd', 'ChecksumFile')
+    for collection in Collection.objects.all():
+        file_ids = list(
+            ChecksumFile.objects.filter(collection=collection)
+            .order_by('pk')
+            .values_list('pk', flat=True)
+        )
+        CollectionItem.objects.bulk_create(
+            CollectionItem(collection=collection, ordinal=ordinal, file_id=file_id)
+            for ordinal, file_id in enumerate(file_ids)
+        )
+        collection.item_count = len(file_ids)
+        collection.save(update_fields=['item_count'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rgd', '0010_spatialentry_derived_footprints'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='collection',
+            name='item_count',
+            field=models.PositiveIntegerField(
+                default=0,
+                editable=False,
+                help_text='The number of files in this collection (maintained by `CollectionItem`).',
+            ),
+        ),
+        migrations.CreateModel(
+            name='CollectionItem',
+            fields=[
+                (
+                    'id',
+                    models.AutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name='ID'
+                    ),
+                ),
+                ('ordinal', models.PositiveIntegerField()),
+                (
+                    'collection',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='items',
+                        to='rgd.collection',
+                    ),
+                ),
+                (
+                    'file',
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='collection_item',
+                        to='rgd.checksumfile',
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='collectionitem',
+            constraint=models.UniqueConstraint(
+                fields=('collection', 'ordinal'), name='unique_collection_ordinal'
+            ),
+        ),
+        migrations.RunPython(build_collection_items, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 4.0.3 on 2026-10-19 12:00
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+import django.db.models.deletion
+import django_extensions.db.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rgd', '0011_collectionitem'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SpatialStatistics',
+            fields=[
+                (
+                    'id',
+                    models.AutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name='ID'
+                    ),
+                ),
+                (
+                    'created',
+                    django_extensions.db.fields.CreationDateTimeField(
+                        auto_now_add=True, verbose_name='created'
+                    ),
+                ),
+                (
+                    'modified',
+                    django_extensions.db.fields.ModificationDateTimeField(
+                        auto_now=True, verbose_name='modified'
+                    ),
+                ),
+                ('count', models.PositiveIntegerField(default=0)),
+                (
+                    'instrumentation',
+                    django.contrib.postgres.fields.ArrayField(
+                        base_field=models.CharField(max_length=100), default=list, size=None
+                    ),
+                ),
+                ('acquisition_date_min', models.DateTimeField(null=True)),
+                ('acquisition_date_max', models.DateTimeField(null=True)),
+                (
+                    'extent',
+                    django.contrib.postgres.fields.ArrayField(
+                        base_field=models.FloatField(), null=True, size=4
+                    ),
+                ),
+                (
+                    'centroid_grid',
+                    models.JSONField(
+                        default=dict,
+                        help_text='Count of spatial entries by centroid in a grid of `STATISTICS_GRID_SIZE` degrees.',
+                    ),
+                ),
+                (
+                    'collection',
+                    models.OneToOneField(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='spatial_statistics',
+                        to='rgd.collection',
+                    ),
+                ),
+            ],
+            options={
+                'get_latest_by': 'modified',
+                'abstract': False,
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.0.3 on 2026-10-19 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rgd', '0012_spatialstatistics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='checksumfile',
+            name='remote_etag',
+            field=models.CharField(
+                blank=True,
+                default='',
+                editable=False,
+                help_text='The ETag of the remote object (URL files) when last synchronized.',
+                max_length=200,
+            ),
+        ),
+        migrations.AddField(
+            model_name='checksumfile',
+            name='remote_last_modified',
+            field=models.DateTimeField(
+                blank=True,
+                editable=False,
+                help_text='The last modified time of the remote object (URL files) when last synchronized.',
+                null=True,
+            ),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 4.0.3 on 2026-10-19 12:00
+
+from django.db import migrations
+
+# Keeps the derived footprints up to date on every write of the footprint,
+#  including `bulk_create` and `QuerySet.update`. The tolerances must match
+#  `rgd.models.constants.SIMPLIFIED_FOOTPRINT_TOLERANCES`.
+CREATE_TRIGGER = '''
+CREATE OR REPLACE FUNCTION rgd_spatialentry_derived_footprints() RETURNS trigger AS $$
+BEGIN
+    NEW.envelope := ST_Envelope(NEW.footprint);
+    NEW.footprint_low := ST_SimplifyPreserveTopology(NEW.footprint, 0.01);
+    NEW.footprint_mid := ST_SimplifyPreserveTopology(NEW.footprint, 0.0001);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER rgd_spatialentry_derived_footprints
+BEFORE INSERT OR UPDATE OF footprint ON rgd_spatialentry
+FOR EACH ROW EXECUTE PROCEDURE rgd_spatialentry_derived_footprints();
+'''
+
+DROP_TRIGGER = '''
+DROP TRIGGER IF EXISTS rgd_spatialentry_derived_footprints ON rgd_spatialentry;
+DROP FUNCTION IF EXISTS rgd_spatialentry_derived_footprints();
+'''
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rgd', '0013_checksumfile_remote_state'),
+    ]
+
+    operations = [
+        migrations.RunSQL(sql=CREATE_TRIGGER, reverse_sql=DROP_TRIGGER),
+        # Backfill the rows written without them since they were added
+        migrations.RunSQL(
+            sql=(
+                'UPDATE rgd_spatialentry SET footprint = footprint '
+                'WHERE envelope IS NULL OR footprint_low IS NULL OR footprint_mid IS NULL;'
+            ),
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 4.0.3 on 2026-10-19 12:00
+
+from django.contrib.gis.db.models import Extent
+from django.contrib.gis.db.models.functions import Centroid
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.db import migrations
+from django.db.models import Count, FloatField, Func, Max, Min, Q
+from django.db.models.functions import Floor
+
+# A frozen copy of `STATISTICS_GRID_SIZE` and `summarize_entries` when this
+#  migration was written
+GRID_SIZE = 0.5
+
+
+def summarize_entries(queryset):
+    summary = queryset.aggregate(
+        count=Count('spatial_id'),
+        instrumentation=ArrayAgg(
+            'instrumentation', distinct=True, filter=Q(instrumentation__isnull=False)
+        ),
+        acquisition_date_min=Min('acquisition_date'),
+        acquisition_date_max=Max('acquisition_date'),
+        extent=Extent('outline'),
+    )
+    centroid = Centroid('envelope')
+    cells = (
+        queryset.annotate(
+            cell_x=Floor(Func(centroid, function='ST_X', output_field=FloatField()) / GRID_SIZE),
+            cell_y=Floor(Func(centroid, function='ST_Y', output_field=FloatField()) / GRID_SIZE),
+        )
+        .values('cell_x', 'cell_y')
+        .annotate(cell_count=Count('spatial_id'))
+    )
+    summary['centroid_grid'] = {
+        f'{int(cell["cell_x"])},{int(cell["cell_y"])}': cell['cell_count']
+        for cell in cells
+        if cell['cell_x'] is not None
+    }
+    summary['instrumentation'] = summary['instrumentation'] or []
+    if summary['extent'] is not None:
+        summary['extent'] = list(summary['extent'])
+    return summary
+
+
+def summarize_all_entries(apps, schema_editor):
+    SpatialEntry = apps.get_model('rgd', 'SpatialEntry')
+    SpatialStatistics = apps.get_model('rgd', 'SpatialStatistics')
+    # The summaries of Collections depend on the permission paths of all
+    #  installed apps and are left to the periodic refresh
+    SpatialStatistics.objects.update_or_create(
+        collection=None, defaults=summarize_entries(SpatialEntry.objects.all())
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rgd', '0014_spatialentry_derived_footprints_trigger'),
+    ]
+
+    operations = [
+        migrations.RunPython(summarize_all_entries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,114 @@
+# Generated by Django 4.0.3 on 2026-10-19 12:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Keeps the dense item index and item counts of collections up to date on
+#  every write of the collection of a file, including `bulk_create`,
+#  `QuerySet.update` and `QuerySet.delete`. The collection row is locked to
+#  serialize the assignment of ordinals. Removing an item moves the last
+#  item of the collection into its ordinal.
+CREATE_TRIGGER = '''
+CREATE OR REPLACE FUNCTION rgd_collection_add_item(collection_pk integer, file_pk integer)
+RETURNS void AS $$
+DECLARE
+    item_total integer;
+BEGIN
+    SELECT item_count INTO item_total FROM rgd_collection WHERE id = collection_pk FOR UPDATE;
+    INSERT INTO rgd_collectionitem (collection_id, ordinal, file_id)
+        VALUES (collection_pk, item_total, file_pk);
+    UPDATE rgd_collection SET item_count = item_total + 1 WHERE id = collection_pk;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION rgd_collection_remove_item(collection_pk integer, file_pk integer)
+RETURNS void AS $$
+DECLARE
+    item_total integer;
+    removed integer;
+BEGIN
+    SELECT item_count INTO item_total FROM rgd_collection WHERE id = collection_pk FOR UPDATE;
+    DELETE FROM rgd_collectionitem WHERE collection_id = collection_pk AND file_id = file_pk
+        RETURNING ordinal INTO removed;
+    IF NOT FOUND THEN
+        RETURN;
+    END IF;
+    UPDATE rgd_collectionitem SET ordinal = removed
+        WHERE collection_id = collection_pk AND ordinal = item_total - 1;
+    UPDATE rgd_collection SET item_count = item_total - 1 WHERE id = collection_pk;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION rgd_checksumfile_collection_items() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        IF OLD.collection_id IS NOT NULL THEN
+            PERFORM rgd_collection_remove_item(OLD.collection_id, OLD.id);
+        END IF;
+        RETURN OLD;
+    END IF;
+    IF TG_OP = 'UPDATE' THEN
+        IF OLD.collection_id IS NOT DISTINCT FROM NEW.collection_id THEN
+            RETURN NEW;
+        END IF;
+        IF OLD.collection_id IS NOT NULL THEN
+            PERFORM rgd_collection_remove_item(OLD.collection_id, OLD.id);
+        END IF;
+    END IF;
+    IF NEW.collection_id IS NOT NULL THEN
+        PERFORM rgd_collection_add_item(NEW.collection_id, NEW.id);
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER rgd_checksumfile_collection_items
+AFTER INSERT OR UPDATE OF collection_id ON rgd_checksumfile
+FOR EACH ROW EXECUTE PROCEDURE rgd_checksumfile_collection_items();
+
+CREATE TRIGGER rgd_checksumfile_collection_items_delete
+BEFORE DELETE ON rgd_checksumfile
+FOR EACH ROW EXECUTE PROCEDURE rgd_checksumfile_collection_items();
+'''
+
+DROP_TRIGGER = '''
+DROP TRIGGER IF EXISTS rgd_checksumfile_collection_items_delete ON rgd_checksumfile;
+DROP TRIGGER IF EXISTS rgd_checksumfile_collection_items ON rgd_checksumfile;
+DROP FUNCTION IF EXISTS rgd_checksumfile_collection_items();
+DROP FUNCTION IF EXISTS rgd_collection_remove_item(integer, integer);
+DROP FUNCTION IF EXISTS rgd_collection_add_item(integer, integer);
+'''
+
+# Rebuild the index of the files written without it, in primary key order
+REINDEX = '''
+DELETE FROM rgd_collectionitem;
+INSERT INTO rgd_collectionitem (collection_id, ordinal, file_id)
+    SELECT collection_id, row_number() OVER (PARTITION BY collection_id ORDER BY id) - 1, id
+    FROM rgd_checksumfile WHERE collection_id IS NOT NULL;
+UPDATE rgd_collection SET item_count = (
+    SELECT count(*) FROM rgd_collectionitem WHERE collection_id = rgd_collection.id
+);
+'''
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rgd', '0015_spatialstatistics_backfill'),
+    ]
+
+    operations = [
+        # The item of a deleted file is removed by the trigger, which also
+        #  compacts the index, rather than by the ORM
+        migrations.AlterField(
+            model_name='collectionitem',
+            name='file',
+            field=models.OneToOneField(
+                on_delete=django.db.models.deletion.DO_NOTHING,
+                related_name='collection_item',
+                to='rgd.checksumfile',
+            ),
+        ),
+        migrations.RunSQL(sql=CREATE_TRIGGER, reverse_sql=DROP_TRIGGER),
+        migrations.RunSQL(sql=REINDEX, reverse_sql=migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.0.3 on 2026-10-19 12:00
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+
+
+def keep_summary_of_all_entries(apps, schema_editor):
+    SpatialStatistics = apps.get_model('rgd', 'SpatialStatistics')
+    # The summary of all entries is kept under no Collections, so that the
+    #  total stays exact until the next refresh summarizes them by Collections
+    SpatialStatistics.objects.filter(collection__isnull=False).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rgd', '0016_collectionitem_trigger'),
+    ]
+
+    operations = [
+        migrations.RunPython(keep_summary_of_all_entries, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='spatialstatistics',
+            name='collection',
+        ),
+        migrations.AddField(
+            model_name='spatialstatistics',
+            name='collections',
+            field=django.contrib.postgres.fields.ArrayField(
+                base_field=models.IntegerField(),
+                default=list,
+                help_text='The sorted primary keys of the Collections of the summarized entries.',
+                size=None,
+                unique=True,
+            ),
+            preserve_default=False,
+        ),
+        migrations.AlterField(
+            model_name='spatialstatistics',
+            name='count',
+            field=models.IntegerField(default=0),
+        ),
+    ]
@@ -1,7 +1,8 @@
-from .collection import Collection, CollectionPermission  # noqa
+from .collection import Collection, CollectionItem, CollectionPermission  # noqa
 from .common import SpatialAsset, SpatialEntry, WhitelistedEmail  # noqa
 from .constants import *  # noqa
 from .file import ChecksumFile, FileSourceType  # noqa
 from .fileset import FileSet  # noqa
 from .mixins import *  # noqa
+from .statistics import SpatialStatistics  # noqa
 from .transform import transform_geometry  # noqa
@@ -1,11 +1,16 @@
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
 
 
 class Collection(models.Model):
 
     name = models.CharField(max_length=127, unique=True)
     description = models.TextField(blank=True, null=True)
+    item_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text='The number of files in this collection (maintained by the database).',
+    )
 
     def __str__(self):
         return f'{self.name} ({self.pk})'
@@ -14,7 +19,48 @@ class Collection(models.Model):
         default_related_name = 'collections'
 
     def __len__(self):
-        return self.checksumfiles.count()
+        return self.item_count
+
+    def reindex(self):
+        """Rebuild the item index from the files in this collection.
+
+        Items are ordered by the primary key of their file.
+        """
+        with transaction.atomic():
+            Collection.objects.select_for_update().filter(pk=self.pk).first()
+            CollectionItem.objects.filter(collection=self).delete()
+            file_ids = list(self.checksumfiles.order_by('pk').values_list('pk', flat=True))
+            CollectionItem.objects.bulk_create(
+                CollectionItem(collection=self, ordinal=ordinal, file_id=file_id)
+                for ordinal, file_id in enumerate(file_ids)
+            )
+            self.item_count = len(file_ids)
+            self.save(update_fields=['item_count'])
+
+
+class CollectionItem(models.Model):
+    """Dense ordinal index of the files in a Collection.
+
+    This allows random access to the files in a collection by index
+    without an ``OFFSET`` over the files table. The index and the
+    ``item_count`` of collections are maintained by a database trigger on
+    every write of the collection of a file (see migration ``rgd.0016``).
+    """
+
+    collection = models.ForeignKey(Collection, on_delete=models.CASCADE, related_name='items')
+    ordinal = models.PositiveIntegerField()
+    # Removed by the database trigger, which also compacts the index
+    file = models.OneToOneField(
+        'rgd.ChecksumFile', on_delete=models.DO_NOTHING, related_name='collection_item'
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['collection', 'ordinal'],
+                name='unique_collection_ordinal',
+            )
+        ]
 
 
 class CollectionPermission(models.Model):
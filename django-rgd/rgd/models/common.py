@@ -2,12 +2,16 @@ import json
 import os
 
 from django.contrib.gis.db import models
+from django.contrib.postgres.indexes import BrinIndex
 from django_extensions.db.models import TimeStampedModel
 from model_utils.managers import InheritanceManager
 
-from .constants import DB_SRID
+from .constants import DB_SRID, SIMPLIFIED_FOOTPRINT_TOLERANCES
 from .file import ChecksumFile
 
+# Fields of `SpatialEntry` derived from `footprint` by the database
+DERIVED_FOOTPRINT_FIELDS = ('envelope', *SIMPLIFIED_FOOTPRINT_TOLERANCES)
+
 
 class SpatialEntry(models.Model):
     """Common model to all geospatial data entries.
@@ -35,12 +39,33 @@ class SpatialEntry(models.Model):
         help_text='The instrumentation used to acquire these data.',
     )
 
+    # Cheap stand-ins for `footprint`, maintained by a database trigger on
+    # every write of the footprint. These are used to pre-screen spatial
+    # queries and to render footprints at low zoom levels.
+    envelope = models.GeometryField(srid=DB_SRID, null=True, blank=True, editable=False)
+    footprint_low = models.GeometryField(srid=DB_SRID, null=True, blank=True, editable=False)
+    footprint_mid = models.GeometryField(srid=DB_SRID, null=True, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+            BrinIndex(fields=['acquisition_date'], name='rgd_spatialentry_acq_brin'),
+        ]
+
     def __str__(self):
         try:
             return 'Spatial ID: {} (ID: {}, type: {})'.format(self.spatial_id, self.id, type(self))
         except AttributeError:
             return super().__str__()
 
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        super().save(*args, **kwargs)
+        if update_fields is None or 'footprint' in update_fields:
+            # The database computed them from the footprint: reload them
+            #  from it when they are next accessed
+            for field in DERIVED_FOOTPRINT_FIELDS:
+                self.__dict__.pop(field, None)
+
     @property
     def bounds(self):
         extent = {
@@ -1,2 +1,18 @@
 DB_SRID = 4326
 WEB_MERCATOR = 3857
+
+# Simplified footprint fields on `SpatialEntry` and their tolerances (degrees).
+#  They are computed by the database trigger of migration `rgd.0014`: changing
+#  a tolerance requires a migration replacing the trigger function to match.
+SIMPLIFIED_FOOTPRINT_TOLERANCES = {
+    'footprint_low': 0.01,  # ~1 km: zoom levels below 8
+    'footprint_mid': 0.0001,  # ~10 m: zoom levels below 14
+}
+# Highest zoom level (exclusive) at which each simplified footprint is rendered
+SIMPLIFIED_FOOTPRINT_MAX_ZOOM = {
+    'footprint_low': 8,
+    'footprint_mid': 14,
+}
+
+# Size of the centroid grid cells in `SpatialStatistics` (degrees)
+STATISTICS_GRID_SIZE = 0.5
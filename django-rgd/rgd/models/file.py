@@ -75,6 +75,19 @@ class ChecksumFile(TimeStampedModel, TaskEventMixin):
     type = models.IntegerField(choices=FileSourceType.choices, default=FileSourceType.FILE_FIELD)
     file = S3FileField(null=True, blank=True, upload_to=uuid_prefix_filename)
     url = models.TextField(null=True, blank=True)
+    remote_etag = models.CharField(
+        max_length=200,
+        blank=True,
+        default='',
+        editable=False,
+        help_text='The ETag of the remote object (URL files) when last synchronized.',
+    )
+    remote_last_modified = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text='The last modified time of the remote object (URL files) when last synchronized.',
+    )
 
     task_funcs = (tasks.task_checksum_file_post_save,)
 
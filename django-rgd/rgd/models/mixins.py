@@ -1,7 +1,8 @@
 """Mixin helper classes."""
+
 from typing import Iterable
 
-from celery import Task
+from celery import Task, group
 from django.conf import settings
 from django.contrib.gis.db import models
 from django.utils.translation import gettext_lazy as _
@@ -56,6 +57,22 @@ class TaskEventMixin(models.Model):
             else:
                 func.delay(self.pk)
 
+    @classmethod
+    def _run_tasks_bulk(cls, pks: Iterable[int]) -> None:
+        """Queue the tasks of many instances, e.g. those made with ``bulk_create``."""
+        pks = list(pks)
+        if not cls.task_funcs or not pks:
+            return
+
+        cls.objects.filter(pk__in=pks).update(status=Status.QUEUED)
+        if getattr(settings, 'CELERY_TASK_ALWAYS_EAGER', None):
+            for pk in pks:
+                for func in cls.task_funcs:
+                    func(pk)
+        else:
+            # Published together as one group, over a single producer connection
+            group(func.s(pk) for pk in pks for func in cls.task_funcs).apply_async()
+
     def _post_save_event_task(self, created: bool, *args, **kwargs) -> None:
         if not created and kwargs.get('update_fields'):
             return
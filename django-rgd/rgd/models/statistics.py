@@ -0,0 +1,303 @@
+from collections import defaultdict
+from typing import Dict, Tuple
+
+from django.conf import settings
+from django.contrib.gis.db import models
+from django.contrib.gis.db.models import Extent
+from django.contrib.gis.db.models.functions import Centroid
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.contrib.postgres.fields import ArrayField
+from django.db import connection, transaction
+from django.db.models import Count, FloatField, Func, Max, Min, Q, Sum
+from django.db.models.functions import Floor
+from django_extensions.db.models import TimeStampedModel
+
+from .collection import Collection
+from .common import SpatialEntry
+from .constants import STATISTICS_GRID_SIZE
+from .file import ChecksumFile
+
+
+def _grid_index(axis: str, expression):
+    return Floor(
+        Func(expression, function=f'ST_{axis}', output_field=FloatField()) / STATISTICS_GRID_SIZE
+    )
+
+
+def summarize_entries(queryset) -> dict:
+    """Aggregate the fields of a ``SpatialStatistics`` over a queryset of spatial entries."""
+    summary = queryset.aggregate(
+        count=Count('spatial_id'),
+        instrumentation=ArrayAgg(
+            'instrumentation', distinct=True, filter=Q(instrumentation__isnull=False)
+        ),
+        acquisition_date_min=Min('acquisition_date'),
+        acquisition_date_max=Max('acquisition_date'),
+        extent=Extent('outline'),
+    )
+    centroid = Centroid('envelope')
+    cells = (
+        queryset.annotate(cell_x=_grid_index('X', centroid), cell_y=_grid_index('Y', centroid))
+        .values('cell_x', 'cell_y')
+        .annotate(cell_count=Count('spatial_id'))
+    )
+    summary['centroid_grid'] = {
+        f'{int(cell["cell_x"])},{int(cell["cell_y"])}': cell['cell_count']
+        for cell in cells
+        if cell['cell_x'] is not None
+    }
+    summary['instrumentation'] = summary['instrumentation'] or []
+    if summary['extent'] is not None:
+        summary['extent'] = list(summary['extent'])
+    return summary
+
+
+def _get_entry_rows(queryset):
+    """Get the fields of each spatial entry of a queryset that are summarized."""
+    centroid = Centroid('envelope')
+    bounds = {
+        f'{axis.lower()}{bound}': Func(
+            'outline', function=f'ST_{axis}{bound.capitalize()}', output_field=FloatField()
+        )
+        for bound in ('min', 'max')
+        for axis in ('X', 'Y')
+    }
+    return queryset.annotate(
+        cell_x=_grid_index('X', centroid), cell_y=_grid_index('Y', centroid), **bounds
+    ).values(
+        'spatial_id',
+        'instrumentation',
+        'acquisition_date',
+        'xmin',
+        'ymin',
+        'xmax',
+        'ymax',
+        'cell_x',
+        'cell_y',
+    )
+
+
+def _summarize_row(row) -> dict:
+    """Summarize a single spatial entry as ``summarize_entries`` does."""
+    return {
+        'count': 1,
+        'instrumentation': {row['instrumentation']} if row['instrumentation'] else set(),
+        'acquisition_date_min': row['acquisition_date'],
+        'acquisition_date_max': row['acquisition_date'],
+        'extent': (
+            [row['xmin'], row['ymin'], row['xmax'], row['ymax']]
+            if row['xmin'] is not None
+            else None
+        ),
+        'centroid_grid': (
+            {f'{int(row["cell_x"])},{int(row["cell_y"])}': 1} if row['cell_x'] is not None else {}
+        ),
+    }
+
+
+def _empty_summary() -> dict:
+    return {
+        'count': 0,
+        'instrumentation': set(),
+        'acquisition_date_min': None,
+        'acquisition_date_max': None,
+        'extent': None,
+        'centroid_grid': {},
+    }
+
+
+def _add_summary(summary: dict, other: dict):
+    """Add the entries of the ``other`` summary to a summary."""
+    summary['count'] += other['count']
+    summary['instrumentation'].update(other['instrumentation'])
+    if other['acquisition_date_min'] is not None:
+        summary['acquisition_date_min'] = min(
+            filter(None, (summary['acquisition_date_min'], other['acquisition_date_min']))
+        )
+        summary['acquisition_date_max'] = max(
+            filter(None, (summary['acquisition_date_max'], other['acquisition_date_max']))
+        )
+    if other['extent'] is not None:
+        extent = summary['extent'] or other['extent']
+        summary['extent'] = [
+            min(extent[0], other['extent'][0]),
+            min(extent[1], other['extent'][1]),
+            max(extent[2], other['extent'][2]),
+            max(extent[3], other['extent'][3]),
+        ]
+    for cell, count in other['centroid_grid'].items():
+        summary['centroid_grid'][cell] = summary['centroid_grid'].get(cell, 0) + count
+
+
+def _remove_summary(summary: dict, other: dict):
+    """Remove the entries of the ``other`` summary from a summary.
+
+    The instrumentation, dates and extent are not narrowed, as that needs the
+    remaining entries; they are narrowed by the next refresh.
+    """
+    summary['count'] -= other['count']
+    for cell, count in other['centroid_grid'].items():
+        remaining = summary['centroid_grid'].get(cell, 0) - count
+        if remaining > 0:
+            summary['centroid_grid'][cell] = remaining
+        else:
+            summary['centroid_grid'].pop(cell, None)
+
+
+def get_collection_keys(queryset) -> Dict[int, Tuple[int, ...]]:
+    """Get the sorted primary keys of the Collections of each spatial entry of a queryset.
+
+    Entries without a Collection are left out.
+    """
+    from rgd.permissions import get_cached_paths
+
+    pairs = [
+        queryset.filter(**{f'{path.lookup}__isnull': False}).values_list('spatial_id', path.lookup)
+        for path in get_cached_paths(SpatialEntry, Collection)
+    ]
+    collections = defaultdict(set)
+    if pairs:
+        for spatial_id, collection_id in pairs[0].union(*pairs[1:], all=True).iterator():
+            collections[spatial_id].add(collection_id)
+    return {spatial_id: tuple(sorted(ids)) for spatial_id, ids in collections.items()}
+
+
+class SpatialStatistics(TimeStampedModel):
+    """A summary of the spatial entries in the same Collections.
+
+    Entries are summarized by the set of Collections of their files, as that
+    decides which users can read them through collection permissions. The
+    summaries are updated as entries are saved and deleted (see
+    ``apply_change``) and are refreshed periodically to reconcile the changes
+    that are not tracked, such as files moving between Collections. Pages read
+    these summaries rather than aggregating over every spatial entry on each
+    request.
+    """
+
+    collections = ArrayField(
+        models.IntegerField(),
+        unique=True,
+        help_text='The sorted primary keys of the Collections of the summarized entries.',
+    )
+    # Negative while entries are removed from another summary than the one
+    #  they were added to, until the next refresh; the total stays exact
+    count = models.IntegerField(default=0)
+    instrumentation = ArrayField(models.CharField(max_length=100), default=list)
+    acquisition_date_min = models.DateTimeField(null=True)
+    acquisition_date_max = models.DateTimeField(null=True)
+    extent = ArrayField(models.FloatField(), size=4, null=True)
+    centroid_grid = models.JSONField(
+        default=dict,
+        help_text='Count of spatial entries by centroid in a grid of `STATISTICS_GRID_SIZE` degrees.',
+    )
+
+    def get_summary(self) -> dict:
+        return {
+            'count': self.count,
+            'instrumentation': set(self.instrumentation),
+            'acquisition_date_min': self.acquisition_date_min,
+            'acquisition_date_max': self.acquisition_date_max,
+            'extent': self.extent,
+            'centroid_grid': dict(self.centroid_grid),
+        }
+
+    def set_summary(self, summary: dict):
+        for field, value in summary.items():
+            setattr(self, field, value)
+        self.instrumentation = sorted(summary['instrumentation'])
+
+    @classmethod
+    def _lock(cls):
+        # Wait for the changes applied in open transactions, which lock the rows
+        #  they change, and hold off new ones until the refresh commits
+        with connection.cursor() as cursor:
+            cursor.execute(f'LOCK TABLE {cls._meta.db_table} IN EXCLUSIVE MODE')
+
+    @classmethod
+    def get_change(cls, pk):
+        """Get the collections and summary of a spatial entry, to apply with ``apply_change``.
+
+        Returns ``None`` if the entry does not exist.
+        """
+        entries = SpatialEntry.objects.filter(pk=pk)
+        row = _get_entry_rows(entries).first()
+        if row is None:
+            return None
+        return get_collection_keys(entries).get(pk, ()), _summarize_row(row)
+
+    @classmethod
+    def apply_change(cls, removed=None, added=None):
+        """Update the summaries with the change of a spatial entry.
+
+        ``removed`` and ``added`` are the results of ``get_change`` before and
+        after the change; this is called in the transaction of the change.
+        """
+        if removed == added:
+            return
+        with transaction.atomic():
+            for change, update in ((removed, _remove_summary), (added, _add_summary)):
+                if change is None:
+                    continue
+                collections, summary = change
+                statistics, _ = cls.objects.select_for_update().get_or_create(
+                    collections=list(collections)
+                )
+                current = statistics.get_summary()
+                update(current, summary)
+                if current['count'] == 0:
+                    statistics.delete()
+                else:
+                    statistics.set_summary(current)
+                    statistics.save()
+
+    @classmethod
+    def refresh_all(cls):
+        """Recompute all summaries."""
+        with transaction.atomic():
+            cls._lock()
+            entries = SpatialEntry.objects.all()
+            keys = get_collection_keys(entries)
+            summaries = defaultdict(_empty_summary)
+            for row in _get_entry_rows(entries).iterator():
+                _add_summary(summaries[keys.get(row['spatial_id'], ())], _summarize_row(row))
+            cls.objects.all().delete()
+            statistics = []
+            for collections, summary in summaries.items():
+                statistics.append(cls(collections=list(collections)))
+                statistics[-1].set_summary(summary)
+            cls.objects.bulk_create(statistics)
+
+    @classmethod
+    def get_total_count(cls):
+        """Get the count of all spatial entries, or ``None`` before the first refresh."""
+        return cls.objects.aggregate(total=Sum('count'))['total']
+
+    @classmethod
+    def summarize(cls, user):
+        """Combine the summaries readable by a user.
+
+        Superusers get the summary of all entries. Users whose access only
+        comes from collection permissions get the summaries of the entries in
+        any of the Collections they can read. Other users, who can also read
+        the entries of files they created or files without a Collection, get
+        an exact summary.
+        """
+        from rgd.permissions import filter_read_perm
+
+        if user.is_superuser:
+            statistics = cls.objects.all()
+        elif getattr(settings, 'RGD_GLOBAL_READ_ACCESS', False) or (
+            user.is_authenticated and ChecksumFile.objects.filter(created_by=user).exists()
+        ):
+            summary = summarize_entries(filter_read_perm(user, SpatialEntry.objects.all()))
+            summary['instrumentation'] = set(summary['instrumentation'])
+            return summary
+        else:
+            collections = filter_read_perm(user, Collection.objects.all())
+            statistics = cls.objects.filter(
+                collections__overlap=list(collections.values_list('pk', flat=True))
+            )
+        summary = _empty_summary()
+        for stats in statistics:
+            _add_summary(summary, stats.get_summary())
+        return summary
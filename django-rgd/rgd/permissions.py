@@ -1,9 +1,10 @@
 from collections import deque
 import dataclasses
 from dataclasses import dataclass
-from itertools import chain
-from typing import Any, Deque, Iterator, Optional, Type, Union
+from functools import cached_property, lru_cache
+from typing import Any, Deque, Iterator, Optional, Tuple, Type, Union
 
+from django.apps import apps
 from django.conf import settings
 from django.contrib.auth.backends import BaseBackend
 from django.contrib.auth.models import User
@@ -79,12 +80,9 @@ class Path:
                 path.previous = self
                 yield path
 
-    def q(self, **kwargs: Any) -> Q:
-        """Return a `Q` object for this path.
-
-        Can be any keyword arguments i.e. `user__isnull=True`.
-        """
-        conditions = Q()
+    @cached_property
+    def lookup(self) -> str:
+        """Return the field lookup prefix for this path i.e. `parent__file`."""
         field_names = reversed(
             tuple(
                 path.field.name
@@ -92,8 +90,16 @@ class Path:
                 if not isinstance(path.field, IdentityPathField)
             )
         )
+        return '__'.join(field_names)
+
+    def q(self, **kwargs: Any) -> Q:
+        """Return a `Q` object for this path.
+
+        Can be any keyword arguments i.e. `user__isnull=True`.
+        """
+        conditions = Q()
         for key, value in kwargs.items():
-            dunder = '__'.join(chain(field_names, (key,)))
+            dunder = f'{self.lookup}__{key}' if self.lookup else key
             conditions &= Q(**{dunder: value})
         return conditions
 
@@ -123,6 +129,73 @@ def get_paths(source: Type[Model], target: Type[Model]) -> Iterator[Path]:
         queue.extendleft(frontier)
 
 
+@lru_cache(maxsize=None)
+def get_cached_paths(source: Type[Model], target: Type[Model]) -> Tuple[Path, ...]:
+    """Get all paths from a `source` model to a `target` model, memoized.
+
+    The model graph does not change at runtime, so the search performed by
+    `get_paths` only needs to happen once per `(source, target)` pair.
+    """
+    return tuple(get_paths(source, target))
+
+
+@lru_cache(maxsize=None)
+def get_checksumfile_paths(model: Type[Model]) -> Tuple[Path, ...]:
+    """Get all paths from a `model` to `ChecksumFile` used for permission checks."""
+    paths = list(get_cached_paths(model, models.ChecksumFile))
+    if model == models.Collection:
+        # Add custom reverse relationships
+        field = model._meta.get_field('checksumfiles')
+        paths.append(Path(field))
+    return tuple(paths)
+
+
+@dataclass(frozen=True)
+class PermissionLookups:
+    """The field lookups and conditions of the permission filter of a model.
+
+    The conditions on the user are built per request from these lookups, as
+    they hold the user; the conditions that do not depend on it are prebuilt.
+    """
+
+    creator: Tuple[str, ...]
+    has_no_owner: Tuple[Q, ...]
+    permission_user: Tuple[str, ...]
+    permission_role: Tuple[str, ...]
+
+
+@lru_cache(maxsize=None)
+def get_permission_lookups(model: Type[Model]) -> PermissionLookups:
+    """Get the permission filter lookups of a `model`, memoized."""
+
+    def lookup(path: Path, field: str) -> str:
+        return f'{path.lookup}__{field}' if path.lookup else field
+
+    file_paths = get_checksumfile_paths(model)
+    collection_paths = get_cached_paths(model, models.Collection)
+    return PermissionLookups(
+        creator=tuple(lookup(path, 'created_by') for path in file_paths),
+        has_no_owner=tuple(path.q(created_by__isnull=True) for path in file_paths),
+        permission_user=tuple(
+            lookup(path, 'collection_permissions__user') for path in collection_paths
+        ),
+        permission_role=tuple(
+            lookup(path, 'collection_permissions__role__gte') for path in collection_paths
+        ),
+    )
+
+
+def warm_permission_paths():
+    """Populate the permission path caches for all RGD models.
+
+    This is called when the `rgd` app is ready so that the first request
+    does not pay for the search over the model graph.
+    """
+    for model in apps.get_models():
+        if model._meta.app_label.startswith('rgd'):
+            get_permission_lookups(model)
+
+
 def filter_perm(user, queryset, role):
     """Filter a queryset.
 
@@ -139,30 +212,20 @@ def filter_perm(user, queryset, role):
     if user.is_active and user.is_superuser:
         return queryset
     # Check permissions
-    conditions = []
-    model = queryset.model
-    paths_to_checksumfile = [*get_paths(model, models.ChecksumFile)]
-    if model == models.Collection:
-        # Add custom reverse relationships
-        field = model._meta.get_field('checksumfiles')
-        path = Path(field)
-        paths_to_checksumfile.append(path)
-    for path in paths_to_checksumfile:
-        # A user can read/write a file if they are the creator
-        is_creator = path.q(created_by=user)
-        conditions.append(is_creator)
-        if (
-            getattr(settings, 'RGD_GLOBAL_READ_ACCESS', False)
-            and role == models.CollectionPermission.READER
-        ):
-            # A user can read any file by default
-            has_no_owner = path.q(created_by__isnull=True)
-            conditions.append(has_no_owner)
-    for path in get_paths(model, models.Collection):
-        # Check collection permissions
-        has_permission = path.q(collection_permissions__user=user)
-        has_role_level = path.q(collection_permissions__role__gte=role)
-        conditions.append(has_permission & has_role_level)
+    lookups = get_permission_lookups(queryset.model)
+    # A user can read/write a file if they are the creator
+    conditions = [Q(**{lookup: user}) for lookup in lookups.creator]
+    if (
+        getattr(settings, 'RGD_GLOBAL_READ_ACCESS', False)
+        and role == models.CollectionPermission.READER
+    ):
+        # A user can read any file by default
+        conditions.extend(lookups.has_no_owner)
+    # Check collection permissions
+    conditions.extend(
+        Q(**{user_lookup: user}) & Q(**{role_lookup: role})
+        for user_lookup, role_lookup in zip(lookups.permission_user, lookups.permission_role)
+    )
     whitelist = (
         queryset.none()
         .union(*(queryset.filter(condition) for condition in conditions), all=True)
@@ -1,4 +1,4 @@
-__all__ = ['CACHE_TIMEOUT']
+__all__ = ['CACHE_TIMEOUT', 'VECTOR_TILE_CACHE_TIMEOUT']
 
 from django.conf import settings
 
@@ -6,3 +6,8 @@ try:
     CACHE_TIMEOUT = settings.RGD_REST_CACHE_TIMEOUT
 except AttributeError:
     CACHE_TIMEOUT = 60 * 60 * 2
+
+try:
+    VECTOR_TILE_CACHE_TIMEOUT = settings.RGD_VECTOR_TILE_CACHE_TIMEOUT
+except AttributeError:
+    VECTOR_TILE_CACHE_TIMEOUT = 60 * 5
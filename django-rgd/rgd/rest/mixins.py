@@ -1,7 +1,16 @@
 """Django REST framework style mixins for views and viewsets."""
+
+import hashlib
+import json
+import math
+import time
+
+from django.conf import settings
 from django_filters.rest_framework import DjangoFilterBackend
+from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rgd.permissions import CollectionAuthorization, CollectionAuthorizationFilter
@@ -12,12 +21,58 @@ class BaseRestViewMixin:
     filter_backends = [CollectionAuthorizationFilter, DjangoFilterBackend]
 
 
-class TaskEventViewSetMixin:
+LONG_POLL_PARAMETERS = [
+    openapi.Parameter(
+        'wait',
+        openapi.IN_QUERY,
+        description=(
+            'Seconds to wait for the response to differ from the one whose '
+            '`ETag` is given in the `If-None-Match` header.'
+        ),
+        type=openapi.TYPE_NUMBER,
+    )
+]
+
+
+class LongPollMixin:
+    """Mixin answering requests by long polling.
+
+    Clients send the ``ETag`` of the last response they received in the
+    ``If-None-Match`` header, with a ``wait`` query parameter. The request
+    is held until the data changes, or answered with a 304 after ``wait``
+    seconds, at most ``RGD_LONG_POLL_MAX_WAIT``.
+    """
+
+    long_poll_interval = 0.5
+
+    def long_poll(self, request, get_data):
+        try:
+            wait = float(request.query_params.get('wait', 0))
+        except ValueError:
+            raise ValidationError('`wait` must be a number of seconds.')
+        # `float` accepts 'nan' and 'inf', which would hold the request forever
+        if not math.isfinite(wait):
+            raise ValidationError('`wait` must be a number of seconds.')
+        wait = max(0, min(wait, getattr(settings, 'RGD_LONG_POLL_MAX_WAIT', 30)))
+        previous = request.headers.get('If-None-Match')
+        deadline = time.monotonic() + wait
+        while True:
+            data = get_data()
+            digest = hashlib.md5(json.dumps(data, sort_keys=True, default=str).encode())
+            etag = f'"{digest.hexdigest()}"'
+            if etag != previous:
+                return Response(data, headers={'ETag': etag})
+            if time.monotonic() >= deadline:
+                return Response(status=304, headers={'ETag': etag})
+            time.sleep(self.long_poll_interval)
+
+
+class TaskEventViewSetMixin(LongPollMixin):
     """
     Mixin for any TaskEventMixin model.
 
     Provides the `status` action to retrieve the status of a
-    model's task event.
+    model's task event. It supports long polling, see ``LongPollMixin``.
 
     TODO: This should use a serializer instead.
     """
@@ -25,13 +80,18 @@ class TaskEventViewSetMixin:
     @swagger_auto_schema(
         method='GET',
         operation_summary='Check the status.',
+        manual_parameters=LONG_POLL_PARAMETERS,
     )
     @action(detail=True)
-    def status(self, *args, **kwargs):
+    def status(self, request, *args, **kwargs):
         obj = self.get_object()
-        data = {
-            'pk': obj.pk,
-            'model': type(obj).__name__,
-            'status': obj.status,
-        }
-        return Response(data)
+
+        def get_data():
+            obj.refresh_from_db(fields=['status'])
+            return {
+                'pk': obj.pk,
+                'model': type(obj).__name__,
+                'status': obj.status,
+            }
+
+        return self.long_poll(request, get_data)
@@ -1,5 +1,11 @@
+import hashlib
+import json
+
 from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils.cache import patch_cache_control
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import response, views
 from rest_framework.decorators import action
@@ -10,8 +16,10 @@ from rgd.filters import CollectionFilter, SpatialEntryFilter
 from rgd.models.file import ChecksumFile
 from rgd.rest.base import ModelViewSet, ReadOnlyModelViewSet
 from rgd.utility import get_file_data_url
+from rgd.vector_tiles import get_vector_tile
 
-from .authentication import UserSigner
+from . import VECTOR_TILE_CACHE_TIMEOUT
+from .authentication import SignedURLAuthentication, UserSigner
 from .mixins import BaseRestViewMixin, TaskEventViewSetMixin
 
 
@@ -22,7 +30,7 @@ class CollectionViewSet(ModelViewSet):
 
     @swagger_auto_schema(
         method='GET',
-        operation_summary='Get the file at the given index in this collection. Associated files are ordered by primary key and the provided index is the index in that ordered set. If the files in the collection change, this will not be reproducible.',
+        operation_summary='Get the file at the given index in this collection. Associated files are indexed in the order they were added to the collection. If the files in the collection change, this will not be reproducible.',
     )
     @action(
         detail=True,
@@ -31,12 +39,13 @@ class CollectionViewSet(ModelViewSet):
     )
     def item(self, request, pk, index):
         collection = get_object_or_404(models.Collection, pk=pk)
-        files = collection.checksumfiles.order_by('pk')
         try:
-            instance = files[int(index)]
-        except (IndexError, ValueError):
+            item = models.CollectionItem.objects.select_related('file').get(
+                collection=collection, ordinal=int(index)
+            )
+        except (models.CollectionItem.DoesNotExist, ValueError):
             raise ValidationError(f'index {index} not valid or out of range.')
-        return Response(serializers.ChecksumFileSerializer(instance).data)
+        return Response(serializers.ChecksumFileSerializer(item.file).data)
 
 
 class CollectionPermissionViewSet(ModelViewSet):
@@ -153,6 +162,33 @@ class SpatialEntryViewSet(ReadOnlyModelViewSet):
     def footprint(self, request, pk=None):
         return self.retrieve(request, pk=pk)
 
+    @swagger_auto_schema(
+        method='GET',
+        operation_summary='Get a Mapbox Vector Tile of the footprints matching the search parameters.',
+    )
+    @action(
+        detail=False,
+        url_path=r'tiles/(?P<z>\d+)/(?P<x>\d+)/(?P<y>\d+)\.mvt',
+        authentication_classes=ReadOnlyModelViewSet.authentication_classes
+        + [SignedURLAuthentication],
+    )
+    def vector_tile(self, request, z, x, y):
+        z, x, y = int(z), int(x), int(y)
+        if x >= 2**z or y >= 2**z:
+            raise ValidationError(f'Tile {z}/{x}/{y} out of range.')
+        query = request.query_params.copy()
+        query.pop(getattr(settings, 'RGD_SIGNED_URL_QUERY_PARAM', 'signature'), None)
+        # Hash the query to keep long filters within the key length limit of memcached
+        digest = hashlib.sha256(json.dumps(sorted(query.lists())).encode()).hexdigest()
+        cache_key = f'vector_tile:user_{request.user.pk}:{z}/{x}/{y}:{digest}'
+        if (tile := cache.get(cache_key, None)) is None:
+            queryset = self.filter_queryset(models.SpatialEntry.objects.all())
+            tile = get_vector_tile(queryset, z, x, y)
+            cache.set(cache_key, tile, VECTOR_TILE_CACHE_TIMEOUT)
+        response = HttpResponse(tile, content_type='application/vnd.mapbox-vector-tile')
+        patch_cache_control(response, private=True, max_age=VECTOR_TILE_CACHE_TIMEOUT)
+        return response
+
 
 class SpatialAssetViewSet(ModelViewSet):
     serializer_class = serializers.SpatialAssetSerializer
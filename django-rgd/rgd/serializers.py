@@ -7,6 +7,7 @@ from . import models
 MODIFIABLE_READ_ONLY_FIELDS = ['modified', 'created']
 TASK_EVENT_READ_ONLY_FIELDS = ['status', 'failure_reason']
 SPATIAL_ENTRY_EXCLUDE = ['footprint']
+SPATIAL_ENTRY_DERIVED_FIELDS = ['envelope', *models.SIMPLIFIED_FOOTPRINT_TOLERANCES]
 
 
 class RelatedField(serializers.PrimaryKeyRelatedField):
@@ -34,7 +35,7 @@ class RelatedField(serializers.PrimaryKeyRelatedField):
 class CollectionSerializer(serializers.ModelSerializer):
     class Meta:
         model = models.Collection
-        fields = '__all__'
+        exclude = ['item_count']
 
     def to_representation(self, instance):
         data = super().to_representation(instance)
@@ -79,6 +80,8 @@ class ChecksumFileSerializer(serializers.ModelSerializer):
             [
                 'checksum',
                 'last_validation',
+                'remote_etag',
+                'remote_last_modified',
             ]
             + MODIFIABLE_READ_ONLY_FIELDS
             + TASK_EVENT_READ_ONLY_FIELDS
@@ -108,6 +111,11 @@ class SpatialEntrySerializer(serializers.ModelSerializer):
         model = models.SpatialEntry
         exclude = SPATIAL_ENTRY_EXCLUDE
 
+    def get_field_names(self, declared_fields, info):
+        # The derived footprints are internal to querying/rendering
+        fields = super().get_field_names(declared_fields, info)
+        return [field for field in fields if field not in SPATIAL_ENTRY_DERIVED_FIELDS]
+
     def get_outline(self, obj):
         return json.loads(obj.outline.geojson)
 
@@ -1,7 +1,7 @@
 from allauth.account.signals import user_signed_up
 from django.conf import settings
 from django.db import transaction
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
 from django.dispatch import receiver
 from rgd import models
 from rgd.utility import skip_signal
@@ -13,6 +13,47 @@ def _post_save_checksum_file(sender, instance, *args, **kwargs):
     transaction.on_commit(lambda: instance._post_save_event_task(*args, **kwargs))
 
 
+# The fields of spatial entries that are summarized by `SpatialStatistics`
+_SUMMARIZED_FIELDS = {'footprint', 'outline', 'instrumentation', 'acquisition_date'}
+
+
+@receiver(pre_save)
+def _pre_save_spatial_entry(sender, instance, raw=False, update_fields=None, **kwargs):
+    if not issubclass(sender, models.SpatialEntry) or raw:
+        return
+    instance.__dict__.pop('_statistics_removed', None)
+    if instance._state.adding:
+        return
+    if update_fields is not None and not _SUMMARIZED_FIELDS.intersection(update_fields):
+        return
+    # The summary of the entry before this save
+    instance._statistics_removed = models.SpatialStatistics.get_change(instance.pk)
+
+
+@receiver(post_save)
+def _post_save_spatial_entry(sender, instance, created, raw=False, **kwargs):
+    if not issubclass(sender, models.SpatialEntry) or raw:
+        return
+    if not created and not hasattr(instance, '_statistics_removed'):
+        return
+    models.SpatialStatistics.apply_change(
+        removed=getattr(instance, '_statistics_removed', None),
+        added=models.SpatialStatistics.get_change(instance.pk),
+    )
+
+
+# Deleting a subclass also deletes its parent `SpatialEntry`, so only the
+#  signals of the parent are handled
+@receiver(pre_delete, sender=models.SpatialEntry)
+def _pre_delete_spatial_entry(sender, instance, **kwargs):
+    instance._statistics_removed = models.SpatialStatistics.get_change(instance.pk)
+
+
+@receiver(post_delete, sender=models.SpatialEntry)
+def _post_delete_spatial_entry(sender, instance, **kwargs):
+    models.SpatialStatistics.apply_change(removed=instance._statistics_removed)
+
+
 @receiver(user_signed_up)
 def set_new_user_inactive(sender, **kwargs):
     if getattr(settings, 'RGD_AUTO_APPROVE_SIGN_UP', None):
@@ -16,3 +16,10 @@ def task_checksum_file_post_save(checksumfile_pk):
     else:
         obj.status = Status.SKIPPED
         obj.save(update_fields=['status'])
+
+
+@shared_task(time_limit=settings.CELERY_TASK_TIME_LIMIT)
+def task_refresh_spatial_statistics():
+    from rgd.models import SpatialStatistics
+
+    SpatialStatistics.refresh_all()
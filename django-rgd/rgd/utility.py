@@ -10,7 +10,7 @@ import os
 from pathlib import Path
 import shutil
 import tempfile
-from typing import TYPE_CHECKING, Any, Optional
+from typing import TYPE_CHECKING, Any, Iterable, Optional, Sequence
 from urllib.error import HTTPError
 from urllib.parse import urlparse
 from urllib.request import urlopen
@@ -19,9 +19,12 @@ from uuid import uuid4
 import boto3
 from botocore import UNSIGNED
 from botocore.config import Config
+import django
 from django.conf import settings
 from django.contrib.gis.db.models import Model
 from django.core.files import File
+from django.db import transaction
+from django.db.models import QuerySet
 from django.db.models.fields.files import FieldFile
 from django.http import HttpResponseRedirect
 from django.utils.safestring import mark_safe
@@ -111,6 +114,80 @@ def get_or_create_no_commit(model: Model, defaults: Optional[dict] = None, **kwa
         return model(**defaults), True
 
 
+def bulk_upsert(
+    queryset: QuerySet,
+    rows: Iterable[dict],
+    key_fields: Sequence[str],
+    defaults: Optional[dict] = None,
+    delete_missing: bool = True,
+    batch_size: int = 500,
+    unique_fields: Optional[Sequence[str]] = None,
+):
+    """Synchronize the rows of a queryset with a collection of field values in bulk.
+
+    Each row is matched to an existing record of ``queryset`` by the values
+    of ``key_fields``. Matched records are updated only if one of the given
+    fields changed, unmatched rows are created with ``defaults`` and, if
+    ``delete_missing``, records of ``queryset`` without a row are deleted.
+    Fields not given in the rows (e.g. user edits) are left untouched.
+
+    If the model has a unique constraint on ``unique_fields`` (the key and
+    default fields), rows created concurrently by another transaction are
+    updated instead of failing on the constraint.
+
+    All writes are batched and run in a single transaction. Returns a tuple
+    of the number of created, updated and deleted records.
+
+    """
+    model = queryset.model
+    auto_now_fields = [f for f in model._meta.concrete_fields if getattr(f, 'auto_now', False)]
+
+    def get_key(values):
+        return tuple(values[k] for k in key_fields)
+
+    with transaction.atomic():
+        existing = {
+            tuple(getattr(obj, k) for k in key_fields): obj for obj in queryset.select_for_update()
+        }
+        to_create, to_update, create_fields, update_fields = [], [], set(), set()
+        for row in rows:
+            obj = existing.pop(get_key(row), None)
+            if obj is None:
+                to_create.append(model(**{**(defaults or {}), **row}))
+                create_fields.update(row)
+                continue
+            changed = [k for k, v in row.items() if getattr(obj, k) != v]
+            if changed:
+                for k in changed:
+                    setattr(obj, k, row[k])
+                for field in auto_now_fields:
+                    field.pre_save(obj, add=False)
+                update_fields.update(changed)
+                to_update.append(obj)
+        if unique_fields and to_create:
+            if django.VERSION >= (4, 1):
+                fields = (create_fields - set(unique_fields)) | {f.name for f in auto_now_fields}
+                model.objects.bulk_create(
+                    to_create,
+                    batch_size=batch_size,
+                    update_conflicts=True,
+                    unique_fields=unique_fields,
+                    update_fields=sorted(fields),
+                )
+            else:
+                model.objects.bulk_create(to_create, batch_size=batch_size, ignore_conflicts=True)
+        else:
+            model.objects.bulk_create(to_create, batch_size=batch_size)
+        if to_update:
+            update_fields.update(f.name for f in auto_now_fields)
+            model.objects.bulk_update(to_update, update_fields, batch_size=batch_size)
+        if not delete_missing:
+            existing = {}
+        elif existing:
+            model.objects.filter(pk__in=[o.pk for o in existing.values()]).delete()
+    return len(to_create), len(to_update), len(existing)
+
+
 def get_s3_client():
     if boto3.session.Session().get_credentials():
         s3 = boto3.client('s3')
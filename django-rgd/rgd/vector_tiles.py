@@ -0,0 +1,49 @@
+"""Mapbox Vector Tile (MVT) generation for spatial entries with PostGIS."""
+from django.db import connection
+from django.db.models import QuerySet
+
+from .models.constants import DB_SRID, SIMPLIFIED_FOOTPRINT_MAX_ZOOM, WEB_MERCATOR
+
+LAYER_NAME = 'spatial_entries'
+
+
+def get_footprint_column(z: int) -> str:
+    """Get the coarsest footprint column that is accurate enough for zoom level `z`."""
+    for field, max_zoom in sorted(SIMPLIFIED_FOOTPRINT_MAX_ZOOM.items(), key=lambda i: i[1]):
+        if z < max_zoom:
+            return field
+    return 'footprint'
+
+
+def get_vector_tile(queryset: QuerySet, z: int, x: int, y: int) -> bytes:
+    """Render the footprints of the entries in `queryset` in tile `z/x/y` as an MVT.
+
+    The `queryset` should already be filtered (e.g. by permissions and
+    search parameters); only its primary keys are used.
+    """
+    column = get_footprint_column(z)
+    subquery, subquery_params = queryset.order_by().values('pk').query.sql_with_params()
+    sql = f'''
+        WITH bounds AS (
+            SELECT ST_TileEnvelope(%s, %s, %s) AS geom
+        ),
+        mvtgeom AS (
+            SELECT
+                ST_AsMVTGeom(
+                    ST_Transform(COALESCE(e.{column}, e.footprint), {WEB_MERCATOR}),
+                    bounds.geom
+                ) AS geom,
+                e.spatial_id,
+                e.acquisition_date,
+                e.instrumentation
+            FROM rgd_spatialentry e, bounds
+            WHERE e.spatial_id IN ({subquery})
+                AND e.envelope && ST_Transform(bounds.geom, {DB_SRID})
+        )
+        SELECT ST_AsMVT(mvtgeom.*, %s) FROM mvtgeom
+    '''
+    params = [z, x, y, *subquery_params, LAYER_NAME]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        row = cursor.fetchone()
+    return bytes(row[0]) if row and row[0] is not None else b''
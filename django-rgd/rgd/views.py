@@ -3,9 +3,7 @@ import json
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.gis.db.models import Collect, Extent
-from django.contrib.gis.db.models.functions import AsGeoJSON, Centroid
-from django.contrib.postgres.aggregates import ArrayAgg
-from django.db.models import Count, Max, Min, Q
+from django.db.models import Count
 from django.shortcuts import redirect
 from django.views import generic
 from django.views.generic import DetailView, TemplateView
@@ -44,11 +42,33 @@ def query_params(params):
 class SpatialListView(PermissionListView):
     paginate_by = 15
 
+    def get_approximate_count(self):
+        """Get the count of unfiltered spatial entries from the statistics summaries.
+
+        The summaries are updated as entries are saved and deleted. Other users
+        keep the ``COUNT`` of the entries they can read.
+
+        """
+        if self.object_list.model is not models.SpatialEntry:
+            return None
+        if not self.request.user.is_superuser:
+            return None
+        if any(key != 'page' for key in self.request.GET):
+            return None
+        return models.SpatialStatistics.get_total_count()
+
+    def get_paginator(self, *args, **kwargs):
+        paginator = super().get_paginator(*args, **kwargs)
+        if (count := self.get_approximate_count()) is not None:
+            # Avoid a full `COUNT` over all spatial entries
+            paginator.count = count
+        return paginator
+
     def get_context_data(self, *args, **kwargs):
         context = super().get_context_data(*args, **kwargs)
-        full_queryset = self.object_list
         paginated_queryset = context['object_list']
-        count = full_queryset.count()
+        paginator = context['paginator']
+        count = paginator.count if paginator else self.object_list.count()
         summary = paginated_queryset.aggregate(
             Collect('outline'),
             Extent('outline'),
@@ -100,34 +120,30 @@ class SpatialEntriesListView(SpatialListView):
         return queryset
 
 
-class StatisticsView(PermissionListView):
-    paginate_by = None
-    model = models.SpatialEntry
-    context_object_name = 'spatial_entries'
+class StatisticsView(PermissionTemplateView):
     template_name = 'rgd/statistics.html'
 
     def get_context_data(self, *args, **kwargs):
         context = super().get_context_data(*args, **kwargs)
-        context.update(
-            self.object_list.aggregate(
-                count=Count('spatial_id', distinct=True),
-                coordinates=ArrayAgg(AsGeoJSON(Centroid('footprint'))),
-                instrumentation_count=Count(
-                    'instrumentation',
-                    distinct=True,
-                    filter=Q(instrumentation__isnull=False),
-                ),
-                acquisition_date__min=Min(
-                    'acquisition_date', filter=Q(acquisition_date__isnull=False)
-                ),
-                acquisition_date__max=Max(
-                    'acquisition_date', filter=Q(acquisition_date__isnull=False)
-                ),
-                extents=Extent('outline'),
+        # Read from the periodically refreshed snapshot rather than aggregating all entries
+        summary = models.SpatialStatistics.summarize(self.request.user)
+        context['count'] = summary['count']
+        context['instrumentation_count'] = len(summary['instrumentation'])
+        context['acquisition_date__min'] = summary['acquisition_date_min']
+        context['acquisition_date__max'] = summary['acquisition_date_max']
+        size = models.STATISTICS_GRID_SIZE
+        coordinates = []
+        for cell, count in summary['centroid_grid'].items():
+            x, y = (int(i) for i in cell.split(','))
+            coordinates.append(
+                {
+                    'type': 'Point',
+                    'coordinates': [(x + 0.5) * size, (y + 0.5) * size],
+                    'count': count,
+                }
             )
-        )
-        context['coordinates'] = '[' + ','.join(context['coordinates']) + ']'
-        extents = context['extents'] or [None] * 4
+        context['coordinates'] = json.dumps(coordinates)
+        extents = summary['extent'] or [None] * 4
         context['extents'] = json.dumps(
             {
                 'xmin': extents[0],
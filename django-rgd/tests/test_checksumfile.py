@@ -1,3 +1,4 @@
+from datetime import datetime, timezone
 import io
 from pathlib import Path
 import tempfile
@@ -5,6 +6,7 @@ import tempfile
 from django.db import IntegrityError
 import pytest
 from rgd.datastore import datastore, registry
+from rgd.management.commands import rgd_s3_files
 from rgd.models import ChecksumFile, FileSourceType, utils
 from rgd.models.collection import Collection
 
@@ -180,3 +182,41 @@ def test_output_file_handler(settings, file_path):
         file.save_file_contents(f, FILENAME)
     file.save()
     assert file.url == f'file://{str(Path(directory, FILENAME))}'
+
+
+@pytest.mark.django_db(transaction=True)
+def test_s3_loader_incremental_sync():
+    loader = rgd_s3_files.Loader('bucket', 'us-east-1')
+    modified = datetime(2022, 1, 1, tzinfo=timezone.utc)
+    objects = [
+        {'Key': 'a.tif', 'ETag': '"a"', 'LastModified': modified},
+        {'Key': 'b.tif', 'ETag': '"b"', 'LastModified': modified},
+    ]
+    assert len(loader.load_batch(objects)) == 2
+    assert ChecksumFile.objects.count() == 2
+    # Re-running only touches new or changed keys
+    assert loader.load_batch(objects) == []
+    objects[0]['ETag'] = '"changed"'
+    objects.append({'Key': 'c.tif', 'ETag': '"c"', 'LastModified': modified})
+    assert len(loader.load_batch(objects)) == 2
+    assert ChecksumFile.objects.count() == 3
+    assert ChecksumFile.objects.get(name='a.tif').remote_etag == '"changed"'
+
+
+@pytest.mark.django_db(transaction=True)
+def test_s3_loader_collection_and_backfill(collection):
+    modified = datetime(2022, 1, 1, tzinfo=timezone.utc)
+    objects = [{'Key': 'a.tif', 'ETag': '"a"', 'LastModified': modified}]
+    # Files synchronized before the remote state was recorded keep their checksum
+    url = rgd_s3_files.Loader('bucket', 'us-east-1')._format_url('bucket/a.tif')
+    ChecksumFile.objects.create(type=FileSourceType.URL, url=url, name='a.tif', checksum='abc')
+    assert rgd_s3_files.Loader('bucket', 'us-east-1').load_batch(objects) == []
+    file = ChecksumFile.objects.get(url=url, collection__isnull=True)
+    assert file.remote_etag == '"a"'
+    assert file.checksum == 'abc'
+    # The files of a collection are matched within that collection only
+    loader = rgd_s3_files.Loader('bucket', 'us-east-1', collection=collection)
+    assert len(loader.load_batch(objects)) == 1
+    assert loader.load_batch(objects) == []
+    collection.refresh_from_db()
+    assert len(collection) == 1
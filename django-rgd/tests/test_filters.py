@@ -1,8 +1,10 @@
 from datetime import datetime
+import importlib
 
 import pytest
 from rgd import models
 from rgd.filters import SpatialEntryFilter
+from rgd.permissions import filter_read_perm
 
 
 @pytest.mark.django_db(transaction=True)
@@ -81,3 +83,80 @@ def test_collection(spatial_asset_a):
     qs = filterset.filter_queryset(models.SpatialEntry.objects.all())
     assert qs.count() == 1
     assert spatial_asset_a.spatial_id == qs.first().spatial_id
+
+
+@pytest.mark.django_db(transaction=True)
+def test_derived_footprints(spatial_asset_a):
+    assert spatial_asset_a.envelope.equals(spatial_asset_a.footprint.envelope)
+    assert spatial_asset_a.footprint_low is not None
+    assert spatial_asset_a.footprint_mid is not None
+    # Updating only the footprint must keep the derived fields in sync
+    spatial_asset_a.footprint = spatial_asset_a.footprint.buffer(1)
+    spatial_asset_a.save(update_fields=['footprint'])
+    spatial_asset_a.refresh_from_db()
+    assert spatial_asset_a.envelope.equals(spatial_asset_a.footprint.envelope)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_spatial_statistics(spatial_asset_a, spatial_asset_b, admin_user):
+    models.SpatialStatistics.refresh_all()
+    summary = models.SpatialStatistics.summarize(admin_user)
+    assert summary['count'] == 2
+    assert sum(summary['centroid_grid'].values()) == 2
+    collection = spatial_asset_a.files.first().collection
+    statistics = models.SpatialStatistics.objects.get(collections=[collection.pk])
+    assert statistics.count == 1
+
+
+@pytest.mark.django_db(transaction=True)
+def test_spatial_statistics_changes(spatial_asset_a, spatial_asset_b):
+    models.SpatialStatistics.refresh_all()
+    key = [spatial_asset_a.files.first().collection.pk]
+    # Saves and deletes update the summaries without a refresh
+    spatial_asset_a.instrumentation = 'changed'
+    spatial_asset_a.save()
+    summary = models.SpatialStatistics.objects.get(collections=key).get_summary()
+    assert summary['instrumentation'] == {'changed'}
+    models.SpatialStatistics.refresh_all()
+    assert models.SpatialStatistics.objects.get(collections=key).get_summary() == summary
+    spatial_asset_b.delete()
+    assert models.SpatialStatistics.get_total_count() == 1
+
+
+@pytest.mark.django_db(transaction=True)
+def test_spatial_statistics_of_collections(
+    user, spatial_asset_a, spatial_asset_b, checksum_file_factory
+):
+    collection = spatial_asset_a.files.first().collection
+    other = models.Collection.objects.create(name='other')
+    for readable in (collection, other):
+        models.CollectionPermission.objects.create(
+            collection=readable, user=user, role=models.CollectionPermission.READER
+        )
+    # An entry in both readable collections is counted once
+    spatial_asset_a.files.add(checksum_file_factory(collection=other))
+    spatial_asset_b.files.update(collection=other)
+    models.SpatialStatistics.refresh_all()
+    assert models.SpatialStatistics.summarize(user)['count'] == 2
+    # Users who also read the files they created get an exact summary
+    spatial_asset_b.files.update(collection=None, created_by=user)
+    summary = models.SpatialStatistics.summarize(user)
+    assert summary['count'] == filter_read_perm(user, models.SpatialEntry.objects.all()).count()
+    assert summary['count'] == 2
+
+
+@pytest.mark.django_db(transaction=True)
+def test_derived_footprints_of_bulk_updates(spatial_asset_a):
+    # Writes that skip `save` are kept in sync by the database
+    footprint = spatial_asset_a.footprint.buffer(1)
+    models.SpatialEntry.objects.filter(pk=spatial_asset_a.pk).update(footprint=footprint)
+    spatial_asset_a.refresh_from_db()
+    assert spatial_asset_a.envelope.equals(footprint.envelope)
+
+
+def test_derived_footprint_tolerances_match_trigger():
+    trigger = importlib.import_module('rgd.migrations.0014_spatialentry_derived_footprints_trigger')
+    for field, tolerance in models.SIMPLIFIED_FOOTPRINT_TOLERANCES.items():
+        assert f'NEW.{field} := ST_SimplifyPreserveTopology(NEW.footprint, {tolerance});' in (
+            trigger.CREATE_TRIGGER
+        )
@@ -1,7 +1,18 @@
+import io
+
+from django.apps import apps
+from django.core.management import call_command
 import pytest
 from rest_framework.authtoken.views import ObtainAuthToken
 from rgd import models
-from rgd.permissions import filter_read_perm, filter_write_perm
+from rgd.permissions import (
+    filter_read_perm,
+    filter_write_perm,
+    get_cached_paths,
+    get_checksumfile_paths,
+    get_paths,
+    get_permission_lookups,
+)
 from rgd.rest.mixins import BaseRestViewMixin
 from rgd.urls import urlpatterns
 from rgd.views import PermissionDetailView, PermissionListView, PermissionTemplateView
@@ -94,3 +105,34 @@ def test_urls():
                     ObtainAuthToken,
                 ),
             )
+
+
+def test_cached_paths_match_search():
+    for model in apps.get_models():
+        for target in (models.ChecksumFile, models.Collection):
+            expected = [path.lookup for path in get_paths(model, target)]
+            assert [path.lookup for path in get_cached_paths(model, target)] == expected
+
+
+@pytest.mark.django_db(transaction=True)
+def test_filter_perm_uses_cached_paths(user):
+    spatial_models = [
+        model for model in apps.get_models() if issubclass(model, models.SpatialEntry)
+    ]
+    # The paths are searched once and the same objects are reused afterwards
+    for model in spatial_models:
+        assert get_cached_paths(model, models.Collection) is get_cached_paths(
+            model, models.Collection
+        )
+        assert get_checksumfile_paths(model) is get_checksumfile_paths(model)
+        assert get_permission_lookups(model) is get_permission_lookups(model)
+    hits = get_cached_paths.cache_info().hits
+    assert filter_read_perm(user, models.SpatialEntry.objects.all()).count() == 0
+    assert get_cached_paths.cache_info().hits > hits
+
+
+@pytest.mark.django_db(transaction=True)
+def test_permissions_benchmark_command(user):
+    out = io.StringIO()
+    call_command('rgd_permissions_benchmark', number=1, stdout=out)
+    assert 'rgd.SpatialEntry' in out.getvalue()
@@ -1,4 +1,5 @@
 from pathlib import Path
+from unittest import mock
 
 import pytest
 from rest_framework import status
@@ -121,3 +122,73 @@ def test_get_checksum_file_tree(
     assert files[Path(file4.name).name]['id'] == file4.id
     assert files[Path(file5.name).name]['id'] == file5.id
     assert files[Path(file6.name).name]['id'] == file6.id
+
+
+@pytest.mark.django_db(transaction=True)
+def test_collection_item_index(admin_api_client, collection, checksum_file_factory):
+    files = [checksum_file_factory(collection=collection) for _ in range(3)]
+    collection.refresh_from_db()
+    assert len(collection) == 3
+    response = admin_api_client.get(f'/api/rgd/collection/{collection.pk}/item/1')
+    assert response.status_code == 200
+    assert response.data['id'] == files[1].pk
+    # Removing a file keeps the index dense
+    files[0].delete()
+    collection.refresh_from_db()
+    assert len(collection) == 2
+    assert sorted(collection.items.values_list('ordinal', flat=True)) == [0, 1]
+    response = admin_api_client.get(f'/api/rgd/collection/{collection.pk}/item/2')
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db(transaction=True)
+def test_spatial_entry_vector_tile(admin_api_client, spatial_asset_a):
+    response = admin_api_client.get('/api/rgd/spatial_entry/tiles/0/0/0.mvt')
+    assert response.status_code == 200
+    assert response['Content-Type'] == 'application/vnd.mapbox-vector-tile'
+    assert len(response.content) > 0
+    response = admin_api_client.get('/api/rgd/spatial_entry/tiles/0/1/0.mvt')
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db(transaction=True)
+def test_spatial_entry_vector_tile_cache_key(admin_api_client, spatial_asset_a):
+    with mock.patch('rgd.rest.viewsets.cache') as cache:
+        cache.get.return_value = None
+        # A polygon with a long well-known text
+        ring = [(i / 10, (i % 2) / 10) for i in range(50)] + [(4.9, 10), (0, 10), (0, 0)]
+        q = 'POLYGON ((' + ', '.join(f'{x} {y}' for x, y in ring) + '))'
+        response = admin_api_client.get('/api/rgd/spatial_entry/tiles/0/0/0.mvt', {'q': q})
+    assert response.status_code == 200
+    # The query is hashed to stay within the key length limit of memcached
+    (cache_key, *_), _ = cache.set.call_args
+    assert len(cache_key) < 250
+
+
+@pytest.mark.django_db(transaction=True)
+def test_collection_item_index_of_deferred_files(collection, checksum_file_factory):
+    file = checksum_file_factory()
+    # Moving a file loaded without its collection still indexes it
+    deferred = ChecksumFile.objects.only('id', 'name').get(pk=file.pk)
+    deferred.collection = collection
+    deferred.save()
+    collection.refresh_from_db()
+    assert len(collection) == 1
+    assert collection.items.get(ordinal=0).file_id == file.pk
+
+
+@pytest.mark.django_db(transaction=True)
+def test_collection_item_index_of_bulk_writes(collection, checksum_file_factory):
+    files = [checksum_file_factory() for _ in range(3)]
+    # Bulk writes bypass signals, the index is kept by the database
+    ChecksumFile.objects.filter(pk__in=[f.pk for f in files]).update(collection=collection)
+    collection.refresh_from_db()
+    assert len(collection) == 3
+    ChecksumFile.objects.filter(pk=files[0].pk).delete()
+    collection.refresh_from_db()
+    assert len(collection) == 2
+    assert sorted(collection.items.values_list('ordinal', flat=True)) == [0, 1]
+    ChecksumFile.objects.filter(collection=collection).update(collection=None)
+    collection.refresh_from_db()
+    assert len(collection) == 0
+    assert not collection.items.exists()